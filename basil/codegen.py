@@ -0,0 +1,383 @@
+"""
+Generates a Python module with a recursive descent parser for a syntax JSON.
+
+The generated module has one function per node type, in which token type
+comparisons, choices, optionals and repetitions are inlined as plain Python
+code. It builds Node trees directly and registers the same errors as the parser
+combinators in basil.parser, so it raises the same ParseError.
+
+Use FileParser.load_generated_parser() to parse with a generated module.
+Packrat memoization and verbose printing are not supported by generated code.
+
+Usage: python -m basil.codegen path/to/syntax.json path/to/generated_parser.py
+"""
+
+import argparse
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from basil.parser import (
+    BaseParser,
+    ChoiceParser,
+    ConcatenateParser,
+    NodeParser,
+    OptionalParser,
+    RepeatParser,
+    TokenParser,
+)
+from basil.syntax_loader.syntax_loader import SyntaxLoader
+
+INDENT = "    "
+
+MODULE_HEADER = """\
+# Generated by basil.codegen, do not edit.
+# mypy: ignore-errors
+
+from typing import Dict, List, Optional, Tuple
+
+from basil.error_collector import ParseErrorCollector
+from basil.models import Node, ParserInput, Token
+
+FAILED = -1
+
+SYNTAX_JSON = {syntax_json}
+"""
+
+MODULE_FOOTER = '''
+
+NODE_PARSERS = {{
+{node_parsers}
+}}
+
+
+def parse(
+    input: ParserInput, offset: int, node_type: str, collector: ParseErrorCollector
+) -> Tuple[Optional[Node], int]:
+    """
+    Returns the parsed node and the offset after it, or (None, FAILED).
+    """
+
+    tokens = input.tokens
+    type_ids = input.get_type_ids(collector.token_type_names)
+    children: List[Token | Node] = []
+
+    offset = NODE_PARSERS[node_type](
+        tokens, type_ids, len(type_ids), offset, children, collector
+    )
+
+    if offset == FAILED:
+        return None, FAILED
+
+    return children[0], offset
+'''
+
+LOOKAHEAD = "(type_ids[offset] if offset < n else -1)"
+
+
+def parse_function_name(node_type: str) -> str:
+    return f"parse_{node_type}"
+
+
+class _CodeGenerator:
+    def __init__(self, syntax_loader: SyntaxLoader) -> None:
+        self.syntax_loader = syntax_loader
+
+        # Module level frozensets of token type ids, by their contents
+        self.token_id_sets: Dict[frozenset[int], str] = {}
+
+        # Suffix for local variables, so nested parsers don't overwrite them
+        self.variable_count = 0
+
+    def generate(self, syntax_file_content: str) -> str:
+        functions: List[str] = []
+
+        for node_type, parser in self.syntax_loader.parsers.items():
+            functions.append(self._generate_function(node_type, parser))
+
+        token_id_sets = "".join(
+            f"{name} = frozenset({sorted(token_type_ids)!r})\n"
+            for token_type_ids, name in self.token_id_sets.items()
+        )
+
+        node_parsers = "\n".join(
+            f"{INDENT}{node_type!r}: {parse_function_name(node_type)},"
+            for node_type in self.syntax_loader.parsers
+        )
+
+        return (
+            MODULE_HEADER.format(syntax_json=repr(syntax_file_content))
+            + token_id_sets
+            + "".join(functions)
+            + MODULE_FOOTER.format(node_parsers=node_parsers)
+        )
+
+    def _generate_function(self, node_type: str, parser: ConcatenateParser) -> str:
+        lines = [
+            "",
+            "",
+            f"def {parse_function_name(node_type)}("
+            + "tokens, type_ids, n, offset, parent, collector):",
+            f"{INDENT}children: List[Token | Node] = []",
+        ]
+        lines += self._generate(parser, 1)
+        lines += [
+            f"{INDENT}if offset != FAILED:",
+            f"{INDENT * 2}parent.append(Node(children, {node_type!r}))",
+            f"{INDENT}return offset",
+        ]
+
+        return "\n".join(lines) + "\n"
+
+    def _new_suffix(self) -> int:
+        self.variable_count += 1
+        return self.variable_count
+
+    def _can_start(self, parser: BaseParser, lookahead: str) -> Optional[str]:
+        """
+        Returns a condition checking whether parser can start with the lookahead
+        token type id, or None if it can always start.
+        """
+
+        if parser.nullable:
+            return None
+
+        token_type_ids = frozenset(parser.first_token_type_ids)
+
+        if len(token_type_ids) == 1:
+            return f"{lookahead} == {next(iter(token_type_ids))}"
+
+        try:
+            name = self.token_id_sets[token_type_ids]
+        except KeyError:
+            name = f"FIRST_{len(self.token_id_sets)}"
+            self.token_id_sets[token_type_ids] = name
+
+        return f"{lookahead} in {name}"
+
+    def _generate(self, parser: BaseParser, depth: int) -> List[str]:
+        """
+        Returns lines that parse at offset and append to children. Afterwards,
+        offset is the offset after the parsed part, or FAILED. Children are left
+        as is on failure, the caller truncates them if needed.
+        """
+
+        if isinstance(parser, TokenParser):
+            return self._generate_token(parser, depth)
+
+        if isinstance(parser, NodeParser):
+            return [
+                INDENT * depth
+                + f"offset = {parse_function_name(parser.node_type)}("
+                + "tokens, type_ids, n, offset, children, collector)"
+            ]
+
+        if isinstance(parser, ConcatenateParser):
+            return self._generate_concatenate(parser, depth)
+
+        if isinstance(parser, ChoiceParser):
+            return self._generate_choice(parser, depth)
+
+        if isinstance(parser, OptionalParser):
+            return self._generate_optional(parser, depth)
+
+        if isinstance(parser, RepeatParser):
+            return self._generate_repeat(parser, depth)
+
+        raise NotImplementedError  # pragma:nocover
+
+    def _generate_token(self, parser: TokenParser, depth: int) -> List[str]:
+        indent = INDENT * depth
+
+        return [
+            f"{indent}if {LOOKAHEAD} == {parser.token_type_id}:",
+            f"{indent}{INDENT}children.append(tokens[offset])",
+            f"{indent}{INDENT}offset += 1",
+            f"{indent}else:",
+            f"{indent}{INDENT}collector.register(offset, {parser.token_type_mask})",
+            f"{indent}{INDENT}offset = FAILED",
+        ]
+
+    def _generate_concatenate(self, parser: ConcatenateParser, depth: int) -> List[str]:
+        indent = INDENT * depth
+
+        # Same fail fast as ConcatenateParser.parse()
+        lines = [
+            f"{indent}if n - offset < {parser.min_length} and not collector.enabled:",
+            f"{indent}{INDENT}offset = FAILED",
+            f"{indent}else:",
+        ]
+
+        # Every next child is only parsed if the previous ones didn't fail. The
+        # checks are siblings, nesting them fails to compile for long ones.
+        child_depth = depth + 1
+        for index, child in enumerate(parser.parsers):
+            if index == 0:
+                lines += self._generate(child, child_depth)
+            else:
+                lines.append(INDENT * child_depth + "if offset != FAILED:")
+                lines += self._generate(child, child_depth + 1)
+
+        return lines
+
+    def _generate_choice(self, parser: ChoiceParser, depth: int) -> List[str]:
+        suffix = self._new_suffix()
+        start, mark, lookahead = f"start_{suffix}", f"mark_{suffix}", f"la_{suffix}"
+
+        lines = [
+            INDENT * depth + f"{start} = offset",
+            INDENT * depth + f"{mark} = len(children)",
+            INDENT * depth + f"{lookahead} = {LOOKAHEAD}",
+            INDENT * depth + "offset = FAILED",
+        ]
+
+        # Errors of skipped alternatives are registered as ChoiceParser does.
+        # The order of registering doesn't matter, the collector only keeps the
+        # furthest offset. Later alternatives are only tried while offset is
+        # FAILED, in sibling checks like in _generate_concatenate().
+        for index, alternative in enumerate(parser.parsers):
+            alternative_depth = depth
+            if index > 0:
+                lines.append(INDENT * depth + "if offset == FAILED:")
+                alternative_depth += 1
+
+            lines += self._generate_attempt(
+                alternative,
+                alternative_depth,
+                start,
+                mark,
+                lookahead,
+                register_empty_mask=False,
+            )
+
+        return lines
+
+    def _generate_attempt(
+        self,
+        parser: BaseParser,
+        depth: int,
+        start: str,
+        mark: str,
+        lookahead: str,
+        register_empty_mask: bool = True,
+    ) -> List[str]:
+        """
+        Returns lines that parse at start if parser can start with the lookahead,
+        or register the first token types of parser otherwise. Children are
+        truncated on failure.
+
+        ChoiceParser doesn't register skipped alternatives without first token
+        types, OptionalParser does.
+        """
+
+        indent = INDENT * depth
+        condition = self._can_start(parser, lookahead)
+
+        if condition is None:
+            inner_depth = depth
+            lines = []
+        else:
+            inner_depth = depth + 1
+            lines = [f"{indent}if {condition}:"]
+
+        lines += [INDENT * inner_depth + f"offset = {start}"]
+        lines += self._generate(parser, inner_depth)
+        lines += [
+            INDENT * inner_depth + "if offset == FAILED:",
+            INDENT * (inner_depth + 1) + f"del children[{mark}:]",
+        ]
+
+        if condition is not None and (parser.first_token_mask or register_empty_mask):
+            lines += [
+                f"{indent}else:",
+                f"{indent}{INDENT}collector.register({start}, "
+                + f"{parser.first_token_mask})",
+            ]
+
+        return lines
+
+    def _generate_optional(self, parser: OptionalParser, depth: int) -> List[str]:
+        suffix = self._new_suffix()
+        start, mark, lookahead = f"start_{suffix}", f"mark_{suffix}", f"la_{suffix}"
+        indent = INDENT * depth
+
+        lines = [
+            f"{indent}{start} = offset",
+            f"{indent}{mark} = len(children)",
+            f"{indent}{lookahead} = {LOOKAHEAD}",
+        ]
+        lines += self._generate_attempt(parser.inner, depth, start, mark, lookahead)
+        lines += [
+            f"{indent}if offset == FAILED:",
+            f"{indent}{INDENT}offset = {start}",
+        ]
+
+        return lines
+
+    def _generate_repeat(self, parser: RepeatParser, depth: int) -> List[str]:
+        suffix = self._new_suffix()
+        start, mark, count = f"start_{suffix}", f"mark_{suffix}", f"count_{suffix}"
+        indent = INDENT * depth
+        loop_indent = indent + INDENT
+
+        lines = []
+        if parser.min_repeats:
+            lines.append(f"{indent}{count} = 0")
+        lines.append(f"{indent}while True:")
+
+        condition = self._can_start(parser.inner, LOOKAHEAD)
+        if condition is not None:
+            lines += [
+                f"{loop_indent}if not ({condition}):",
+                f"{loop_indent}{INDENT}collector.register(offset, "
+                + f"{parser.inner.first_token_mask})",
+                f"{loop_indent}{INDENT}break",
+            ]
+
+        lines += [
+            f"{loop_indent}{start} = offset",
+            f"{loop_indent}{mark} = len(children)",
+        ]
+        lines += self._generate(parser.inner, depth + 1)
+        lines += [
+            f"{loop_indent}if offset == FAILED:",
+            f"{loop_indent}{INDENT}del children[{mark}:]",
+            f"{loop_indent}{INDENT}offset = {start}",
+            f"{loop_indent}{INDENT}break",
+        ]
+
+        if parser.min_repeats:
+            lines.append(f"{loop_indent}{count} += 1")
+            lines += [
+                f"{indent}if {count} < {parser.min_repeats}:",
+                f"{indent}{INDENT}offset = FAILED",
+            ]
+
+        return lines
+
+
+def generate_parser_module(syntax_file_content: str) -> str:
+    """
+    Returns the source code of a parser module for a syntax JSON.
+    """
+
+    syntax_loader = SyntaxLoader(syntax_file_content)
+    return _CodeGenerator(syntax_loader).generate(syntax_file_content)
+
+
+def write_parser_module(syntax_file: Path, output_file: Path) -> None:
+    output_file.write_text(generate_parser_module(syntax_file.read_text()))
+
+
+def main(args: Optional[List[str]] = None) -> None:  # pragma:nocover
+    arg_parser = argparse.ArgumentParser(
+        description="Generate a Python parser module for a syntax JSON."
+    )
+    arg_parser.add_argument("syntax_file", type=Path)
+    arg_parser.add_argument("output_file", type=Path)
+    parsed_args = arg_parser.parse_args(args)
+
+    write_parser_module(parsed_args.syntax_file, parsed_args.output_file)
+
+
+if __name__ == "__main__":  # pragma:nocover
+    main()
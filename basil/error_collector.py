@@ -1,39 +1,51 @@
-from typing import List, Set
+from typing import List
 
 from basil.exceptions import ParseError
+from basil.models import EndOfFile, ParserInput, Token
 
 
 class ParseErrorCollector:
-    def __init__(self) -> None:
-        self.errors: List[ParseError] = []
+    def __init__(self, token_type_names: List[str]) -> None:
+        # Token type names by token type id, see SyntaxLoader.
+        self.token_type_names = token_type_names
 
-    def register(self, error: "ParseError") -> None:
-        # We only keep the furthest errors
+        # We only keep the furthest failure offset and the token types expected
+        # there as a bitmask: bit i is set if token type id i was expected.
+        # A ParseError is only built once parsing failed.
+        self.offset = -1
+        self.expected_token_mask = 0
 
-        if not self.errors:
-            self.errors = [error]
+        # Parsers skip work that only matters for error reporting if this is off.
+        self.enabled = True
 
-        max_offset = self.errors[0].offset
+    def register(self, offset: int, expected_token_mask: int) -> None:
+        if not self.enabled or offset < self.offset:
+            return
 
-        if error.offset > max_offset:
-            self.errors = [error]
-
-        if error.offset == max_offset:
-            self.errors.append(error)
+        if offset > self.offset:
+            self.offset = offset
+            self.expected_token_mask = expected_token_mask
+        else:
+            self.expected_token_mask |= expected_token_mask
 
     def reset(self) -> None:
-        self.errors = []
+        self.offset = -1
+        self.expected_token_mask = 0
 
-    def get_furthest_error(self) -> "ParseError":
-        if not self.errors:  # pragma:nocover
+    def get_furthest_error(self, input: ParserInput) -> ParseError:
+        if self.offset < 0:  # pragma:nocover
             raise ValueError("No errors were collected.")
 
-        offset = self.errors[0].offset
-        found = self.errors[0].found
-
-        expected_token_types: Set[str] = set()
+        found: Token | EndOfFile
+        if self.offset < len(input.tokens):
+            found = input.tokens[self.offset]
+        else:
+            found = EndOfFile(input.file)
 
-        for error in self.errors:
-            expected_token_types.update(error.expected_token_types)
+        expected_token_types = {
+            token_type
+            for token_type_id, token_type in enumerate(self.token_type_names)
+            if self.expected_token_mask >> token_type_id & 1
+        }
 
-        return ParseError(offset, found, expected_token_types)
+        return ParseError(self.offset, found, expected_token_types)
@@ -0,0 +1,253 @@
+from typing import Iterator, List, Optional, Set, Tuple
+
+from basil.iterative_parser import Frame, IterativeParser, Step
+from basil.models import EnterEvent, Event, ExitEvent, ParserInput, TokenEvent
+from basil.parse_context import ParseContext
+from basil.parser import (
+    FAILED,
+    BaseParser,
+    ConcatenateParser,
+    OptionalParser,
+    RepeatParser,
+    TokenParser,
+)
+
+# Yielded by EventParser.iter_events() when it needs a token that is not there
+# yet, see EventParser.input_complete
+MORE_INPUT = Event()
+
+
+class EventParser(IterativeParser):
+    """
+    Parses like IterativeParser, but produces events instead of a Node tree.
+
+    Events are buffered while a frame on the stack is live: if it fails, the
+    parse can still succeed without the events parsed since the frame started.
+    That is a choice with untried alternatives, or an optional or repetition
+    that skipped its inner parser would be followed by a token that may follow
+    it, see SyntaxLoader._analyze_follow(). Without live frames, a failure fails
+    the whole parse, so buffered events are yielded. Memory use depends on the
+    nesting depth and how far the parser may backtrack, not on the input size.
+
+    After a failure, events that were already yielded are not taken back.
+    Packrat memoization is not supported, the memo of context is not used.
+
+    Tokens can be appended to the input while iterating, see PushParser. Then
+    input_complete should be disabled until the last token was appended, and
+    token_count updated after appending. Until then, MORE_INPUT is yielded when
+    the parse needs a token past token_count.
+    """
+
+    def __init__(self, input: ParserInput, context: ParseContext) -> None:
+        super().__init__(input, context)
+        self.memoize = False
+
+        # Events that are not yielded yet
+        self.events: List[Event] = []
+
+        # Number of events that were yielded
+        self.flushed = 0
+
+        # Number of frames on the stack with live set
+        self.live_frames = 0
+
+        # Offset after the parsed node, or FAILED. Set when iter_events() is done.
+        self.offset = FAILED
+
+        self.input_complete = True
+
+    def iter_events(self, parser: ConcatenateParser, offset: int) -> Iterator[Event]:
+        assert parser.node_type
+
+        self.stack = []
+        self.events = []
+        self.flushed = 0
+        self.live_frames = 0
+
+        starters = self.starters
+        resumers = self.resumers
+        stack = self.stack
+        events = self.events
+
+        next_parser: Optional[BaseParser] = parser
+        value = offset
+
+        while True:
+            if value >= self.token_count and not self.input_complete:
+                yield MORE_INPUT
+                continue
+
+            if next_parser is not None:
+                next_parser, value = starters[type(next_parser)](next_parser, value)
+            elif stack:
+                frame = stack[-1]
+                next_parser, value = resumers[type(frame.parser)](frame, value)
+            else:
+                break
+
+            if events and not self.live_frames:
+                yield from events
+                self.flushed += len(events)
+                events.clear()
+
+            if value == FAILED and stack and not self.live_frames:
+                next_parser, value = self._fail()
+
+        if value != FAILED:
+            # Events added by _fail() when it ended the parse
+            yield from events
+            self.flushed += len(events)
+            events.clear()
+
+        self.offset = value
+
+    def _fail(self) -> Step:
+        """
+        Called when a failure is returned to the frame on top of the stack and
+        no frame is live, so the parse fails. See RecoveringParser.
+        """
+
+        return None, FAILED
+
+    def needed_offsets(self) -> Tuple[int, Set[int]]:
+        """
+        Returns the offset from which on the parse may still read every token,
+        and the offsets before it where it may read a single token, while
+        MORE_INPUT is yielded. See PushParser.
+
+        A live frame that fails continues at its start, or a repetition after
+        its last repeat. When a frame that isn't live fails, the token there is
+        only read to report the error. The furthest error is needed as well.
+        """
+
+        start = self.token_count
+        offsets: Set[int] = set()
+
+        for frame in self.stack:
+            if isinstance(frame.parser, RepeatParser):
+                offset = frame.offset
+            elif isinstance(frame.parser, OptionalParser) or frame.live:
+                offset = frame.start
+            else:
+                continue
+
+            if frame.live:
+                start = min(start, offset)
+            else:
+                offsets.add(offset)
+
+        if 0 <= self.error_collector.offset < self.token_count:
+            offsets.add(self.error_collector.offset)
+
+        return start, {offset for offset in offsets if offset < start}
+
+    def _mark(self) -> int:
+        return self.flushed + len(self.events)
+
+    def _backtrack(self, mark: int) -> None:
+        # Yielded events are only backtracked when the parse fails.
+        del self.events[max(mark - self.flushed, 0) :]
+
+    def _set_live(self, frame: Frame, live: bool) -> None:
+        if live != frame.live:
+            frame.live = live
+            self.live_frames += 1 if live else -1
+
+    def _start_token(self, parser: BaseParser, offset: int) -> Step:
+        assert isinstance(parser, TokenParser)
+
+        if offset < self.token_count and self.type_ids[offset] == parser.token_type_id:
+            self.events.append(TokenEvent(self.tokens[offset]))
+            return None, offset + 1
+
+        self.error_collector.register(offset, parser.token_type_mask)
+        return None, FAILED
+
+    def _start_concatenate(self, parser: BaseParser, offset: int) -> Step:
+        assert isinstance(parser, ConcatenateParser)
+
+        if (
+            self.token_count - offset < parser.min_length
+            and not self.error_collector.enabled
+        ):
+            return None, FAILED
+
+        self._push(parser, offset)
+
+        if parser.node_type is not None:
+            self.events.append(EnterEvent(parser.node_type))
+
+        return parser.parsers[0], offset
+
+    def _resume_concatenate(self, frame: Frame, returned: int) -> Step:
+        parser = frame.parser
+        assert isinstance(parser, ConcatenateParser)
+
+        if returned != FAILED:
+            frame.index += 1
+
+            if frame.index < len(parser.parsers):
+                return parser.parsers[frame.index], returned
+
+        self.stack.pop()
+
+        if parser.node_type is not None and returned != FAILED:
+            self.events.append(ExitEvent(parser.node_type))
+
+        return None, returned
+
+    def _start_choice(self, parser: BaseParser, offset: int) -> Step:
+        step = super()._start_choice(parser, offset)
+
+        if step[0] is not None:
+            frame = self.stack[-1]
+            self._set_live(frame, len(frame.alternatives) > 1)
+
+        return step
+
+    def _resume_choice(self, frame: Frame, returned: int) -> Step:
+        step = super()._resume_choice(frame, returned)
+        last = frame.index >= len(frame.alternatives) - 1
+        self._set_live(frame, step[0] is not None and not last)
+        return step
+
+    def _start_optional(self, parser: BaseParser, offset: int) -> Step:
+        assert isinstance(parser, OptionalParser)
+        step = super()._start_optional(parser, offset)
+
+        if step[0] is not None:
+            live = self._lookahead(offset) in parser.follow_token_type_ids
+            self._set_live(self.stack[-1], live)
+
+        return step
+
+    def _resume_optional(self, frame: Frame, returned: int) -> Step:
+        self._set_live(frame, False)
+        return super()._resume_optional(frame, returned)
+
+    def _start_repeat(self, parser: BaseParser, offset: int) -> Step:
+        assert isinstance(parser, RepeatParser)
+        step = super()._start_repeat(parser, offset)
+
+        if step[0] is not None:
+            self._set_live(self.stack[-1], self._repeat_is_live(parser, 0, offset))
+
+        return step
+
+    def _resume_repeat(self, frame: Frame, returned: int) -> Step:
+        parser = frame.parser
+        assert isinstance(parser, RepeatParser)
+        step = super()._resume_repeat(frame, returned)
+
+        live = step[0] is not None and self._repeat_is_live(
+            parser, frame.index, step[1]
+        )
+        self._set_live(frame, live)
+        return step
+
+    def _repeat_is_live(self, parser: RepeatParser, repeats: int, offset: int) -> bool:
+        # If the next repetition fails, the repetition stops at offset.
+        return (
+            repeats >= parser.min_repeats
+            and self._lookahead(offset) in parser.follow_token_type_ids
+        )
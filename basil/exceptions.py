@@ -1,4 +1,4 @@
-from typing import Set
+from typing import Any, Set, Tuple
 
 from basil.models import EndOfFile, Position, Token
 
@@ -7,6 +7,9 @@ class TokenizerException(Exception):
     def __init__(self, position: Position) -> None:
         self.position = position
 
+    def __reduce__(self) -> Tuple[Any, ...]:
+        return (type(self), (self.position,))
+
     def __str__(self) -> str:  # pragma:nocover
         return f"{self.position}: Tokenization failed."
 
@@ -22,6 +25,10 @@ class ParseError(Exception):
         self.expected_token_types = expected_token_types
         self.offset = offset
 
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # Exceptions are pickled with their args, which are not set here.
+        return (type(self), (self.offset, self.found, self.expected_token_types))
+
     def __str__(self) -> str:  # pragma:nocover
         if isinstance(self.found, EndOfFile):
             return (
@@ -1,22 +1,247 @@
+import importlib.util
+import warnings
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, as_completed
 from pathlib import Path
-from typing import Callable, List, Optional, TypeVar
+from types import ModuleType
+from typing import (
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    TextIO,
+    Tuple,
+    TypeVar,
+)
 
+from basil.error_collector import ParseErrorCollector
+from basil.event_parser import EventParser
 from basil.exceptions import ParseError, TokenizerException
-from basil.models import Node, ParserInput, Position, Token
-from basil.syntax_loader.syntax_loader import SyntaxLoader
+from basil.incremental import IncrementalParser
+from basil.iterative_parser import IterativeParser
+from basil.models import (
+    Event,
+    Node,
+    ParserInput,
+    Source,
+    TextEdit,
+    Token,
+    TokenArray,
+)
+from basil.packrat import PackratMemo
+from basil.parse_cache import CompactTree, ParseCache, grammar_hash, parse_cache_key
+from basil.parse_context import ParseContext
+from basil.parser import FAILED, ConcatenateParser
+from basil.push_parser import PushParser
+from basil.recovering_parser import RecoveringParser
+from basil.syntax_loader.cache import load_syntax
+from basil.syntax_loader.exceptions import GrammarConflicts
+from basil.syntax_loader.lalr import LALRTables
+from basil.tokenizer import (
+    BaseTokenizer,
+    DFATokenizer,
+    StreamTokenizer,
+    build_tokenizer,
+)
+from basil.transformer import Transformer
 
 T = TypeVar("T")
 
+# FileParser of a parse_many() worker process
+_worker_file_parser: Optional["FileParser"] = None
+
+# Characters that must follow the start of a token before iter_tokens emits it,
+# unless the file ended. See StreamTokenizer.
+MIN_STREAM_LOOKAHEAD = 4096
+
 
 class FileParser:
-    def __init__(self, syntax_file: Path) -> None:
-        syntax_loader = SyntaxLoader(syntax_file.read_text())
+    def __init__(
+        self,
+        syntax_file: Path,
+        lexer: str = "regex",
+        packrat: bool = False,
+        packrat_max_entries: int = 100_000,
+        engine: str = "recursive",
+        cache_dir: Optional[Path] = None,
+        parse_cache: Optional[ParseCache] = None,
+    ) -> None:
+        """
+        Lexer can be one of:
+        - "regex": matches all token regexes in order, this is the default
+        - "dfa": matches all token types at once with a DFA, see DFATokenizer
+
+        Engine can be one of:
+        - "recursive": parser objects call each other, this is the default
+        - "iterative": walks the parser objects with an explicit stack, so deeply
+          nested input doesn't hit the recursion limit, see IterativeParser
+        - "lalr": shift-reduce parsing in linear time, see LALRTables. Raises
+          GrammarConflicts if the syntax is not LALR(1).
+
+        With packrat enabled, the outcome of parsing a node type at an offset is
+        remembered during one parse, see PackratMemo.
+
+        Parsing doesn't change the FileParser, all state of a parse is kept in a
+        ParseContext. So one FileParser can be used by several threads at once.
+
+        With a cache_dir, the loaded syntax is cached in a file there, which is
+        used by later FileParsers for the same syntax JSON, see load_syntax().
+
+        With a parse_cache, parse_text() and parse_file() return the cached
+        result for a text that was parsed before with the same syntax, engine
+        and node type, see ParseCache.
+        """
+
+        self._load(
+            syntax_file.read_text(),
+            lexer,
+            packrat,
+            packrat_max_entries,
+            engine,
+            cache_dir,
+            parse_cache,
+        )
+
+    def _load(
+        self,
+        syntax_file_content: str,
+        lexer: str,
+        packrat: bool,
+        packrat_max_entries: int,
+        engine: str,
+        cache_dir: Optional[Path],
+        parse_cache: Optional[ParseCache],
+    ) -> None:
+        self.syntax_file_content = syntax_file_content
+        self.lexer = lexer
+        self.cache_dir = cache_dir
+        self.parse_cache = parse_cache
+        syntax_loader = load_syntax(self.syntax_file_content, cache_dir)
         self.node_parsers = syntax_loader.parsers
         self.token_regexes = syntax_loader.tokens
         self.root_node_type = syntax_loader.root_node_type
         self.filtered_token_types = syntax_loader.filtered_tokens
         self.token_types = syntax_loader.token_types
-        self.error_collector = syntax_loader.error_collector
+        self.token_type_names = syntax_loader.token_type_names
+        self.token_type_ids = syntax_loader.token_type_ids
+        self.ll1 = syntax_loader.ll1
+        self.packrat_max_entries = packrat_max_entries if packrat else 0
+        self._default_context: Optional[ParseContext] = None
+
+        if engine not in ["recursive", "iterative", "lalr"]:
+            raise ValueError(f"Unknown engine {engine}")
+
+        self.engine = engine
+        self.grammar_hash = grammar_hash(syntax_file_content, engine)
+
+        self.lalr_tables: Optional[LALRTables] = None
+        if engine == "lalr":
+            self.lalr_tables = syntax_loader.build_lalr_tables()
+
+            if self.lalr_tables.conflicts:
+                raise GrammarConflicts(self.lalr_tables.conflicts)
+
+        # See load_generated_parser()
+        self.generated_parser: Optional[ModuleType] = None
+        self.generated_parser_file: Optional[Path] = None
+
+        self.tokenizer: BaseTokenizer
+        if lexer == "regex":
+            self.tokenizer = build_tokenizer(self.token_regexes)
+        elif lexer == "dfa":
+            self.tokenizer = DFATokenizer(
+                self.token_regexes, syntax_loader.compile_dfa()
+            )
+        else:
+            raise ValueError(f"Unknown lexer {lexer}")
+
+    def load_generated_parser(self, module_file: Path) -> None:
+        """
+        Parses with a module generated by basil.codegen instead of the parser
+        combinators. The module must be generated from the same syntax JSON.
+        """
+
+        spec = importlib.util.spec_from_file_location(
+            f"basil_generated_parser_{id(self)}", module_file
+        )
+        if spec is None or spec.loader is None:  # pragma:nocover
+            raise ValueError(f"Cannot load generated parser {module_file}")
+
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+
+        if module.SYNTAX_JSON != self.syntax_file_content:
+            raise ValueError(
+                f"Generated parser {module_file} was generated from another syntax"
+            )
+
+        self.generated_parser = module
+        self.generated_parser_file = module_file
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # Pickled as the syntax JSON and options, see parse_many()
+        return (
+            _rebuild_file_parser,
+            (
+                self.syntax_file_content,
+                self.lexer,
+                self.packrat_max_entries,
+                self.engine,
+                self.cache_dir,
+                self.parse_cache,
+                self.generated_parser_file,
+            ),
+        )
+
+    def parse_many(
+        self,
+        files: Iterable[Path],
+        *,
+        node_type: str,
+        workers: Optional[int] = None,
+        transform: Optional[Callable[[Node], Any]] = None,
+        chunk_size: int = 16,
+        ordered: bool = True,
+    ) -> Iterator[Tuple[Path, Any]]:
+        """
+        Parses files on a pool of worker processes and yields each file with
+        its Node, or the result of transform on it. Files that don't parse are
+        yielded with their ParseError or TokenizerException instead, and files
+        that can't be read with their OSError or UnicodeDecodeError.
+
+        Every worker rebuilds this FileParser once from its syntax JSON. Files
+        are sent to the workers in chunks of chunk_size. Results are yielded in
+        the order of files, or as chunks complete if ordered is disabled.
+
+        Transforming in the workers avoids sending Node trees back, which is
+        slow for large trees. The transform must be picklable, for example a
+        function defined at module level.
+        """
+
+        files = list(files)
+        chunks = [
+            files[start : start + chunk_size]
+            for start in range(0, len(files), chunk_size)
+        ]
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_parse_many_worker,
+            initargs=(self,),
+        ) as executor:
+            futures = [
+                executor.submit(_parse_many_chunk, chunk, node_type, transform)
+                for chunk in chunks
+            ]
+
+            completed: Iterable[Future[List[Tuple[Path, Any]]]] = futures
+            if not ordered:
+                completed = as_completed(futures)
+
+            for future in completed:
+                yield from future.result()
 
     def tokenize_file(
         self, file: Path, filter_token_types: bool = True, verbose: bool = False
@@ -36,45 +261,122 @@ class FileParser:
         filter_token_types: bool = True,
         verbose: bool = False,
     ) -> List[Token]:
+        tokens = self.tokenize_text_to_array(text, file_name, filter_token_types)
+
+        if verbose:  # pragma:nocover
+            self._print_tokens(tokens)
+
+        return list(tokens)
+
+    def tokenize_text_to_array(
+        self,
+        text: str,
+        file_name: Optional[str] = None,
+        filter_token_types: bool = True,
+    ) -> TokenArray:
+        """
+        Like tokenize_text, but returns a compact TokenArray instead of a list
+        of Token objects.
+        """
+
         if file_name is None:
             file_name = "/dev/null"
 
+        source = Source(Path(file_name), text)
+        tokens = TokenArray(text, source, self.token_type_names)
         offset = 0
+
+        filtered_token_types: Set[str] = set()
+        if filter_token_types:
+            filtered_token_types = self.filtered_token_types
+
+        for token_type, offset, end in self.tokenizer.scan(text):
+            if token_type not in filtered_token_types:
+                tokens.append(self.token_type_ids[token_type], offset, end)
+
+            offset = end
+
+        if offset < len(text):
+            raise TokenizerException(source.position(offset))
+
+        return tokens
+
+    def _print_tokens(self, tokens: TokenArray) -> None:  # pragma:nocover
         max_token_type_length = max(len(token_type) for token_type in self.token_types)
 
-        tokens: List[Token] = []
+        for token in tokens:
+            position_expected_max_length = len(str(token.position.file)) + 9
+            print(
+                f"{str(token.position):>{position_expected_max_length}}"
+                + f" |{token.type:>{max_token_type_length}}"
+                + f" |{repr(token.value)}"
+            )
 
-        while offset < len(text):
-            token: Optional[Token] = None
-            position = Position.from_text(file_name, offset, text)
+    def iter_tokens(
+        self,
+        fileobj: TextIO,
+        chunk_size: int = 64 * 1024,
+        file_name: Optional[str] = None,
+        filter_token_types: bool = True,
+    ) -> Iterator[Token]:
+        """
+        Reads fileobj in chunks and yields tokens as they are found, without
+        reading the whole file into memory. See StreamTokenizer for details.
+        """
 
-            for token_type, regex in self.token_regexes:
-                match = regex.match(text, offset)
+        if file_name is None:
+            file_name = "/dev/null"
 
-                if not match:
-                    continue
+        filtered_token_types: Set[str] = set()
+        if filter_token_types:
+            filtered_token_types = self.filtered_token_types
 
-                end = offset + len(match.group(0))
-                token = Token(text[offset:end], token_type, position)
-                break
+        stream_tokenizer = StreamTokenizer(
+            self.tokenizer,
+            Path(file_name),
+            filtered_token_types,
+            lookahead=max(chunk_size, MIN_STREAM_LOOKAHEAD),
+        )
 
-            if not token:
-                raise TokenizerException(position)
+        while chunk := fileobj.read(chunk_size):
+            yield from stream_tokenizer.feed(chunk)
 
-            if not (filter_token_types and token.type in self.filtered_token_types):
-                if verbose:  # pragma:nocover
-                    position_expected_max_length = len(str(token.position.file)) + 9
-                    print(
-                        f"{str(token.position):>{position_expected_max_length}}"
-                        + f" |{token.type:>{max_token_type_length}}"
-                        + f" |{repr(token.value)}"
-                    )
+        yield from stream_tokenizer.close()
 
-                tokens.append(token)
+    def push_parser(
+        self,
+        *,
+        node_type: str,
+        file_name: Optional[str] = None,
+        executor: Optional[Executor] = None,
+        stream_nodes: bool = False,
+    ) -> PushParser:
+        """
+        Returns a PushParser, to parse text that arrives in chunks in asyncio
+        code.
+        """
+
+        try:
+            parser = self.node_parsers[node_type]
+        except KeyError as e:
+            raise ValueError(f"Unknown node type {node_type}") from e
 
-            offset += len(token.value)
+        stream_tokenizer = StreamTokenizer(
+            self.tokenizer,
+            Path(file_name or "/dev/null"),
+            self.filtered_token_types,
+            lookahead=MIN_STREAM_LOOKAHEAD,
+        )
 
-        return tokens
+        return PushParser(
+            parser,
+            stream_tokenizer,
+            Path(file_name or "/unknown/path"),
+            self.token_type_ids,
+            self.token_type_names,
+            executor=executor,
+            stream_nodes=stream_nodes,
+        )
 
     def parse_file(self, file: Path, node_type: str, verbose: bool = False) -> Node:
         text = file.read_text()
@@ -89,26 +391,248 @@ class FileParser:
         *,
         verbose: bool = False,
         node_type: str,
+        two_phase: bool = False,
     ) -> Node:
+        """
+        With two_phase enabled, the text is first parsed without collecting
+        errors. Only if that fails, it is parsed again with error collection to
+        raise the same ParseError as without two_phase. This is faster for texts
+        that parse and slower for texts that don't.
+        """
+
         try:
             parser = self.node_parsers[node_type]
         except KeyError as e:
             raise ValueError(f"Unknown node type {node_type}") from e
 
-        self.error_collector.reset()
+        if self.parse_cache is None:
+            return self._parse_text(parser, text, file_name, verbose, two_phase)
+
+        key = parse_cache_key(self.grammar_hash, node_type, text)
+        cached_tree = self.parse_cache.get(key)
+
+        if cached_tree is not None:
+            return cached_tree.to_node(text, file_name, self.token_type_names)
+
+        root = self._parse_text(parser, text, file_name, verbose, two_phase)
+        self.parse_cache.put(key, CompactTree(root, self.token_type_ids))
+        return root
+
+    def _parse_text(
+        self,
+        parser: ConcatenateParser,
+        text: str,
+        file_name: Optional[str],
+        verbose: bool,
+        two_phase: bool,
+    ) -> Node:
+        tokens = self.tokenize_text_to_array(text, file_name)
+
+        if verbose:  # pragma:nocover
+            self._print_tokens(tokens)
 
-        tokens = self.tokenize_text(text, file_name, verbose=verbose)
         parser_input = ParserInput(tokens, Path(file_name or "/unknown/path"))
 
+        if two_phase:
+            context = self.new_context()
+            context.error_collector.enabled = False
+            root, offset = self._parse(parser, parser_input, verbose, context)
+
+            if offset == len(tokens):
+                assert root
+                return root
+
+        context = self.new_context()
+        root, offset = self._parse(parser, parser_input, verbose, context)
+
+        if offset == FAILED or offset != len(tokens):
+            raise context.error_collector.get_furthest_error(parser_input)
+
+        assert root
+        return root
+
+    def parse_incremental(
+        self,
+        old_tree: Node,
+        old_text: str,
+        edit: TextEdit,
+        file_name: Optional[str] = None,
+    ) -> Node:
+        """
+        Parses the text that edit makes of old_text, given old_tree, the root
+        Node that parse_text() returned for old_text and file_name.
+
+        Tokens outside the edit are reused and only the smallest node around the
+        edit is parsed again, see IncrementalParser. That needs a syntax that
+        never backtracks, see SyntaxLoader.ll1. For other syntaxes, or if the
+        edit changes the structure around it, the whole text is parsed. Either
+        way, the result is the same as parse_text() of the new text.
+        """
+
+        if self.ll1:
+            incremental_parser = IncrementalParser(
+                self.tokenizer,
+                self.filtered_token_types,
+                self.token_type_ids,
+                self.node_parsers,
+                self.new_context,
+            )
+            root = incremental_parser.reparse(old_tree, old_text, edit, file_name)
+
+            if root is not None:
+                return root
+
+        return self.parse_text(edit.apply(old_text), file_name, node_type=old_tree.type)
+
+    def parse_text_recovering(
+        self,
+        text: str,
+        file_name: Optional[str] = None,
+        *,
+        node_type: str,
+        sync_token_types: Iterable[str] = (),
+    ) -> Tuple[Node, List[ParseError]]:
+        """
+        Parses text like parse_text(), but doesn't stop at the first error.
+        Returns the root node and all errors, an empty list if the text parses.
+        Tokens that were skipped after an error are in an ErrorNode with the
+        ParseError, the node types around them may miss children.
+
+        After an error, parsing continues at the first token where an enclosing
+        repetition can continue, or at a token of sync_token_types where an
+        enclosing concatenation can continue. See RecoveringParser.
+
+        Raises TokenizerException if the text doesn't tokenize.
+        """
+
         try:
-            root, offset = parser.parse(parser_input, 0, verbose=verbose)
-        except ParseError:
-            raise self.error_collector.get_furthest_error()
+            parser = self.node_parsers[node_type]
+        except KeyError as e:
+            raise ValueError(f"Unknown node type {node_type}") from e
+
+        sync_token_type_ids: Set[int] = set()
+
+        for token_type in sync_token_types:
+            try:
+                sync_token_type_ids.add(self.token_type_ids[token_type])
+            except KeyError as e:
+                raise ValueError(f"Unknown token type {token_type}") from e
+
+        tokens = self.tokenize_text_to_array(text, file_name)
+        parser_input = ParserInput(tokens, Path(file_name or "/unknown/path"))
+
+        recovering_parser = RecoveringParser(
+            parser_input, self.new_context(), sync_token_type_ids
+        )
+        return recovering_parser.parse_with_errors(parser)
+
+    def iter_events(
+        self, text: str, file_name: Optional[str] = None, *, node_type: str
+    ) -> Iterator[Event]:
+        """
+        Parses text without building a Node tree. Yields an EnterEvent and an
+        ExitEvent for every node and a TokenEvent for every token, in document
+        order. Events of alternatives that are backtracked are never yielded, see
+        EventParser.
+
+        Raises ParseError when the text doesn't parse, possibly after yielding
+        events for the start of the text.
+        """
+
+        try:
+            parser = self.node_parsers[node_type]
+        except KeyError as e:
+            raise ValueError(f"Unknown node type {node_type}") from e
+
+        tokens = self.tokenize_text_to_array(text, file_name)
+        parser_input = ParserInput(tokens, Path(file_name or "/unknown/path"))
+
+        context = self.new_context()
+        event_parser = EventParser(parser_input, context)
 
-        if offset != len(tokens):
-            raise self.error_collector.get_furthest_error()
+        yield from event_parser.iter_events(parser, 0)
 
-        return root.flatten()
+        if event_parser.offset != len(tokens):
+            raise context.error_collector.get_furthest_error(parser_input)
+
+    def new_context(self) -> ParseContext:
+        """
+        Returns the state for a new parse, see ParseContext. Only needed to call
+        the parse() method of parser objects directly.
+        """
+
+        return ParseContext(
+            ParseErrorCollector(self.token_type_names),
+            PackratMemo(self.packrat_max_entries),
+        )
+
+    @property
+    def error_collector(self) -> ParseErrorCollector:
+        """
+        Deprecated: parses no longer share an error collector, every parse gets
+        its own from new_context(). This is the collector of one context that
+        no parse uses.
+        """
+
+        warnings.warn(
+            "FileParser.error_collector is deprecated, use new_context()",
+            DeprecationWarning,
+            stacklevel=2,
+        )
+        return self._get_default_context().error_collector
+
+    @property
+    def memo(self) -> PackratMemo:
+        """
+        Deprecated: parses no longer share a memo, every parse gets its own from
+        new_context(). This is the memo of one context that no parse uses.
+        """
+
+        warnings.warn(
+            "FileParser.memo is deprecated, use new_context()",
+            DeprecationWarning,
+            stacklevel=2,
+        )
+        return self._get_default_context().memo
+
+    def _get_default_context(self) -> ParseContext:
+        if self._default_context is None:
+            self._default_context = self.new_context()
+
+        return self._default_context
+
+    def _parse(
+        self,
+        parser: ConcatenateParser,
+        parser_input: ParserInput,
+        verbose: bool,
+        context: ParseContext,
+    ) -> Tuple[Optional[Node], int]:
+        if self.generated_parser:
+            assert parser.node_type
+            generated_result: Tuple[Optional[Node], int] = self.generated_parser.parse(
+                parser_input, 0, parser.node_type, context.error_collector
+            )
+            return generated_result
+
+        if self.lalr_tables:
+            assert parser.node_type
+            return self.lalr_tables.parse(
+                parser_input, parser.node_type, context.error_collector
+            )
+
+        if self.engine == "iterative":
+            return IterativeParser(parser_input, context).parse(parser, 0)
+
+        children: List[Token | Node] = []
+        offset = parser.parse(parser_input, 0, children, context, verbose=verbose)
+
+        if offset == FAILED:
+            return None, FAILED
+
+        root = children[0]
+        assert isinstance(root, Node)
+        return root, offset
 
     def parse_text_and_transform(
         self,
@@ -119,30 +643,86 @@ class FileParser:
         node_type: str,
         node_transformer: Callable[[str, List[T | Token]], T],
         token_transformer: Callable[[Token], T | Token],
+        two_phase: bool = False,
+        fused: bool = False,
     ) -> T:
+        """
+        With fused enabled, the transformers are called while parsing, from the
+        events of iter_events(), so no parse tree is built. Transformers only see
+        tokens and nodes that are not backtracked. If the text doesn't parse,
+        they may have been called for the start of the text before ParseError is
+        raised. The fused mode always collects errors, so it can't be combined
+        with two_phase.
+        """
+
+        transformer = Transformer(node_transformer, token_transformer)
+
+        if fused:
+            if two_phase:
+                raise ValueError("Cannot combine fused and two_phase")
+
+            return transformer.transform_events(
+                self.iter_events(text, file_name, node_type=node_type)
+            )
+
         parse_tree = self.parse_text(
-            text, file_name, verbose=verbose, node_type=node_type
+            text,
+            file_name,
+            verbose=verbose,
+            node_type=node_type,
+            two_phase=two_phase,
         )
 
-        return self._transform_parse_tree(
-            parse_tree, node_transformer, token_transformer
-        )
+        return transformer.transform(parse_tree)
 
-    def _transform_parse_tree(
-        self,
-        node: Node,
-        node_transformer: Callable[[str, List[T | Token]], T],
-        token_transformer: Callable[[Token], T | Token],
-    ) -> T:
-        transformed_children: List[T | Token] = []
-        for child in node.children:
-            if isinstance(child, Token):
-                transformed_children.append(token_transformer(child))
-            else:
-                transformed_children.append(
-                    self._transform_parse_tree(
-                        child, node_transformer, token_transformer
-                    )
-                )
-
-        return node_transformer(node.type, transformed_children)
+
+def _rebuild_file_parser(
+    syntax_file_content: str,
+    lexer: str,
+    packrat_max_entries: int,
+    engine: str,
+    cache_dir: Optional[Path],
+    parse_cache: Optional[ParseCache],
+    generated_parser_file: Optional[Path],
+) -> FileParser:
+    file_parser = FileParser.__new__(FileParser)
+    file_parser._load(
+        syntax_file_content,
+        lexer,
+        packrat_max_entries > 0,
+        packrat_max_entries,
+        engine,
+        cache_dir,
+        parse_cache,
+    )
+
+    if generated_parser_file is not None:
+        file_parser.load_generated_parser(generated_parser_file)
+
+    return file_parser
+
+
+def _init_parse_many_worker(file_parser: FileParser) -> None:
+    global _worker_file_parser
+    _worker_file_parser = file_parser
+
+
+def _parse_many_chunk(
+    files: List[Path], node_type: str, transform: Optional[Callable[[Node], Any]]
+) -> List[Tuple[Path, Any]]:
+    assert _worker_file_parser
+    results: List[Tuple[Path, Any]] = []
+
+    for file in files:
+        try:
+            node = _worker_file_parser.parse_file(file, node_type)
+        except (OSError, UnicodeDecodeError, ParseError, TokenizerException) as e:
+            results.append((file, e))
+            continue
+
+        if transform is None:
+            results.append((file, node))
+        else:
+            results.append((file, transform(node)))
+
+    return results
@@ -0,0 +1,391 @@
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from basil.iterative_parser import IterativeParser
+from basil.models import Node, ParserInput, Source, TextEdit, Token
+from basil.parse_context import ParseContext
+from basil.parser import ConcatenateParser
+from basil.tokenizer import BaseTokenizer
+
+# Nodes from a root down to a token and the index of the next one in the
+# children of each, see IncrementalParser._locate()
+TreePath = Tuple[List[Node], List[int]]
+
+
+def shift_token(token: Token, delta: int, source: Source) -> Token:
+    return Token(token.value, token.type, offset=token.offset + delta, source=source)
+
+
+class ShiftedNode(Node):
+    """
+    A copy of a node of the text before an edit, in the text after the edit,
+    where its tokens start delta characters later. See IncrementalParser.
+
+    The children are only copied when they are first used, so the nodes after
+    an edit cost nothing until they are walked.
+    """
+
+    def __init__(self, node: Node, delta: int, source: Source) -> None:
+        if isinstance(node, ShiftedNode) and node._children is None:
+            # Shifting the node it copies once is cheaper than shifting twice.
+            delta += node.delta
+            node = node.node
+
+        self.node: Node = node
+        self.delta: int = delta
+        self.source = source
+        self.type = node.type
+        self._children: Optional[List[Token | Node]] = None
+
+    @property
+    def children(self) -> List[Token | Node]:
+        if self._children is None:
+            self._children = [
+                (
+                    shift_token(child, self.delta, self.source)
+                    if isinstance(child, Token)
+                    else ShiftedNode(child, self.delta, self.source)
+                )
+                for child in self.node.children
+            ]
+
+        return self._children
+
+    @children.setter
+    def children(self, children: List[Token | Node]) -> None:
+        self._children = children
+
+    def __repr__(self) -> str:  # pragma:nocover
+        return repr(Node(self.children, self.type))
+
+
+class IncrementalParser:
+    """
+    Parses a text again after an edit, reusing the Node tree of the text before
+    the edit, see FileParser.parse_incremental().
+
+    The text is only tokenized again from the token before the edit until the
+    new tokens line up with the old tokens after the edit. This assumes that a
+    token doesn't match differently when the text after the next token changes.
+
+    Then only the smallest node whose first and last token are not touched is
+    parsed again, or an enclosing node if its parse doesn't end at the same
+    token. This gives the same tree as a full parse only for syntaxes that never
+    backtrack, see SyntaxLoader.ll1.
+
+    Nodes before the edit are reused as is. Nodes after it are ShiftedNodes,
+    because the offsets and positions of their tokens shift. Those only copy
+    their children when they are used, so a reparse takes time for the nodes
+    around the edit and their children, not for the whole tree. The old tree
+    is not changed.
+    """
+
+    def __init__(
+        self,
+        tokenizer: BaseTokenizer,
+        filtered_token_types: Set[str],
+        token_type_ids: Dict[str, int],
+        node_parsers: Dict[str, ConcatenateParser],
+        new_context: Callable[[], ParseContext],
+    ) -> None:
+        self.tokenizer = tokenizer
+        self.filtered_token_types = filtered_token_types
+        self.token_type_ids = token_type_ids
+        self.node_parsers = node_parsers
+        self.new_context = new_context
+
+    def reparse(
+        self,
+        old_tree: Node,
+        old_text: str,
+        edit: TextEdit,
+        file_name: Optional[str] = None,
+    ) -> Optional[Node]:
+        """
+        Returns None if the whole text needs to be parsed: when no node around
+        the edit parses again, or when the new text doesn't tokenize.
+        """
+
+        new_text = edit.apply(old_text)
+        source = Source(Path(file_name or "/dev/null"), new_text)
+        delta = len(edit.new_text) - (edit.end - edit.start)
+
+        relexed = self._relex(old_tree, new_text, edit, source)
+
+        if relexed is None:
+            return None
+
+        first_changed, new_tokens, first_unchanged = relexed
+
+        path = self._find_path(old_tree, first_changed.offset, first_unchanged.offset)
+        file = Path(file_name or "/unknown/path")
+
+        # Try the smallest node first, then the nodes around it.
+        for depth in reversed(range(len(path))):
+            node = path[depth][0]
+            old_tokens = list(self._iter_tokens([node], [0]))
+
+            tokens = [
+                token for token in old_tokens if token.offset < first_changed.offset
+            ]
+            tokens += new_tokens
+            tokens += [
+                shift_token(token, delta, source)
+                for token in old_tokens
+                if token.offset >= first_unchanged.offset
+            ]
+            node_length = len(tokens)
+
+            # The token after the node decides where the node ends.
+            last_token = old_tokens[-1]
+            next_token = self._token_from(
+                old_tree, last_token.offset + len(last_token.value)
+            )
+            if next_token is not None:
+                tokens.append(shift_token(next_token, delta, source))
+
+            context = self.new_context()
+            context.error_collector.enabled = False
+            parser_input = ParserInput(tokens, file, self.token_type_ids)
+            parser = self.node_parsers[node.type]
+            new_node, offset = IterativeParser(parser_input, context).parse(parser, 0)
+
+            if new_node is not None and offset == node_length:
+                return self._replace_node(path[:depth], new_node, delta, source)
+
+        return None
+
+    def _relex(
+        self, old_tree: Node, new_text: str, edit: TextEdit, source: Source
+    ) -> Optional[Tuple[Token, List[Token], Token]]:
+        """
+        Tokenizes new_text from the last old token that ends before the edit,
+        until a new token starts where an old token started after the edit. The
+        tokenizer continues the same from there, so the old tokens are reused.
+
+        Returns the first old token that is replaced, the new tokens and the
+        first old token that is reused. Returns None if there are no such old
+        tokens or if new_text doesn't tokenize.
+        """
+
+        delta = len(edit.new_text) - (edit.end - edit.start)
+        edit_end = edit.start + len(edit.new_text)
+
+        # The token that ends at or after the start of the edit may match
+        # differently, so the token before it is tokenized again too.
+        tokens_before = self._iter_tokens_backward(*self._locate(old_tree, edit.start))
+        first_changed = next(
+            (
+                token
+                for token in tokens_before
+                if token.offset + len(token.value) < edit.start
+            ),
+            None,
+        )
+
+        if first_changed is None:
+            return None
+
+        old_tokens = self._iter_tokens(*self._locate(old_tree, edit.end))
+        old_token = next(old_tokens, None)
+        new_tokens: List[Token] = []
+
+        for token_type, offset, end in self.tokenizer.scan(
+            new_text, first_changed.offset
+        ):
+            if offset >= edit_end:
+                while old_token is not None and old_token.offset < offset - delta:
+                    old_token = next(old_tokens, None)
+
+                if old_token is None:
+                    return None
+
+                if old_token.offset == offset - delta:
+                    return first_changed, new_tokens, old_token
+
+            if token_type not in self.filtered_token_types:
+                new_tokens.append(
+                    Token(
+                        new_text[offset:end], token_type, offset=offset, source=source
+                    )
+                )
+
+        return None
+
+    def _find_path(
+        self, root: Node, changed_offset: int, unchanged_offset: int
+    ) -> List[Tuple[Node, int]]:
+        """
+        Returns the nodes from root down to the smallest node whose first token
+        starts before changed_offset and whose last token starts at or after
+        unchanged_offset, each with the index of the next node in its children.
+        """
+
+        path: List[Tuple[Node, int]] = []
+        node = root
+
+        if not self._encloses(root, changed_offset, unchanged_offset):
+            return path
+
+        while True:
+            index = self._last_child_before(node, changed_offset)
+            path.append((node, index))
+            child = node.children[index]
+
+            if isinstance(child, Token) or not self._encloses(
+                child, changed_offset, unchanged_offset
+            ):
+                return path
+
+            node = child
+
+    def _encloses(self, node: Node, changed_offset: int, unchanged_offset: int) -> bool:
+        first_token = next(self._iter_tokens([node], [0]), None)
+        last_token = next(
+            self._iter_tokens_backward([node], [len(node.children) - 1]), None
+        )
+
+        return (
+            first_token is not None
+            and last_token is not None
+            and first_token.offset < changed_offset
+            and last_token.offset >= unchanged_offset
+        )
+
+    def _last_child_before(self, node: Node, offset: int) -> int:
+        """
+        Returns the index of the last child of node with a token that starts
+        before offset, or -1.
+        """
+
+        found = -1
+
+        for index, child in enumerate(node.children):
+            if isinstance(child, Token):
+                first_token: Optional[Token] = child
+            else:
+                first_token = next(self._iter_tokens([child], [0]), None)
+
+            if first_token is None:
+                continue
+
+            if first_token.offset >= offset:
+                break
+
+            found = index
+
+        return found
+
+    def _locate(self, root: Node, offset: int) -> TreePath:
+        """
+        Returns the path to the last token of root that starts before offset.
+        Its index is -1 if there is none.
+        """
+
+        nodes = [root]
+        indexes: List[int] = []
+
+        while True:
+            index = self._last_child_before(nodes[-1], offset)
+            indexes.append(index)
+
+            if index < 0:
+                return nodes, indexes
+
+            child = nodes[-1].children[index]
+
+            if isinstance(child, Token):
+                return nodes, indexes
+
+            nodes.append(child)
+
+    def _token_from(self, root: Node, offset: int) -> Optional[Token]:
+        """
+        Returns the first token of root that starts at or after offset.
+        """
+
+        for token in self._iter_tokens(*self._locate(root, offset)):
+            if token.offset >= offset:
+                return token
+
+        return None
+
+    def _iter_tokens(self, nodes: List[Node], indexes: List[int]) -> Iterator[Token]:
+        """
+        Yields the tokens from the end of the path, see _locate(), up to the
+        end of its root.
+        """
+
+        nodes = list(nodes)
+        # Index of the next child to walk in each node
+        indexes = [index + 1 for index in indexes[:-1]] + [max(indexes[-1], 0)]
+
+        while nodes:
+            children = nodes[-1].children
+            index = indexes[-1]
+
+            if index < len(children):
+                indexes[-1] = index + 1
+                child = children[index]
+
+                if isinstance(child, Token):
+                    yield child
+                else:
+                    nodes.append(child)
+                    indexes.append(0)
+            else:
+                nodes.pop()
+                indexes.pop()
+
+    def _iter_tokens_backward(
+        self, nodes: List[Node], indexes: List[int]
+    ) -> Iterator[Token]:
+        """
+        Yields the tokens from the end of the path, see _locate(), back to the
+        start of its root.
+        """
+
+        nodes = list(nodes)
+        # Index of the next child to walk in each node
+        indexes = [index - 1 for index in indexes[:-1]] + [indexes[-1]]
+
+        while nodes:
+            index = indexes[-1]
+
+            if index >= 0:
+                indexes[-1] = index - 1
+                child = nodes[-1].children[index]
+
+                if isinstance(child, Token):
+                    yield child
+                else:
+                    nodes.append(child)
+                    indexes.append(len(child.children) - 1)
+            else:
+                nodes.pop()
+                indexes.pop()
+
+    def _replace_node(
+        self,
+        ancestors: List[Tuple[Node, int]],
+        new_node: Node,
+        delta: int,
+        source: Source,
+    ) -> Node:
+        """
+        Puts new_node in copies of ancestors. Nodes after it are shifted.
+        """
+
+        for ancestor, index in reversed(ancestors):
+            children = ancestor.children[:index]
+            children.append(new_node)
+
+            for child in ancestor.children[index + 1 :]:
+                if isinstance(child, Token):
+                    children.append(shift_token(child, delta, source))
+                else:
+                    children.append(ShiftedNode(child, delta, source))
+
+            new_node = Node(children, ancestor.type)
+
+        return new_node
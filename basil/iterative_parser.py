@@ -0,0 +1,319 @@
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Type
+
+from basil.models import Node, ParserInput, Token
+from basil.parse_context import ParseContext
+from basil.parser import (
+    END_OF_FILE_ID,
+    FAILED,
+    BaseParser,
+    ChoiceParser,
+    ConcatenateParser,
+    NodeParser,
+    OptionalParser,
+    RepeatParser,
+    TokenParser,
+)
+
+# Parser to start next and its offset. Without a parser, the offset is returned
+# to the frame on top of the stack, which may be FAILED.
+Step = Tuple[Optional[BaseParser], int]
+
+
+class Frame:
+    """
+    A parser that is waiting for the result of one of its children.
+    """
+
+    __slots__ = (
+        "parser",
+        "start",
+        "offset",
+        "mark",
+        "index",
+        "alternatives",
+        "parent_children",
+        "live",
+    )
+
+    def __init__(self, parser: BaseParser, start: int, mark: int) -> None:
+        self.parser = parser
+
+        # Offset the parser started at
+        self.start = start
+
+        # Offset after the last repetition, only used for RepeatParser
+        self.offset = start
+
+        # Length of children when the current child started, to backtrack
+        self.mark = mark
+
+        # Index of the current child or alternative, or number of repetitions
+        self.index = 0
+
+        # Alternatives to try, only used for ChoiceParser
+        self.alternatives: Sequence[BaseParser] = ()
+
+        # Children of the parent node, only used for ConcatenateParser with a
+        # node type
+        self.parent_children: List[Token | Node] = []
+
+        # Whether the parse can still succeed if this frame fails, only used by
+        # EventParser
+        self.live = False
+
+
+class IterativeParser:
+    """
+    Parses like BaseParser.parse(), but walks the parser graph with an explicit
+    stack of frames instead of recursive calls. So the nesting depth is only
+    limited by memory. Results and errors are the same as with the recursive
+    parsers.
+
+    If the memo of context has max_entries above 0, parsed nodes are memoized
+    like NodeParser does.
+    """
+
+    def __init__(self, input: ParserInput, context: ParseContext) -> None:
+        self.type_ids = input.get_type_ids(context.error_collector.token_type_names)
+        self.tokens = input.tokens
+        self.token_count = len(self.type_ids)
+        self.error_collector = context.error_collector
+
+        self.memo = context.memo
+        self.memoize = self.memo.max_entries > 0
+
+        # Children of the node that is being parsed
+        self.children: List[Token | Node] = []
+
+        self.stack: List[Frame] = []
+
+        self.starters: Dict[Type[BaseParser], Callable[[BaseParser, int], Step]] = {
+            TokenParser: self._start_token,
+            NodeParser: self._start_node,
+            ConcatenateParser: self._start_concatenate,
+            ChoiceParser: self._start_choice,
+            OptionalParser: self._start_optional,
+            RepeatParser: self._start_repeat,
+        }
+        self.resumers: Dict[Type[BaseParser], Callable[[Frame, int], Step]] = {
+            NodeParser: self._resume_node,
+            ConcatenateParser: self._resume_concatenate,
+            ChoiceParser: self._resume_choice,
+            OptionalParser: self._resume_optional,
+            RepeatParser: self._resume_repeat,
+        }
+
+    def parse(
+        self, parser: ConcatenateParser, offset: int
+    ) -> Tuple[Optional[Node], int]:
+        assert parser.node_type
+
+        # The root node is appended to this list.
+        root_children: List[Token | Node] = []
+        self.children = root_children
+        self.stack = []
+
+        starters = self.starters
+        resumers = self.resumers
+        stack = self.stack
+
+        next_parser: Optional[BaseParser] = parser
+        value = offset
+
+        while True:
+            if next_parser is not None:
+                next_parser, value = starters[type(next_parser)](next_parser, value)
+            elif stack:
+                frame = stack[-1]
+                next_parser, value = resumers[type(frame.parser)](frame, value)
+            else:
+                break
+
+        if value == FAILED:
+            return None, FAILED
+
+        root = root_children[0]
+        assert isinstance(root, Node)
+        return root, value
+
+    def _lookahead(self, offset: int) -> int:
+        if offset < self.token_count:
+            return self.type_ids[offset]
+        return END_OF_FILE_ID
+
+    def _push(self, parser: BaseParser, offset: int) -> Frame:
+        frame = Frame(parser, offset, self._mark())
+        self.stack.append(frame)
+        return frame
+
+    def _mark(self) -> int:
+        return len(self.children)
+
+    def _backtrack(self, mark: int) -> None:
+        del self.children[mark:]
+
+    def _start_token(self, parser: BaseParser, offset: int) -> Step:
+        assert isinstance(parser, TokenParser)
+
+        if offset < self.token_count and self.type_ids[offset] == parser.token_type_id:
+            self.children.append(self.tokens[offset])
+            return None, offset + 1
+
+        self.error_collector.register(offset, parser.token_type_mask)
+        return None, FAILED
+
+    def _start_node(self, parser: BaseParser, offset: int) -> Step:
+        assert isinstance(parser, NodeParser)
+
+        if self.memoize:
+            try:
+                node, end = self.memo.get((parser.node_type, offset))
+            except KeyError:
+                pass
+            else:
+                if node is not None:
+                    self.children.append(node)
+                return None, end
+
+        self._push(parser, offset)
+        return parser.inner, offset
+
+    def _resume_node(self, frame: Frame, returned: int) -> Step:
+        assert isinstance(frame.parser, NodeParser)
+        self.stack.pop()
+
+        if self.memoize:
+            key = (frame.parser.node_type, frame.start)
+
+            if returned == FAILED:
+                self.memo.store(key, (None, FAILED))
+            else:
+                # The inner ConcatenateParser appended the parsed node.
+                node = self.children[-1]
+                assert isinstance(node, Node)
+                self.memo.store(key, (node, returned))
+
+        return None, returned
+
+    def _start_concatenate(self, parser: BaseParser, offset: int) -> Step:
+        assert isinstance(parser, ConcatenateParser)
+
+        # Same fail fast as ConcatenateParser.parse()
+        if (
+            self.token_count - offset < parser.min_length
+            and not self.error_collector.enabled
+        ):
+            return None, FAILED
+
+        frame = self._push(parser, offset)
+
+        if parser.node_type is not None:
+            frame.parent_children = self.children
+            self.children = []
+
+        return parser.parsers[0], offset
+
+    def _resume_concatenate(self, frame: Frame, returned: int) -> Step:
+        parser = frame.parser
+        assert isinstance(parser, ConcatenateParser)
+
+        if returned != FAILED:
+            frame.index += 1
+
+            if frame.index < len(parser.parsers):
+                return parser.parsers[frame.index], returned
+
+        self.stack.pop()
+
+        if parser.node_type is not None:
+            node = Node(self.children, parser.node_type)
+            self.children = frame.parent_children
+
+            if returned != FAILED:
+                self.children.append(node)
+
+        return None, returned
+
+    def _start_choice(self, parser: BaseParser, offset: int) -> Step:
+        assert isinstance(parser, ChoiceParser)
+
+        alternatives, skipped_token_mask = parser.dispatch.get(
+            self._lookahead(offset), parser.default_dispatch
+        )
+
+        if skipped_token_mask:
+            self.error_collector.register(offset, skipped_token_mask)
+
+        if not alternatives:
+            return None, FAILED
+
+        frame = self._push(parser, offset)
+        frame.alternatives = alternatives
+        return alternatives[0], offset
+
+    def _resume_choice(self, frame: Frame, returned: int) -> Step:
+        if returned == FAILED:
+            self._backtrack(frame.mark)
+            frame.index += 1
+
+            if frame.index < len(frame.alternatives):
+                return frame.alternatives[frame.index], frame.start
+
+        self.stack.pop()
+        return None, returned
+
+    def _start_optional(self, parser: BaseParser, offset: int) -> Step:
+        assert isinstance(parser, OptionalParser)
+
+        if parser.inner.can_start(self._lookahead(offset)):
+            self._push(parser, offset)
+            return parser.inner, offset
+
+        self.error_collector.register(offset, parser.inner.first_token_mask)
+        return None, offset
+
+    def _resume_optional(self, frame: Frame, returned: int) -> Step:
+        self.stack.pop()
+
+        if returned == FAILED:
+            self._backtrack(frame.mark)
+            return None, frame.start
+
+        return None, returned
+
+    def _start_repeat(self, parser: BaseParser, offset: int) -> Step:
+        assert isinstance(parser, RepeatParser)
+
+        if parser.inner.can_start(self._lookahead(offset)):
+            self._push(parser, offset)
+            return parser.inner, offset
+
+        self.error_collector.register(offset, parser.inner.first_token_mask)
+
+        if parser.min_repeats:
+            return None, FAILED
+
+        return None, offset
+
+    def _resume_repeat(self, frame: Frame, returned: int) -> Step:
+        parser = frame.parser
+        assert isinstance(parser, RepeatParser)
+
+        if returned == FAILED:
+            self._backtrack(frame.mark)
+        else:
+            frame.index += 1
+            frame.offset = returned
+
+            if parser.inner.can_start(self._lookahead(returned)):
+                frame.mark = self._mark()
+                return parser.inner, returned
+
+            self.error_collector.register(returned, parser.inner.first_token_mask)
+
+        self.stack.pop()
+
+        if frame.index < parser.min_repeats:
+            return None, FAILED
+
+        return None, frame.offset
@@ -1,8 +1,17 @@
 from __future__ import annotations
 
+import re
+from array import array
+from bisect import bisect_right
 from copy import copy
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+if TYPE_CHECKING:  # pragma:nocover
+    from basil.exceptions import ParseError
+
+# Type of ErrorNode
+ERROR_NODE_TYPE = "ERROR"
 
 
 class Choice:
@@ -22,9 +31,50 @@ class EndOfFile:
 
 
 class ParserInput:
-    def __init__(self, tokens: List[Token], file: Path) -> None:
+    def __init__(
+        self,
+        tokens: Sequence[Token] | TokenArray,
+        file: Path,
+        token_type_ids: Optional[Dict[str, int]] = None,
+        type_ids: Optional[Sequence[int]] = None,
+    ) -> None:
+        """
+        Parsers compare token type ids instead of token type names. A TokenArray
+        stores those already, for a list of Tokens they are looked up in
+        token_type_ids. Without token_type_ids, type_ids is only set once parsing
+        starts, see get_type_ids().
+
+        Tokens that are appended while parsing, see PushParser, come with their
+        type_ids, which are appended to at the same time.
+        """
+
         self.tokens = tokens
         self.file = file
+        self.type_ids: Sequence[int]
+
+        if type_ids is not None:
+            self.type_ids = type_ids
+        elif isinstance(tokens, TokenArray):
+            self.type_ids = tokens.type_ids
+        elif token_type_ids is not None:
+            self.type_ids = array("i", [token_type_ids[token.type] for token in tokens])
+
+    def get_type_ids(self, token_type_names: List[str]) -> Sequence[int]:
+        """
+        Returns type_ids, looking them up in token_type_names first if the
+        ParserInput was made without token_type_ids.
+        """
+
+        if "type_ids" not in self.__dict__:
+            token_type_ids = {
+                token_type: token_type_id
+                for token_type_id, token_type in enumerate(token_type_names)
+            }
+            self.type_ids = array(
+                "i", [token_type_ids[token.type] for token in self.tokens]
+            )
+
+        return self.type_ids
 
 
 class Position:
@@ -61,11 +111,56 @@ class Position:
         return str(self)
 
 
+class Source:
+    """
+    Input text shared by reference by all tokens of one tokenized file.
+
+    Line starts are computed once, so Positions can be looked up by offset.
+    """
+
+    def __init__(self, file: Path, text: str) -> None:
+        self.file = file
+        self.line_starts = [0]
+        self.line_starts += [match.end() for match in re.finditer("\n", text)]
+
+    def position(self, offset: int) -> Position:
+        line = bisect_right(self.line_starts, offset)
+        column = offset - self.line_starts[line - 1] + 1
+        return Position(self.file, line, column)
+
+
 class Token:
-    def __init__(self, value: str, type: str, position: Position) -> None:
+    __slots__ = ("value", "type", "offset", "_position", "_source")
+
+    def __init__(
+        self,
+        value: str,
+        type: str,
+        position: Optional[Position] = None,
+        *,
+        offset: int = 0,
+        source: Optional[Source] = None,
+    ) -> None:
+        """
+        Either position or source is required. With a source, the position is
+        only computed from offset when it is first used.
+        """
+
+        if position is None and source is None:  # pragma:nocover
+            raise ValueError("Token needs either a position or a source.")
+
         self.value = value
         self.type = type
-        self.position = position
+        self.offset = offset
+        self._position = position
+        self._source = source
+
+    @property
+    def position(self) -> Position:
+        if self._position is None:
+            assert self._source
+            self._position = self._source.position(self.offset)
+        return self._position
 
     def __repr__(self) -> str:
         return (
@@ -76,6 +171,43 @@ class Token:
         return {"value": self.value, "type": self.type}
 
 
+class TokenArray:
+    """
+    Columnar storage of tokens: one array of token type ids and two arrays of
+    start and end offsets into text. Token objects are only created when the
+    array is indexed.
+    """
+
+    def __init__(self, text: str, source: Source, token_types: List[str]) -> None:
+        self.text = text
+        self.source = source
+        self.token_types = token_types
+        self.type_ids = array("i")
+        self.starts = array("q")
+        self.ends = array("q")
+
+    def append(self, type_id: int, start: int, end: int) -> None:
+        self.type_ids.append(type_id)
+        self.starts.append(start)
+        self.ends.append(end)
+
+    def __len__(self) -> int:
+        return len(self.type_ids)
+
+    def __getitem__(self, index: int) -> Token:
+        start = self.starts[index]
+        return Token(
+            self.text[start : self.ends[index]],
+            self.token_types[self.type_ids[index]],
+            offset=start,
+            source=self.source,
+        )
+
+    def __iter__(self) -> Iterator[Token]:
+        for index in range(len(self)):
+            yield self[index]
+
+
 class InnerNode:
     def __init__(
         self, children: List["Token | InnerNode"], type: Optional[str] = None
@@ -141,3 +273,82 @@ class Node:
             "type": self.type,
             "children": [child.as_json() for child in self.children],
         }
+
+
+class Event:
+    """
+    Yielded by FileParser.iter_events(), see EnterEvent, TokenEvent and ExitEvent.
+    """
+
+    __slots__ = ()
+
+
+class EnterEvent(Event):
+    """
+    A node of node_type starts. Its children follow, then an ExitEvent.
+    """
+
+    __slots__ = ("node_type",)
+
+    def __init__(self, node_type: str) -> None:
+        self.node_type = node_type
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(node_type={repr(self.node_type)})"
+
+
+class TokenEvent(Event):
+    __slots__ = ("token",)
+
+    def __init__(self, token: Token) -> None:
+        self.token = token
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(token={repr(self.token)})"
+
+
+class ExitEvent(Event):
+    __slots__ = ("node_type",)
+
+    def __init__(self, node_type: str) -> None:
+        self.node_type = node_type
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(node_type={repr(self.node_type)})"
+
+
+class TextEdit:
+    """
+    Replaces text[start:end] by new_text, see FileParser.parse_incremental().
+    """
+
+    def __init__(self, start: int, end: int, new_text: str) -> None:
+        if not 0 <= start <= end:
+            raise ValueError(f"Invalid edit range {start}:{end}")
+
+        self.start = start
+        self.end = end
+        self.new_text = new_text
+
+    def apply(self, text: str) -> str:
+        if self.end > len(text):
+            raise ValueError(f"Edit range {self.start}:{self.end} is out of the text")
+
+        return text[: self.start] + self.new_text + text[self.end :]
+
+    def __repr__(self) -> str:
+        return (
+            f"{type(self).__name__}(start={self.start}, end={self.end}, "
+            + f"new_text={repr(self.new_text)})"
+        )
+
+
+class ErrorNode(Node):
+    """
+    Tokens that were skipped after error, see FileParser.parse_text_recovering().
+    Children are empty if parsing continued at the token where it failed.
+    """
+
+    def __init__(self, children: List[Token | Node], error: ParseError) -> None:
+        super().__init__(children, ERROR_NODE_TYPE)
+        self.error = error
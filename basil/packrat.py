@@ -0,0 +1,37 @@
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from basil.models import Node
+
+MemoKey = Tuple[str, int]
+# The parsed node and the offset after it, failures are stored as (None, FAILED).
+MemoValue = Tuple[Optional[Node], int]
+
+
+class PackratMemo:
+    """
+    Remembers the outcome of parsing a node type at an offset, so ChoiceParser
+    alternatives sharing a prefix don't parse the same node over and over.
+
+    It keeps at most max_entries results, evicting the least recently used one.
+    A max_entries of 0 disables memoization.
+    """
+
+    def __init__(self, max_entries: int = 0) -> None:
+        self.max_entries = max_entries
+        self.results: OrderedDict[MemoKey, MemoValue] = OrderedDict()
+
+    def reset(self) -> None:
+        self.results.clear()
+
+    def get(self, key: MemoKey) -> MemoValue:
+        # Raises KeyError if nothing is stored.
+        result = self.results[key]
+        self.results.move_to_end(key)
+        return result
+
+    def store(self, key: MemoKey, result: MemoValue) -> None:
+        self.results[key] = result
+
+        if len(self.results) > self.max_entries:
+            self.results.popitem(last=False)
@@ -0,0 +1,225 @@
+import pickle
+import threading
+from array import array
+from collections import OrderedDict
+from hashlib import sha256
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from basil.models import Node, Source, Token
+from basil.syntax_loader.cache import cache_key, write_atomically
+
+# Marks a token in CompactTree.structure, node types are indexes from 0 on.
+TOKEN = -1
+
+
+class CompactTree:
+    """
+    A Node tree without its text, as flat arrays. The structure lists the tree
+    in pre-order: every node as the index of its type and its number of
+    children, every token as TOKEN. The type and offsets of the tokens are
+    stored in the order they appear.
+
+    Token values and positions come from the text when the Node tree is built
+    again, so the same CompactTree serves the same text in any file.
+    """
+
+    __slots__ = ("node_types", "structure", "type_ids", "starts", "ends")
+
+    def __init__(self, root: Node, token_type_ids: Dict[str, int]) -> None:
+        self.node_types: List[str] = []
+        self.structure = array("i")
+        self.type_ids = array("i")
+        self.starts = array("q")
+        self.ends = array("q")
+
+        node_type_indexes: Dict[str, int] = {}
+        stack: List[Token | Node] = [root]
+
+        while stack:
+            item = stack.pop()
+
+            if isinstance(item, Token):
+                self.structure.append(TOKEN)
+                self.type_ids.append(token_type_ids[item.type])
+                self.starts.append(item.offset)
+                self.ends.append(item.offset + len(item.value))
+                continue
+
+            node_type_index = node_type_indexes.get(item.type)
+
+            if node_type_index is None:
+                node_type_index = len(self.node_types)
+                node_type_indexes[item.type] = node_type_index
+                self.node_types.append(item.type)
+
+            self.structure.append(node_type_index)
+            self.structure.append(len(item.children))
+            stack += reversed(item.children)
+
+    @property
+    def size(self) -> int:
+        """
+        Estimated memory use in bytes
+        """
+
+        return sum(
+            len(items) * items.itemsize
+            for items in (self.structure, self.type_ids, self.starts, self.ends)
+        )
+
+    def to_node(
+        self, text: str, file_name: Optional[str], token_type_names: List[str]
+    ) -> Node:
+        source = Source(Path(file_name or "/dev/null"), text)
+        tokens = iter(
+            [
+                Token(
+                    text[start:end],
+                    token_type_names[type_id],
+                    offset=start,
+                    source=source,
+                )
+                for type_id, start, end in zip(self.type_ids, self.starts, self.ends)
+            ]
+        )
+        node_types = self.node_types
+        values = iter(self.structure.tolist())
+
+        root = Node([], node_types[next(values)])
+
+        # Nodes that don't have all their children yet and how many they miss
+        parents: List[Node] = [root]
+        missing: List[int] = [next(values)]
+
+        for value in values:
+            while not missing[-1]:
+                parents.pop()
+                missing.pop()
+
+            missing[-1] -= 1
+
+            if value == TOKEN:
+                parents[-1].children.append(next(tokens))
+                continue
+
+            node = Node([], node_types[value])
+            parents[-1].children.append(node)
+            parents.append(node)
+            missing.append(next(values))
+
+        return root
+
+
+class ParseCache:
+    """
+    Remembers parse results by grammar, node type and text, see
+    FileParser(parse_cache=...). Results are kept as CompactTrees, so every
+    lookup builds a new Node tree with the file name of that lookup.
+
+    Results are kept in memory up to a total estimated size of max_memory bytes,
+    evicting the least recently used one. With a cache_dir, results are also
+    written there and read back when they are not in memory, also by other
+    processes. Files that can't be read are ignored.
+
+    A ParseCache can be shared by threads, the trees in memory and the counters
+    are guarded by a lock. Files are read and written outside of it.
+    """
+
+    def __init__(
+        self, max_memory: int = 64 * 1024 * 1024, cache_dir: Optional[Path] = None
+    ) -> None:
+        self.max_memory = max_memory
+        self.cache_dir = cache_dir
+        self.trees: OrderedDict[str, CompactTree] = OrderedDict()
+        self.memory_size = 0
+        self.lock = threading.Lock()
+
+        # Lookups that found a tree, disk_hits of them were read from cache_dir
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # Pickled without the trees in memory, see FileParser.parse_many()
+        return (type(self), (self.max_memory, self.cache_dir))
+
+    def get(self, key: str) -> Optional[CompactTree]:
+        with self.lock:
+            tree = self.trees.get(key)
+
+            if tree is not None:
+                self.trees.move_to_end(key)
+                self.hits += 1
+                return tree
+
+        if self.cache_dir is not None:
+            tree = self._read(key)
+
+        with self.lock:
+            if tree is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.disk_hits += 1
+                self._remember(key, tree)
+
+        return tree
+
+    def put(self, key: str, tree: CompactTree) -> None:
+        with self.lock:
+            self._remember(key, tree)
+
+        if self.cache_dir is not None:
+            write_atomically(self._file(key), pickle.dumps(tree))
+
+    def _remember(self, key: str, tree: CompactTree) -> None:
+        # Called with the lock held
+        if key in self.trees:
+            self.memory_size -= self.trees.pop(key).size
+
+        if tree.size > self.max_memory:
+            return
+
+        self.trees[key] = tree
+        self.memory_size += tree.size
+
+        while self.memory_size > self.max_memory:
+            _, evicted = self.trees.popitem(last=False)
+            self.memory_size -= evicted.size
+
+    def _read(self, key: str) -> Optional[CompactTree]:
+        try:
+            with self._file(key).open("rb") as file:
+                tree = pickle.load(file)
+        except Exception:
+            # Missing, truncated or not written by this version
+            return None
+
+        if not isinstance(tree, CompactTree):
+            return None
+
+        return tree
+
+    def _file(self, key: str) -> Path:
+        assert self.cache_dir is not None
+        return self.cache_dir / f"{key}.tree"
+
+
+def grammar_hash(syntax_file_content: str, engine: str) -> str:
+    """
+    Engines parse some syntaxes differently, see FileParser, so the engine is
+    part of the hash.
+    """
+
+    return cache_key(f"{engine}\0{syntax_file_content}")
+
+
+def parse_cache_key(grammar_hash: str, node_type: str, text: str) -> str:
+    digest = sha256()
+    digest.update(grammar_hash.encode())
+    digest.update(b"\0")
+    digest.update(node_type.encode())
+    digest.update(b"\0")
+    digest.update(sha256(text.encode()).digest())
+    return digest.hexdigest()
@@ -0,0 +1,20 @@
+from typing import Optional
+
+from basil.error_collector import ParseErrorCollector
+from basil.packrat import PackratMemo
+
+
+class ParseContext:
+    """
+    Mutable state of one parse, passed down through all parse calls. Parser
+    objects don't change while parsing, so one FileParser can be shared by
+    several threads, as long as every parse gets its own ParseContext.
+    """
+
+    def __init__(
+        self, error_collector: ParseErrorCollector, memo: Optional[PackratMemo] = None
+    ) -> None:
+        self.error_collector = error_collector
+
+        # Without a memo, nothing is memoized.
+        self.memo = memo or PackratMemo()
@@ -1,17 +1,44 @@
-from typing import List, Optional, Tuple
+import sys
+from typing import Dict, List, Optional, Set, Tuple
 
-from basil.error_collector import ParseErrorCollector
-from basil.exceptions import ParseError
-from basil.models import EndOfFile, InnerNode, ParserInput, Token
+from basil.models import Node, ParserInput, Token
+from basil.parse_context import ParseContext
+
+# Token type id used for lookahead past the last token.
+END_OF_FILE_ID = -1
+
+# Minimum length of a parser that can never succeed, e.g. "FOO: bar FOO"
+NEVER_MATCHES_LENGTH = sys.maxsize
+
+# Offset returned by parsers that failed. Failures don't raise: raising and
+# catching exceptions in every ChoiceParser is too slow. Instead the furthest
+# failure is tracked by ParseErrorCollector.
+FAILED = -1
+
+# Children of the node that is being parsed. Parsers append what they parse to
+# it, only ConcatenateParsers with a node type start a new list. So the Node
+# tree comes out flattened.
+Children = List[Token | Node]
 
 
 class BaseParser:
     def __init__(self) -> None:
-        self.error_collector: Optional[ParseErrorCollector] = None
-
-    def register_error(self, error: ParseError) -> None:
-        assert self.error_collector
-        self.error_collector.register(error)
+        # Computed by SyntaxLoader, see SyntaxLoader._analyze_parsers()
+        self.first_token_types: Set[str] = set()
+        self.first_token_type_ids: Set[int] = set()
+        self.first_token_mask = 0  # Bitmask of first_token_type_ids
+        self.follow_token_type_ids: Set[int] = set()  # May hold END_OF_FILE_ID
+        self.nullable = False
+        self.min_length = NEVER_MATCHES_LENGTH
+
+    def can_start(self, token_type_id: int) -> bool:
+        return self.nullable or token_type_id in self.first_token_type_ids
+
+    def _lookahead(self, input: ParserInput, offset: int) -> int:
+        try:
+            return input.type_ids[offset]
+        except IndexError:
+            return END_OF_FILE_ID
 
     def _print(
         self, input: ParserInput, offset: int, verbose: bool, parser_name: str
@@ -27,37 +54,47 @@ class BaseParser:
         print(f"{input.file} | offset={offset} | type={token_type} | {parser_name}")
 
     def parse(
-        self, input: ParserInput, offset: int, verbose: bool = False
-    ) -> Tuple[Token | InnerNode, int]:  # pragma:nocover
+        self,
+        input: ParserInput,
+        offset: int,
+        children: Children,
+        context: ParseContext,
+        verbose: bool = False,
+    ) -> int:  # pragma:nocover
+        """
+        Appends the parsed tokens and nodes to children and returns the offset
+        after them, or FAILED. On failure, children may have been appended, the
+        caller truncates them if it backtracks.
+        """
         raise NotImplementedError  # Implemented in subclasses.
 
 
 class TokenParser(BaseParser):
-    def __init__(self, token_type: str) -> None:
+    def __init__(self, token_type: str, token_type_id: int) -> None:
         self.token_type = token_type
+        self.token_type_id = token_type_id
+        self.token_type_mask = 1 << token_type_id
         super().__init__()
 
     def __repr__(self) -> str:  # pragma:nocover
         return self.token_type
 
     def parse(
-        self, input: ParserInput, offset: int, verbose: bool = False
-    ) -> Tuple[Token | InnerNode, int]:
+        self,
+        input: ParserInput,
+        offset: int,
+        children: Children,
+        context: ParseContext,
+        verbose: bool = False,
+    ) -> int:
         self._print(input, offset, verbose, f"TokenParser for {self.token_type}")
 
-        try:
-            token = input.tokens[offset]
-        except IndexError:
-            e: ParseError = ParseError(offset, EndOfFile(input.file), {self.token_type})
-            self.register_error(e)
-            raise e
-
-        if token.type != self.token_type:
-            e = ParseError(offset, token, {self.token_type})
-            self.register_error(e)
-            raise e
+        if self._lookahead(input, offset) != self.token_type_id:
+            context.error_collector.register(offset, self.token_type_mask)
+            return FAILED
 
-        return token, offset + 1
+        children.append(input.tokens[offset])
+        return offset + 1
 
 
 class NodeParser(BaseParser):
@@ -70,12 +107,44 @@ class NodeParser(BaseParser):
         return self.node_type
 
     def parse(
-        self, input: ParserInput, offset: int, verbose: bool = False
-    ) -> Tuple[Token | InnerNode, int]:
+        self,
+        input: ParserInput,
+        offset: int,
+        children: Children,
+        context: ParseContext,
+        verbose: bool = False,
+    ) -> int:
         self._print(input, offset, verbose, f"NodeParser for {self.node_type}")
 
         assert self.inner
-        return self.inner.parse(input, offset, verbose=verbose)
+
+        memo = context.memo
+
+        if not memo.max_entries:
+            return self.inner.parse(input, offset, children, context, verbose=verbose)
+
+        key = (self.node_type, offset)
+
+        try:
+            node, end = memo.get(key)
+        except KeyError:
+            pass
+        else:
+            if node is not None:
+                children.append(node)
+            return end
+
+        end = self.inner.parse(input, offset, children, context, verbose=verbose)
+
+        if end == FAILED:
+            memo.store(key, (None, FAILED))
+        else:
+            # The inner ConcatenateParser appended the parsed node.
+            parsed_node = children[-1]
+            assert isinstance(parsed_node, Node)
+            memo.store(key, (parsed_node, end))
+
+        return end
 
 
 class ConcatenateParser(BaseParser):
@@ -99,20 +168,54 @@ class ConcatenateParser(BaseParser):
         return "(" + " ".join(repr(parser) for parser in self.parsers) + ")"
 
     def parse(
-        self, input: ParserInput, offset: int, verbose: bool = False
-    ) -> Tuple[InnerNode, int]:
+        self,
+        input: ParserInput,
+        offset: int,
+        children: Children,
+        context: ParseContext,
+        verbose: bool = False,
+    ) -> int:
         parser_name = "ConcatenateParser"
         if self.node_type is not None:
             parser_name += f" for {self.node_type}"
 
         self._print(input, offset, verbose, parser_name)
 
-        children: List[Token | InnerNode] = []
+        # Failing here without trying would skip the errors of the parsers below,
+        # so this only happens when no errors are collected.
+        try:
+            token_count = len(input.type_ids)
+        except AttributeError:
+            # Parsing starts here with a ParserInput without type ids.
+            error_collector = context.error_collector
+            token_count = len(input.get_type_ids(error_collector.token_type_names))
+
+        if (
+            token_count - offset < self.min_length
+            and not context.error_collector.enabled
+        ):
+            return FAILED
+
+        if self.node_type is None:
+            for parser in self.parsers:
+                offset = parser.parse(input, offset, children, context, verbose=verbose)
+
+                if offset == FAILED:
+                    return FAILED
+
+            return offset
+
+        node_children: Children = []
         for parser in self.parsers:
-            child, offset = parser.parse(input, offset, verbose=verbose)
-            children.append(child)
+            offset = parser.parse(
+                input, offset, node_children, context, verbose=verbose
+            )
 
-        return InnerNode(children, type=self.node_type), offset
+            if offset == FAILED:
+                return FAILED
+
+        children.append(Node(node_children, self.node_type))
+        return offset
 
 
 class ChoiceParser(BaseParser):
@@ -125,29 +228,72 @@ class ChoiceParser(BaseParser):
             else:
                 self.parsers.append(parser)
 
+        # Alternatives that can start with a token type id and a bitmask of the
+        # first token types of the others, see build_dispatch()
+        self.dispatch: Dict[int, Tuple[List[BaseParser], int]] = {}
+        self.default_dispatch: Tuple[List[BaseParser], int] = (self.parsers, 0)
+
         super().__init__()
 
     def __repr__(self) -> str:  # pragma:nocover
         return "(" + " | ".join(repr(parser) for parser in self.parsers) + " )"
 
+    def build_dispatch(self) -> None:
+        """
+        Should be called once the first token types of all alternatives are
+        known. Alternatives keep their order, so ordered choice is unaffected.
+        """
+
+        def dispatch_for(token_type_id: int) -> Tuple[List[BaseParser], int]:
+            alternatives: List[BaseParser] = []
+            skipped_token_mask = 0
+
+            for parser in self.parsers:
+                if parser.can_start(token_type_id):
+                    alternatives.append(parser)
+                else:
+                    skipped_token_mask |= parser.first_token_mask
+
+            return alternatives, skipped_token_mask
+
+        self.dispatch = {
+            token_type_id: dispatch_for(token_type_id)
+            for token_type_id in self.first_token_type_ids
+        }
+        self.default_dispatch = dispatch_for(END_OF_FILE_ID)
+
     def parse(
-        self, input: ParserInput, offset: int, verbose: bool = False
-    ) -> Tuple[Token | InnerNode, int]:
+        self,
+        input: ParserInput,
+        offset: int,
+        children: Children,
+        context: ParseContext,
+        verbose: bool = False,
+    ) -> int:
         self._print(
             input, offset, verbose, f"ChoiceParser with {len(self.parsers)} choices"
         )
 
-        last_exception: Optional[ParseError] = None
+        lookahead = self._lookahead(input, offset)
+        alternatives, skipped_token_mask = self.dispatch.get(
+            lookahead, self.default_dispatch
+        )
 
-        for parser in self.parsers:
-            try:
-                return parser.parse(input, offset, verbose=verbose)
-            except ParseError as e:
-                self.register_error(e)
-                last_exception = e
+        if skipped_token_mask:
+            # Register the errors the skipped alternatives would have registered
+            context.error_collector.register(offset, skipped_token_mask)
+
+        mark = len(children)
 
-        assert last_exception
-        raise last_exception
+        for parser in alternatives:
+            end = parser.parse(input, offset, children, context, verbose=verbose)
+
+            if end != FAILED:
+                return end
+
+            del children[mark:]
+
+        return FAILED
 
 
 class OptionalParser(BaseParser):
@@ -159,14 +305,27 @@ class OptionalParser(BaseParser):
         return "(" + repr(self.inner) + ")?"
 
     def parse(
-        self, input: ParserInput, offset: int, verbose: bool = False
-    ) -> Tuple[Token | InnerNode, int]:
+        self,
+        input: ParserInput,
+        offset: int,
+        children: Children,
+        context: ParseContext,
+        verbose: bool = False,
+    ) -> int:
         self._print(input, offset, verbose, "OptionalParser")
 
-        try:
-            return self.inner.parse(input, offset, verbose=verbose)
-        except ParseError:
-            return InnerNode([]), offset
+        if self.inner.can_start(self._lookahead(input, offset)):
+            mark = len(children)
+            end = self.inner.parse(input, offset, children, context, verbose=verbose)
+
+            if end != FAILED:
+                return end
+
+            del children[mark:]
+        else:
+            context.error_collector.register(offset, self.inner.first_token_mask)
+
+        return offset
 
 
 class RepeatParser(BaseParser):
@@ -179,20 +338,33 @@ class RepeatParser(BaseParser):
         return "(" + repr(self.inner) + ")*"
 
     def parse(
-        self, input: ParserInput, offset: int, verbose: bool = False
-    ) -> Tuple[Token | InnerNode, int]:
+        self,
+        input: ParserInput,
+        offset: int,
+        children: Children,
+        context: ParseContext,
+        verbose: bool = False,
+    ) -> int:
         self._print(input, offset, verbose, "RepeatParser")
 
-        children: List[Token | InnerNode] = []
+        repeats = 0
 
         while True:
-            try:
-                child, offset = self.inner.parse(input, offset, verbose=verbose)
-            except ParseError as e:
-                if len(children) < self.min_repeats:
-                    raise e
+            if not self.inner.can_start(self._lookahead(input, offset)):
+                context.error_collector.register(offset, self.inner.first_token_mask)
+                break
+
+            mark = len(children)
+            end = self.inner.parse(input, offset, children, context, verbose=verbose)
+
+            if end == FAILED:
+                del children[mark:]
                 break
 
-            children.append(child)
+            repeats += 1
+            offset = end
+
+        if repeats < self.min_repeats:
+            return FAILED
 
-        return InnerNode(children), offset
+        return offset
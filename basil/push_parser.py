@@ -0,0 +1,243 @@
+import asyncio
+from array import array
+from concurrent.futures import Executor
+from pathlib import Path
+from typing import (
+    AsyncIterator,
+    Dict,
+    Generic,
+    Iterable,
+    Iterator,
+    List,
+    MutableSequence,
+    Optional,
+    Sequence,
+    TypeVar,
+    overload,
+)
+
+from basil.error_collector import ParseErrorCollector
+from basil.event_parser import MORE_INPUT, EventParser
+from basil.models import (
+    EnterEvent,
+    Event,
+    ExitEvent,
+    Node,
+    ParserInput,
+    Token,
+    TokenEvent,
+)
+from basil.packrat import PackratMemo
+from basil.parse_context import ParseContext
+from basil.parser import ConcatenateParser
+from basil.tokenizer import StreamTokenizer
+
+T = TypeVar("T")
+
+
+class Window(Sequence[T], Generic[T]):
+    """
+    A sequence that is appended to, of which only the items from start on and
+    a few kept items before it are stored. Items are read by their index in the
+    whole sequence. Used for the tokens of a PushParser.
+    """
+
+    def __init__(self, items: MutableSequence[T]) -> None:
+        self.items = items
+        self.start = 0
+        self.kept: Dict[int, T] = {}
+
+    def append(self, item: T) -> None:
+        self.items.append(item)
+
+    def __len__(self) -> int:
+        return self.start + len(self.items)
+
+    @overload
+    def __getitem__(self, index: int) -> T:
+        """
+        Returns the item at index in the whole sequence.
+        """
+
+    @overload
+    def __getitem__(self, index: slice) -> Sequence[T]:
+        """
+        Slicing is not supported, Parsers read one token at a time.
+        """
+
+    def __getitem__(self, index: int | slice) -> T | Sequence[T]:
+        if isinstance(index, slice):
+            raise TypeError("A Window can't be sliced")
+
+        if index >= self.start:
+            return self.items[index - self.start]
+
+        try:
+            return self.kept[index]
+        except KeyError:
+            raise IndexError(f"Item {index} was trimmed") from None
+
+    def trim(self, start: int, kept: Iterable[int]) -> None:
+        """
+        Removes the items before start, except the ones at the kept indexes.
+        """
+
+        self.kept = {index: self[index] for index in kept if index < start}
+        del self.items[: start - self.start]
+        self.start = start
+
+
+class PushParser:
+    """
+    Parses text that is pushed in chunks from asyncio code, see
+    FileParser.push_parser(). Every chunk is tokenized with a StreamTokenizer
+    and parsed as far as possible with an EventParser before feed() returns.
+    close() finishes the parse and returns the root Node.
+
+    With stream_nodes enabled, the child nodes of the root node are handed out
+    by async iteration as soon as they are parsed, and are not kept in the root
+    Node. Iterate in another task than the one calling feed() and close().
+
+    With an executor, tokenizing and parsing run in it, so the event loop is not
+    blocked. The text is not kept, and tokens only as long as the parse may read
+    them again, see EventParser.needed_offsets(). With stream_nodes enabled,
+    memory use depends on how far the parser may backtrack, not on the input
+    size.
+    """
+
+    def __init__(
+        self,
+        parser: ConcatenateParser,
+        stream_tokenizer: StreamTokenizer,
+        file: Path,
+        token_type_ids: Dict[str, int],
+        token_type_names: List[str],
+        executor: Optional[Executor] = None,
+        stream_nodes: bool = False,
+    ) -> None:
+        self.stream_tokenizer = stream_tokenizer
+        self.token_type_ids = token_type_ids
+        self.executor = executor
+        self.stream_nodes = stream_nodes
+
+        self.tokens: Window[Token] = Window([])
+        self.type_ids: Window[int] = Window(array("i"))
+        self.parser_input = ParserInput(self.tokens, file, type_ids=self.type_ids)
+
+        context = ParseContext(ParseErrorCollector(token_type_names), PackratMemo())
+        self.error_collector = context.error_collector
+        self.event_parser = EventParser(self.parser_input, context)
+        self.event_parser.input_complete = False
+        self.events = self.event_parser.iter_events(parser, 0)
+
+        # Whether iter_events() is done, early if the parse failed
+        self.parse_ended = False
+
+        # Children of the nodes that are entered but not exited
+        self.children_stack: List[List[Token | Node]] = []
+        self.node_types: List[str] = []
+        self.root: Optional[Node] = None
+
+        self.nodes: asyncio.Queue[Optional[Node]] = asyncio.Queue()
+        self.lock = asyncio.Lock()
+        self.closed = False
+
+    async def feed(self, chunk: str) -> None:
+        """
+        Raises TokenizerException, or ParseError if the text so far can't be the
+        start of a valid text.
+        """
+
+        if self.closed:
+            raise ValueError("Cannot feed a closed PushParser")
+
+        await self._run(chunk, False)
+
+    async def close(self) -> Node:
+        """
+        Raises TokenizerException or ParseError if the text doesn't parse.
+        """
+
+        self.closed = True
+
+        try:
+            await self._run("", True)
+        finally:
+            # Stops async iteration
+            self.nodes.put_nowait(None)
+
+        assert self.root
+        return self.root
+
+    def __aiter__(self) -> AsyncIterator[Node]:
+        return self._iter_nodes()
+
+    async def _iter_nodes(self) -> AsyncIterator[Node]:
+        while (node := await self.nodes.get()) is not None:
+            yield node
+
+    async def _run(self, chunk: str, final: bool) -> None:
+        async with self.lock:
+            if self.executor is None:
+                completed_nodes = self._parse(chunk, final)
+            else:
+                loop = asyncio.get_running_loop()
+                completed_nodes = await loop.run_in_executor(
+                    self.executor, self._parse, chunk, final
+                )
+
+        for node in completed_nodes:
+            self.nodes.put_nowait(node)
+
+    def _parse(self, chunk: str, final: bool) -> List[Node]:
+        if final:
+            new_tokens = self.stream_tokenizer.close()
+        else:
+            new_tokens = self.stream_tokenizer.feed(chunk)
+
+        for token in new_tokens:
+            self.tokens.append(token)
+            self.type_ids.append(self.token_type_ids[token.type])
+
+        self.event_parser.token_count = len(self.tokens)
+        self.event_parser.input_complete = final
+
+        completed_nodes = list(self._build_nodes(self._next_events()))
+
+        if self.parse_ended and self.event_parser.offset != len(self.tokens):
+            raise self.error_collector.get_furthest_error(self.parser_input)
+
+        if not self.parse_ended:
+            start, kept = self.event_parser.needed_offsets()
+            self.tokens.trim(start, kept)
+            self.type_ids.trim(start, kept)
+
+        return completed_nodes
+
+    def _next_events(self) -> Iterator[Event]:
+        for event in self.events:
+            if event is MORE_INPUT:
+                return
+            yield event
+
+        self.parse_ended = True
+
+    def _build_nodes(self, events: Iterator[Event]) -> Iterator[Node]:
+        children_stack = self.children_stack
+
+        for event in events:
+            if isinstance(event, EnterEvent):
+                children_stack.append([])
+                self.node_types.append(event.node_type)
+            elif isinstance(event, ExitEvent):
+                node = Node(children_stack.pop(), self.node_types.pop())
+
+                if not children_stack:
+                    self.root = node
+                elif self.stream_nodes and len(children_stack) == 1:
+                    yield node
+                else:
+                    children_stack[-1].append(node)
+            else:
+                assert isinstance(event, TokenEvent)
+                children_stack[-1].append(event.token)
@@ -0,0 +1,301 @@
+from typing import Dict, List, Optional, Set, Tuple
+
+from basil.event_parser import EventParser
+from basil.exceptions import ParseError
+from basil.iterative_parser import Frame, Step
+from basil.models import (
+    EnterEvent,
+    ErrorNode,
+    Event,
+    ExitEvent,
+    Node,
+    ParserInput,
+    Token,
+    TokenEvent,
+)
+from basil.parse_context import ParseContext
+from basil.parser import (
+    END_OF_FILE_ID,
+    FAILED,
+    BaseParser,
+    ConcatenateParser,
+    RepeatParser,
+)
+
+# Expected token type of errors after the end of the root node
+END_OF_FILE = "end of file"
+
+
+def _token_mask(token_type_ids: Set[int]) -> int:
+    return sum(
+        1 << token_type_id
+        for token_type_id in token_type_ids
+        if token_type_id != END_OF_FILE_ID
+    )
+
+
+class ErrorEvent(Event):
+    """
+    Used by RecoveringParser to put an ErrorNode in the tree.
+    """
+
+    __slots__ = ("node",)
+
+    def __init__(self, node: ErrorNode) -> None:
+        self.node = node
+
+
+class RecoveringParser(EventParser):
+    """
+    Parses like EventParser, but continues after errors. When the parse would
+    fail, the error is recorded and tokens are skipped up to the first token
+    where a frame on the stack can continue:
+    - a repetition, if the token can start another repetition or may follow it
+    - a concatenation, if the token has one of the sync_token_type_ids and the
+      rest of the concatenation can start with it or may be followed by it
+
+    Frames above that frame are dropped, their nodes are kept with the children
+    they have. The skipped tokens are put in an ErrorNode. If no frame can
+    continue, all tokens are skipped. A repetition that stops before a token
+    that can't follow it is treated as an error right away, so the repetition
+    can continue after the skipped tokens. Tokens after the root node are
+    skipped too, with an error that expects the end of the file.
+
+    Every token is visited a bounded number of times. A recovery walks the stack
+    once, then takes one lookup per skipped token to find where to continue.
+    """
+
+    def __init__(
+        self, input: ParserInput, context: ParseContext, sync_token_type_ids: Set[int]
+    ) -> None:
+        super().__init__(input, context)
+        self.input = input
+        self.sync_token_type_ids = sync_token_type_ids
+        self.errors: List[ParseError] = []
+
+        # Number of tokens in the tree that is built from the yielded events
+        self.parsed_tokens = 0
+
+        # Offset where the parse continued after the last error
+        self.recovered_offset = -1
+
+    def parse_with_errors(
+        self, parser: ConcatenateParser
+    ) -> Tuple[Node, List[ParseError]]:
+        """
+        Returns the root node and the errors in the order they were found.
+        """
+
+        # Children of the nodes that are entered but not exited
+        children_stack: List[List[Token | Node]] = [[]]
+        node_types: List[str] = []
+
+        for event in self.iter_events(parser, 0):
+            if isinstance(event, TokenEvent):
+                children_stack[-1].append(event.token)
+                self.parsed_tokens += 1
+            elif isinstance(event, EnterEvent):
+                children_stack.append([])
+                node_types.append(event.node_type)
+            elif isinstance(event, ExitEvent):
+                node = Node(children_stack.pop(), node_types.pop())
+                children_stack[-1].append(node)
+            else:
+                assert isinstance(event, ErrorEvent)
+                children_stack[-1].append(event.node)
+                self.parsed_tokens += len(event.node.children)
+
+        root = children_stack[0][0]
+        assert isinstance(root, Node)
+
+        if self.offset < self.token_count:
+            # The root node ended before the last token.
+            error = self._take_error(self.offset, 0)
+            if error.offset == self.offset:
+                error.expected_token_types.add(END_OF_FILE)
+
+            skipped: List[Token | Node] = [
+                self.tokens[index] for index in range(self.offset, self.token_count)
+            ]
+            root.children.append(ErrorNode(skipped, error))
+
+        return root, self.errors
+
+    def _fail(self) -> Step:
+        return self._recover()
+
+    def _start_repeat(self, parser: BaseParser, offset: int) -> Step:
+        assert isinstance(parser, RepeatParser)
+
+        if (
+            not self.live_frames
+            and not parser.min_repeats
+            and self._repeat_stops_at_error(parser, offset)
+        ):
+            # Keep the repetition on the stack, so it can continue after the
+            # skipped tokens.
+            self._push(parser, offset)
+            return self._recover()
+
+        return super()._start_repeat(parser, offset)
+
+    def _resume_repeat(self, frame: Frame, returned: int) -> Step:
+        parser = frame.parser
+        assert isinstance(parser, RepeatParser)
+
+        if (
+            returned != FAILED
+            and self.live_frames == int(frame.live)
+            and self._repeat_stops_at_error(parser, returned)
+        ):
+            # The skipped tokens count as part of the last repetition.
+            self._set_live(frame, False)
+            return self._recover()
+
+        return super()._resume_repeat(frame, returned)
+
+    def _repeat_stops_at_error(self, parser: RepeatParser, offset: int) -> bool:
+        # Nothing after the repetition can start with the lookahead.
+        lookahead = self._lookahead(offset)
+        return (
+            not parser.inner.can_start(lookahead)
+            and lookahead not in parser.follow_token_type_ids
+        )
+
+    def _recover(self) -> Step:
+        # Tokens of events that are not yielded yet are parsed too.
+        start = self.parsed_tokens
+        for event in self.events:
+            if isinstance(event, TokenEvent):
+                start += 1
+            elif isinstance(event, ErrorEvent):
+                start += len(event.node.children)
+
+        error = self._take_error(start, self._expected_token_mask(self.stack[-1]))
+
+        # Failing again where the last error ended skips at least one token.
+        first_offset = start
+        if start <= self.recovered_offset:
+            first_offset = self.recovered_offset + 1
+
+        # The innermost frame that can continue with each lookahead, so every
+        # offset is one lookup
+        depths: Dict[int, int] = {}
+        any_depth = -1
+
+        for depth, frame in enumerate(self.stack):
+            lookaheads = self._continue_lookaheads(frame, depth == 0)
+
+            if lookaheads is None:
+                any_depth = depth
+                continue
+
+            for lookahead in lookaheads:
+                depths[lookahead] = depth
+
+        for offset in range(first_offset, self.token_count + 1):
+            depth = max(depths.get(self._lookahead(offset), -1), any_depth)
+
+            if depth >= 0:
+                return self._continue(depth, start, offset, error)
+
+        # Put all remaining tokens in the innermost node and end all nodes.
+        self._skip(start, self.token_count, error)
+
+        while self.stack:
+            frame = self.stack.pop()
+            self._set_live(frame, False)
+
+            if isinstance(frame.parser, ConcatenateParser) and frame.parser.node_type:
+                self.events.append(ExitEvent(frame.parser.node_type))
+
+        return None, self.token_count
+
+    def _take_error(self, offset: int, expected_token_mask: int) -> ParseError:
+        # Errors registered after a recovery are reported for the next one.
+        if self.error_collector.offset < offset:
+            self.error_collector.register(offset, expected_token_mask)
+
+        error = self.error_collector.get_furthest_error(self.input)
+        self.error_collector.reset()
+        self.errors.append(error)
+        return error
+
+    def _expected_token_mask(self, frame: Frame) -> int:
+        """
+        Returns the token types the frame can continue with where it failed.
+        """
+
+        parser = frame.parser
+        children = [parser]
+        if isinstance(parser, ConcatenateParser):
+            children = parser.parsers[frame.index :]
+
+        expected_token_mask = 0
+        for child in children:
+            expected_token_mask |= child.first_token_mask
+
+            if not child.nullable:
+                return expected_token_mask
+
+        # Only the end of the file follows the root.
+        if frame is self.stack[0]:
+            return expected_token_mask
+
+        return expected_token_mask | _token_mask(parser.follow_token_type_ids)
+
+    def _continue_lookaheads(self, frame: Frame, is_root: bool) -> Optional[Set[int]]:
+        """
+        Returns the token type ids the frame can continue with after skipped
+        tokens, or None if it can continue with any.
+        """
+
+        parser = frame.parser
+
+        # Only the end of the file follows the root, whatever the syntax allows.
+        follow_token_type_ids = parser.follow_token_type_ids
+        if is_root:
+            follow_token_type_ids = {END_OF_FILE_ID}
+
+        if isinstance(parser, RepeatParser):
+            if parser.inner.nullable:
+                return None
+
+            return parser.inner.first_token_type_ids | follow_token_type_ids
+
+        if isinstance(parser, ConcatenateParser) and self.sync_token_type_ids:
+            # The parser at frame.index failed, the rest should continue.
+            lookaheads: Set[int] = set()
+
+            for child in parser.parsers[frame.index + 1 :]:
+                lookaheads |= child.first_token_type_ids
+
+                if not child.nullable:
+                    return lookaheads & self.sync_token_type_ids
+
+            return (lookaheads | follow_token_type_ids) & self.sync_token_type_ids
+
+        return set()
+
+    def _continue(self, depth: int, start: int, offset: int, error: ParseError) -> Step:
+        """
+        Drops the frames above depth and lets the frame at depth continue at
+        offset, as if its current child parsed the tokens up to offset.
+        """
+
+        while len(self.stack) > depth + 1:
+            frame = self.stack.pop()
+            self._set_live(frame, False)
+
+            if isinstance(frame.parser, ConcatenateParser) and frame.parser.node_type:
+                self.events.append(ExitEvent(frame.parser.node_type))
+
+        self._skip(start, offset, error)
+        return None, offset
+
+    def _skip(self, start: int, end: int, error: ParseError) -> None:
+        skipped: List[Token | Node] = [
+            self.tokens[index] for index in range(start, end)
+        ]
+        self.events.append(ErrorEvent(ErrorNode(skipped, error)))
+        self.recovered_offset = end
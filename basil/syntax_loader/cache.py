@@ -0,0 +1,88 @@
+import importlib.metadata
+import os
+import pickle
+import tempfile
+from functools import lru_cache
+from hashlib import sha256
+from pathlib import Path
+from typing import Optional
+
+from basil.syntax_loader.syntax_loader import SyntaxLoader
+
+# Name of the distribution, its version is part of the cache key.
+DISTRIBUTION_NAME = "basil-parser"
+
+
+def load_syntax(
+    syntax_file_content: str, cache_dir: Optional[Path] = None
+) -> SyntaxLoader:
+    """
+    Returns a SyntaxLoader for syntax_file_content. With a cache_dir, it is
+    loaded from a pickle file in cache_dir if there is one for the same syntax
+    JSON and basil version. Otherwise it is built and the pickle file written.
+    Cache files that can't be loaded are replaced. If cache_dir can't be
+    written, the SyntaxLoader is returned without caching it.
+    """
+
+    if cache_dir is None:
+        return SyntaxLoader(syntax_file_content)
+
+    cache_file = cache_dir / f"{cache_key(syntax_file_content)}.pickle"
+
+    try:
+        with cache_file.open("rb") as file:
+            syntax_loader = pickle.load(file)
+    except Exception:
+        # Missing, truncated or not written by this version, rebuild it
+        pass
+    else:
+        if isinstance(syntax_loader, SyntaxLoader):
+            return syntax_loader
+
+    syntax_loader = SyntaxLoader(syntax_file_content)
+
+    try:
+        write_atomically(cache_file, pickle.dumps(syntax_loader))
+    except OSError:
+        # For example a read-only cache_dir
+        pass
+
+    return syntax_loader
+
+
+def cache_key(syntax_file_content: str) -> str:
+    digest = sha256()
+    digest.update(_basil_version().encode())
+    digest.update(b"\0")
+    digest.update(syntax_file_content.encode())
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def _basil_version() -> str:
+    try:
+        return importlib.metadata.version(DISTRIBUTION_NAME)
+    except importlib.metadata.PackageNotFoundError:
+        pass
+
+    # Not installed, for example in a checkout. Pickled classes may change
+    # without a version change, so the sources are the version.
+    digest = sha256()
+    for source_file in sorted(Path(__file__).parent.parent.rglob("*.py")):
+        digest.update(source_file.read_bytes())
+
+    return "source-" + digest.hexdigest()
+
+
+def write_atomically(file: Path, content: bytes) -> None:
+    # Other processes may load the cache file at the same time.
+    file.parent.mkdir(parents=True, exist_ok=True)
+    file_descriptor, temporary_name = tempfile.mkstemp(dir=file.parent)
+
+    try:
+        with os.fdopen(file_descriptor, "wb") as temporary_file:
+            temporary_file.write(content)
+        os.replace(temporary_name, file)
+    except BaseException:
+        os.unlink(temporary_name)
+        raise
@@ -0,0 +1,565 @@
+import re
+import sys
+import warnings
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Iterable, List, Set, Tuple
+
+with warnings.catch_warnings():
+    # These modules are deprecated aliases, but they are the only typed way to
+    # read the parse tree of a regex.
+    warnings.simplefilter("ignore", DeprecationWarning)
+    import sre_constants
+    import sre_parse
+
+MAX_CODE_POINT = sys.maxunicode
+
+# Limits to keep compile time and table size reasonable.
+MAX_NFA_STATES = 20_000
+MAX_DFA_STATES = 5_000
+
+# Inclusive code point ranges, sorted and non-overlapping.
+CharRanges = Tuple[Tuple[int, int], ...]
+
+CATEGORY_REGEXES = {
+    sre_constants.CATEGORY_DIGIT: "\\d+",
+    sre_constants.CATEGORY_NOT_DIGIT: "\\D+",
+    sre_constants.CATEGORY_SPACE: "\\s+",
+    sre_constants.CATEGORY_NOT_SPACE: "\\S+",
+    sre_constants.CATEGORY_WORD: "\\w+",
+    sre_constants.CATEGORY_NOT_WORD: "\\W+",
+}
+
+
+class UnsupportedRegex(Exception):
+    def __init__(self, reason: str) -> None:
+        self.reason = reason
+
+    def __str__(self) -> str:  # pragma:nocover
+        return self.reason
+
+
+def _normalize(ranges: Iterable[Tuple[int, int]]) -> CharRanges:
+    merged: List[Tuple[int, int]] = []
+
+    for lo, hi in sorted(ranges):
+        if merged and lo <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(hi, merged[-1][1]))
+        else:
+            merged.append((lo, hi))
+
+    return tuple(merged)
+
+
+def _complement(ranges: CharRanges) -> CharRanges:
+    complement: List[Tuple[int, int]] = []
+    next_lo = 0
+
+    for lo, hi in ranges:
+        if lo > next_lo:
+            complement.append((next_lo, lo - 1))
+        next_lo = hi + 1
+
+    if next_lo <= MAX_CODE_POINT:
+        complement.append((next_lo, MAX_CODE_POINT))
+
+    return tuple(complement)
+
+
+@lru_cache(maxsize=None)
+def _overlaps(ranges: CharRanges, other: CharRanges) -> bool:
+    return any(
+        start <= other_end and other_start <= end
+        for start, end in ranges
+        for other_start, other_end in other
+    )
+
+
+def _all_characters() -> str:
+    return "".join(map(chr, range(MAX_CODE_POINT + 1)))
+
+
+@lru_cache(maxsize=None)
+def _category_ranges(category_regex: str) -> CharRanges:
+    return tuple(
+        (match.start(), match.end() - 1)
+        for match in re.finditer(category_regex, _all_characters())
+    )
+
+
+class _NFABuilder:
+    """
+    Thompson construction over the parse tree of Python's regex parser.
+    """
+
+    def __init__(self) -> None:
+        self.epsilon: List[List[int]] = []
+        self.edges: List[List[Tuple[CharRanges, int]]] = []
+        self.accepts: Dict[int, int] = {}
+
+    def new_state(self) -> int:
+        if len(self.edges) >= MAX_NFA_STATES:
+            raise UnsupportedRegex("regex is too large")
+
+        self.epsilon.append([])
+        self.edges.append([])
+        return len(self.edges) - 1
+
+    def add_token(self, token_id: int, pattern: re.Pattern[str]) -> None:
+        if pattern.flags & ~re.UNICODE:
+            raise UnsupportedRegex("regex flags are not supported")
+
+        try:
+            parsed = sre_parse.parse(pattern.pattern, pattern.flags)
+        except re.error as e:  # pragma:nocover # Pattern compiled already
+            raise UnsupportedRegex(str(e))
+
+        if parsed.state.flags & ~re.UNICODE:
+            raise UnsupportedRegex("regex flags are not supported")
+
+        # Build in a copy, so an unsupported regex leaves no unreachable states.
+        epsilon = [list(targets) for targets in self.epsilon]
+        edges = [list(targets) for targets in self.edges]
+
+        try:
+            start = self.new_state()
+            end = self._build(parsed.data, start)
+            self._check_longest(parsed.data, ())
+        except UnsupportedRegex:
+            self.epsilon, self.edges = epsilon, edges
+            raise
+
+        self.epsilon[0].append(start)
+        self.accepts[end] = token_id
+
+    def _check_longest(
+        self, items: Iterable[Tuple[Any, Any]], follow: CharRanges
+    ) -> Tuple[CharRanges, bool]:
+        """
+        The DFA finds the longest match, re takes the first alternative and the
+        most repetitions that match, and ends there. Both agree if the next
+        character always decides which alternative to take and whether to repeat
+        once more. follow has the characters that may come after items.
+
+        Raises UnsupportedRegex if re may end before the longest match. Returns
+        the characters that can start items and whether items can match empty.
+        """
+
+        first: CharRanges = ()
+        nullable = True
+
+        # Walk backward, so the characters after each item are known.
+        for opcode, argument in reversed(list(items)):
+            if nullable:
+                item_follow = _normalize(first + follow)
+            else:
+                item_follow = first
+
+            item_first, item_nullable = self._check_longest_item(
+                opcode, argument, item_follow
+            )
+
+            if item_nullable:
+                first = _normalize(item_first + first)
+            else:
+                first = item_first
+                nullable = False
+
+        return first, nullable
+
+    def _check_longest_item(
+        self, opcode: Any, argument: Any, follow: CharRanges
+    ) -> Tuple[CharRanges, bool]:
+        if opcode is sre_constants.LITERAL:
+            return ((argument, argument),), False
+
+        if opcode is sre_constants.NOT_LITERAL:
+            return _complement(((argument, argument),)), False
+
+        if opcode is sre_constants.ANY:
+            newline = ord("\n")
+            return _complement(((newline, newline),)), False
+
+        if opcode is sre_constants.IN:
+            return self._in_ranges(argument), False
+
+        if opcode is sre_constants.SUBPATTERN:
+            return self._check_longest(argument[-1], follow)
+
+        if opcode is sre_constants.BRANCH:
+            _, alternatives = argument
+            checked = [
+                self._check_longest(alternative, follow) for alternative in alternatives
+            ]
+            widths = {alternative.getwidth() for alternative in alternatives}
+
+            # With one fixed width, all alternatives end at the same offset.
+            if len(widths) != 1 or len(set(next(iter(widths)))) != 1:
+                seen: CharRanges = ()
+
+                for alternative_first, alternative_nullable in checked:
+                    if alternative_nullable or _overlaps(seen, alternative_first):
+                        raise UnsupportedRegex(
+                            "alternatives of different lengths that start with "
+                            + "the same character are not supported"
+                        )
+
+                    seen = _normalize(seen + alternative_first)
+
+            return (
+                _normalize(ranges for first, _ in checked for ranges in first),
+                any(nullable for _, nullable in checked),
+            )
+
+        if opcode is sre_constants.MAX_REPEAT:
+            min_repeats, max_repeats, items = argument
+            first, nullable = self._check_longest(items, follow)
+
+            if max_repeats == 1 and min_repeats == 1:
+                return first, nullable
+
+            self._check_longest(items, _normalize(first + follow))
+
+            if min_repeats != max_repeats and (nullable or _overlaps(first, follow)):
+                raise UnsupportedRegex(
+                    "repeats followed by a character they can start with are "
+                    + "not supported"
+                )
+
+            return first, nullable or min_repeats == 0
+
+        raise UnsupportedRegex(f"{opcode} is not supported")  # pragma:nocover
+
+    def _build(self, items: Iterable[Tuple[Any, Any]], state: int) -> int:
+        for opcode, argument in items:
+            state = self._build_item(opcode, argument, state)
+        return state
+
+    def _build_char(self, state: int, ranges: CharRanges) -> int:
+        end = self.new_state()
+        self.edges[state].append((ranges, end))
+        return end
+
+    def _build_item(self, opcode: Any, argument: Any, start: int) -> int:
+        if opcode is sre_constants.LITERAL:
+            return self._build_char(start, ((argument, argument),))
+
+        if opcode is sre_constants.NOT_LITERAL:
+            return self._build_char(start, _complement(((argument, argument),)))
+
+        if opcode is sre_constants.ANY:
+            newline = ord("\n")
+            return self._build_char(start, _complement(((newline, newline),)))
+
+        if opcode is sre_constants.IN:
+            return self._build_char(start, self._in_ranges(argument))
+
+        if opcode is sre_constants.BRANCH:
+            _, alternatives = argument
+            end = self.new_state()
+
+            for alternative in alternatives:
+                alternative_start = self.new_state()
+                self.epsilon[start].append(alternative_start)
+                alternative_end = self._build(alternative, alternative_start)
+                self.epsilon[alternative_end].append(end)
+
+            return end
+
+        if opcode is sre_constants.SUBPATTERN:
+            _, add_flags, del_flags, items = argument
+
+            if add_flags or del_flags:
+                raise UnsupportedRegex("regex flags are not supported")
+
+            return self._build(items, start)
+
+        if opcode is sre_constants.MAX_REPEAT:
+            min_repeats, max_repeats, items = argument
+            state = start
+
+            for _ in range(min_repeats):
+                state = self._build(items, state)
+
+            if max_repeats is sre_constants.MAXREPEAT:
+                # Use a separate end state, other fragments may add epsilon
+                # transitions to it which must not lead into the loop.
+                loop = self.new_state()
+                end = self.new_state()
+                self.epsilon[state].append(loop)
+                self.epsilon[loop].append(end)
+                self.epsilon[self._build(items, loop)].append(loop)
+                return end
+
+            optional_starts: List[int] = []
+            for _ in range(max_repeats - min_repeats):
+                optional_starts.append(state)
+                state = self._build(items, state)
+
+            for optional_start in optional_starts:
+                self.epsilon[optional_start].append(state)
+
+            return state
+
+        if opcode is sre_constants.MIN_REPEAT:
+            raise UnsupportedRegex("lazy repeats are not supported")
+
+        raise UnsupportedRegex(f"{opcode} is not supported")
+
+    def _in_ranges(self, items: List[Tuple[Any, Any]]) -> CharRanges:
+        ranges: List[Tuple[int, int]] = []
+        negate = False
+
+        for opcode, argument in items:
+            if opcode is sre_constants.NEGATE:
+                negate = True
+            elif opcode is sre_constants.LITERAL:
+                ranges.append((argument, argument))
+            elif opcode is sre_constants.RANGE:
+                ranges.append(argument)
+            elif opcode is sre_constants.CATEGORY and argument in CATEGORY_REGEXES:
+                ranges += _category_ranges(CATEGORY_REGEXES[argument])
+            else:
+                raise UnsupportedRegex(f"{opcode} {argument} is not supported")
+
+        normalized = _normalize(ranges)
+
+        if negate:
+            return _complement(normalized)
+
+        return normalized
+
+
+class DFA:
+    """
+    Deterministic automaton recognizing all supported token types at once.
+
+    Characters are mapped to equivalence classes first: all characters in one
+    class have the same transitions in every state.
+    """
+
+    def __init__(
+        self,
+        token_count: int,
+        ascii_classes: List[int],
+        bounds: List[int],
+        bound_classes: List[int],
+        transitions: List[List[int]],
+        accepts: List[FrozenSet[int]],
+        unsupported_token_types: Dict[str, str],
+    ) -> None:
+        self.token_count = token_count
+        self.ascii_classes = ascii_classes
+        self.bounds = bounds
+        self.bound_classes = bound_classes
+        self.transitions = transitions
+        self.accepts = accepts
+        self.unsupported_token_types = unsupported_token_types
+
+        self.min_accepts = [min(accepts, default=token_count) for accepts in accepts]
+        self.min_reachable = self._compute_min_reachable()
+
+    def _compute_min_reachable(self) -> List[int]:
+        min_reachable = list(self.min_accepts)
+        changed = True
+
+        while changed:
+            changed = False
+
+            for state, row in enumerate(self.transitions):
+                for next_state in row:
+                    if (
+                        next_state >= 0
+                        and min_reachable[next_state] < min_reachable[state]
+                    ):
+                        min_reachable[state] = min_reachable[next_state]
+                        changed = True
+
+        return min_reachable
+
+    def match(self, text: str, offset: int) -> Tuple[int, int]:
+        """
+        Returns the id of the highest priority token type matching at offset,
+        with the end of its longest match. Returns (token_count, -1) if no
+        token type matches.
+        """
+
+        ascii_classes = self.ascii_classes
+        transitions = self.transitions
+        accepts = self.accepts
+        min_accepts = self.min_accepts
+        min_reachable = self.min_reachable
+
+        best_token_id = self.token_count
+        best_end = -1
+        state = 0
+        end = offset
+        text_length = len(text)
+
+        while True:
+            if end > offset and min_accepts[state] <= best_token_id:
+                if min_accepts[state] < best_token_id:
+                    best_token_id = min_accepts[state]
+                    best_end = end
+                elif best_token_id in accepts[state]:
+                    best_end = end
+
+            if end == text_length or min_reachable[state] > best_token_id:
+                break
+
+            code_point = ord(text[end])
+
+            if code_point < 128:
+                char_class = ascii_classes[code_point]
+            else:
+                char_class = self.bound_classes[
+                    bisect_right(self.bounds, code_point) - 1
+                ]
+
+            state = transitions[state][char_class]
+
+            if state < 0:
+                break
+
+            end += 1
+
+        return best_token_id, best_end
+
+
+def _epsilon_closure(epsilon: List[List[int]], states: Iterable[int]) -> FrozenSet[int]:
+    closure: Set[int] = set(states)
+    stack = list(closure)
+
+    while stack:
+        for next_state in epsilon[stack.pop()]:
+            if next_state not in closure:
+                closure.add(next_state)
+                stack.append(next_state)
+
+    return frozenset(closure)
+
+
+def compile_dfa(token_regexes: List[Tuple[str, re.Pattern[str]]]) -> DFA:
+    """
+    Compiles all token regexes that only use regular constructs into one DFA.
+    Token types are identified by their offset in token_regexes. Token types
+    that can't be compiled are listed in DFA.unsupported_token_types, as are
+    those where re may end a match before the longest one, like "=|==".
+    """
+
+    builder = _NFABuilder()
+    builder.new_state()
+    unsupported_token_types: Dict[str, str] = {}
+
+    for token_id, (token_type, pattern) in enumerate(token_regexes):
+        try:
+            builder.add_token(token_id, pattern)
+        except UnsupportedRegex as e:
+            unsupported_token_types[token_type] = e.reason
+
+    try:
+        return _build_dfa(builder, len(token_regexes), unsupported_token_types)
+    except UnsupportedRegex as e:
+        # Fall back for all token types, using a DFA that never matches.
+        empty_builder = _NFABuilder()
+        empty_builder.new_state()
+        unsupported_token_types = {
+            token_type: e.reason for token_type, _ in token_regexes
+        }
+        return _build_dfa(empty_builder, len(token_regexes), unsupported_token_types)
+
+
+def _build_dfa(
+    builder: _NFABuilder, token_count: int, unsupported_token_types: Dict[str, str]
+) -> DFA:
+    # Split the code point range at every range boundary used by any edge.
+    edges = [edge for state_edges in builder.edges for edge in state_edges]
+    bound_set = {0}
+    for ranges, _ in edges:
+        for lo, hi in ranges:
+            bound_set.add(lo)
+            bound_set.add(hi + 1)
+    bounds = sorted(bound for bound in bound_set if bound <= MAX_CODE_POINT)
+
+    # Intervals between bounds that are covered by the same edges share a class.
+    covering_edges: List[List[int]] = [[] for _ in bounds]
+    for edge_id, (ranges, _) in enumerate(edges):
+        for lo, hi in ranges:
+            first_interval = bisect_right(bounds, lo) - 1
+            for interval in range(first_interval, bisect_right(bounds, hi)):
+                covering_edges[interval].append(edge_id)
+
+    class_ids: Dict[Tuple[int, ...], int] = {}
+    bound_classes = [
+        class_ids.setdefault(tuple(covering), len(class_ids))
+        for covering in covering_edges
+    ]
+
+    edge_classes: List[Set[int]] = [set() for _ in edges]
+    for interval, covering in enumerate(covering_edges):
+        for edge_id in covering:
+            edge_classes[edge_id].add(bound_classes[interval])
+
+    state_edges: List[List[Tuple[Set[int], int]]] = []
+    edge_id = 0
+    for nfa_state_edges in builder.edges:
+        state_edges.append([])
+        for _, target in nfa_state_edges:
+            state_edges[-1].append((edge_classes[edge_id], target))
+            edge_id += 1
+
+    # Subset construction, DFA states are numbered in order of discovery.
+    dfa_states: Dict[FrozenSet[int], int] = {}
+    nfa_state_sets: List[FrozenSet[int]] = []
+    transitions: List[List[int]] = []
+    accepts: List[FrozenSet[int]] = []
+
+    def get_dfa_state(nfa_states: FrozenSet[int]) -> int:
+        if nfa_states not in dfa_states:
+            if len(dfa_states) >= MAX_DFA_STATES:
+                raise UnsupportedRegex("token regexes need too many DFA states")
+
+            dfa_states[nfa_states] = len(dfa_states)
+            nfa_state_sets.append(nfa_states)
+
+        return dfa_states[nfa_states]
+
+    get_dfa_state(_epsilon_closure(builder.epsilon, [0]))
+
+    while len(transitions) < len(nfa_state_sets):
+        nfa_states = nfa_state_sets[len(transitions)]
+
+        targets: Dict[int, Set[int]] = {}
+        for nfa_state in nfa_states:
+            for char_classes, target in state_edges[nfa_state]:
+                for char_class in char_classes:
+                    targets.setdefault(char_class, set()).add(target)
+
+        row = [-1] * len(class_ids)
+        for char_class, class_targets in targets.items():
+            row[char_class] = get_dfa_state(
+                _epsilon_closure(builder.epsilon, class_targets)
+            )
+
+        transitions.append(row)
+        accepts.append(
+            frozenset(
+                builder.accepts[nfa_state]
+                for nfa_state in nfa_states
+                if nfa_state in builder.accepts
+            )
+        )
+
+    ascii_classes = [
+        bound_classes[bisect_right(bounds, char) - 1] for char in range(128)
+    ]
+
+    return DFA(
+        token_count,
+        ascii_classes,
+        bounds,
+        bound_classes,
+        transitions,
+        accepts,
+        unsupported_token_types,
+    )
@@ -1,5 +1,8 @@
 import re
-from typing import Any, Optional, Set
+from typing import TYPE_CHECKING, Any, List, Optional, Set
+
+if TYPE_CHECKING:  # pragma:nocover
+    from basil.syntax_loader.lalr import LALRConflict
 
 
 class LoadError(ValueError):
@@ -125,3 +128,13 @@ class NodeDefinitionUnknownNodeError(LoadError):
 
     def __str__(self) -> str:  # pragma:nocover
         return f"In parser definition for node {self.node_type}: Unknown token type {self.unknown_node_type}"
+
+
+class GrammarConflicts(LoadError):
+    def __init__(self, conflicts: List["LALRConflict"]) -> None:
+        self.conflicts = conflicts
+
+    def __str__(self) -> str:  # pragma:nocover
+        return "Syntax is not LALR(1):\n" + "\n".join(
+            str(conflict) for conflict in self.conflicts
+        )
@@ -0,0 +1,537 @@
+"""
+LALR(1) tables for the node types of a syntax, built from the parser graph.
+
+The node expressions are desugared into a BNF grammar:
+- a node type is a nonterminal with one production
+- a choice becomes a nonterminal with one production per alternative
+- an optional becomes a nonterminal with an empty production and one for its
+  expression
+- a repetition becomes a left recursive nonterminal
+
+Nonterminals that don't belong to a node type produce a list of children that
+is spliced into the node they are part of, which gives the same flattened Node
+trees as the parser combinators.
+
+Note the semantics differ from the parser combinators, which use ordered choice
+and greedy repetition. A grammar without conflicts is unambiguous, so every text
+the combinators parse gives the same tree. But the LALR(1) parser can parse
+texts the combinators reject, e.g. "x* x", and it can report errors at another
+token with other expected token types.
+"""
+
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+from basil.error_collector import ParseErrorCollector
+from basil.models import Node, ParserInput, Token
+from basil.parser import (
+    END_OF_FILE_ID,
+    FAILED,
+    BaseParser,
+    ChoiceParser,
+    ConcatenateParser,
+    NodeParser,
+    OptionalParser,
+    RepeatParser,
+    TokenParser,
+)
+
+# Terminal symbol used for the end of the file, can't clash with token types.
+END_OF_FILE = "$end"
+
+# Marker lookahead used to find propagated lookaheads, see _LALRBuilder.
+PROPAGATE = "#"
+
+# A production index and the position of the dot in it
+Item = Tuple[int, int]
+
+
+class Production:
+    def __init__(
+        self, lhs: str, rhs: Tuple[str, ...], owner: str, node_type: Optional[str]
+    ) -> None:
+        self.lhs = lhs
+        self.rhs = rhs
+
+        # Node type this production was desugared from
+        self.owner = owner
+
+        # Node type of the Node created when reducing, if any
+        self.node_type = node_type
+
+    def __repr__(self) -> str:  # pragma:nocover
+        return f"{self.lhs} -> {' '.join(self.rhs)}"
+
+
+class LALRConflict:
+    def __init__(self, kind: str, token_type: str, node_types: Set[str]) -> None:
+        # Either "shift/reduce" or "reduce/reduce"
+        self.kind = kind
+        self.token_type = token_type
+        self.node_types = node_types
+
+    def __str__(self) -> str:
+        token_type = self.token_type
+        if token_type == END_OF_FILE:
+            token_type = "end of file"
+
+        return f"{self.kind} conflict on {token_type} in node type(s) " + ", ".join(
+            sorted(self.node_types)
+        )
+
+
+def desugar(node_parsers: Dict[str, ConcatenateParser]) -> List[Production]:
+    """
+    Returns the BNF productions of all node types. For every node type NODE
+    there is a start production "^NODE -> NODE".
+    """
+
+    productions: List[Production] = []
+
+    for node_type in node_parsers:
+        productions.append(Production(f"^{node_type}", (node_type,), node_type, None))
+
+    for node_type, parser in node_parsers.items():
+        desugarer = _Desugarer(node_type, productions)
+        productions.append(
+            Production(node_type, desugarer.symbols(parser), node_type, node_type)
+        )
+
+    return productions
+
+
+class _Desugarer:
+    def __init__(self, node_type: str, productions: List[Production]) -> None:
+        self.node_type = node_type
+        self.productions = productions
+        self.nonterminal_count = 0
+
+    def _new_nonterminal(self) -> str:
+        # Node types don't contain "#", so this can't clash with them.
+        self.nonterminal_count += 1
+        return f"{self.node_type}#{self.nonterminal_count}"
+
+    def _add(self, lhs: str, rhs: Tuple[str, ...]) -> None:
+        self.productions.append(Production(lhs, rhs, self.node_type, None))
+
+    def symbols(self, parser: BaseParser) -> Tuple[str, ...]:
+        if isinstance(parser, ConcatenateParser):
+            symbols: Tuple[str, ...] = ()
+            for child in parser.parsers:
+                symbols += self.symbols(child)
+            return symbols
+
+        if isinstance(parser, TokenParser):
+            return (parser.token_type,)
+
+        if isinstance(parser, NodeParser):
+            return (parser.node_type,)
+
+        nonterminal = self._new_nonterminal()
+
+        if isinstance(parser, ChoiceParser):
+            for alternative in parser.parsers:
+                self._add(nonterminal, self.symbols(alternative))
+
+        elif isinstance(parser, OptionalParser):
+            self._add(nonterminal, ())
+            self._add(nonterminal, self.symbols(parser.inner))
+
+        elif isinstance(parser, RepeatParser):
+            inner_symbols = self.symbols(parser.inner)
+            self._add(nonterminal, inner_symbols * parser.min_repeats)
+            self._add(nonterminal, (nonterminal,) + inner_symbols)
+
+        else:  # pragma:nocover
+            raise NotImplementedError
+
+        return (nonterminal,)
+
+
+class LALRTables:
+    """
+    Action and goto tables of an LALR(1) parser for all node types.
+
+    If there are conflicts, the tables prefer shifting and the first production,
+    but FileParser refuses to use them.
+    """
+
+    def __init__(
+        self,
+        productions: List[Production],
+        start_states: Dict[str, int],
+        actions: List[Dict[int, int]],
+        gotos: List[Dict[str, int]],
+        conflicts: List[LALRConflict],
+    ) -> None:
+        self.productions = productions
+        self.start_states = start_states
+
+        # Per state, by lookahead token type id: a state to shift to if it's
+        # not negative, otherwise -1 - the index of the production to reduce.
+        self.actions = actions
+
+        # Per state, by nonterminal: the state after reducing to it
+        self.gotos = gotos
+
+        self.conflicts = conflicts
+
+        # Per state, the token types that have an action, see ParseErrorCollector
+        self.expected_token_masks = [
+            sum(1 << token_type_id for token_type_id in action if token_type_id >= 0)
+            for action in actions
+        ]
+
+        self.production_lengths = [len(production.rhs) for production in productions]
+
+    def parse(
+        self,
+        input: ParserInput,
+        node_type: str,
+        error_collector: ParseErrorCollector,
+    ) -> Tuple[Optional[Node], int]:
+        """
+        Parses all tokens of input as node_type in linear time. Returns the node
+        and the offset after it, or (None, FAILED) after registering an error.
+        """
+
+        type_ids = input.get_type_ids(error_collector.token_type_names)
+        tokens = input.tokens
+        token_count = len(type_ids)
+
+        actions = self.actions
+        gotos = self.gotos
+        productions = self.productions
+        production_lengths = self.production_lengths
+
+        state = self.start_states[node_type]
+        states = [state]
+
+        # Tokens, nodes and lists of children of desugared nonterminals
+        values: List[Token | Node | List[Token | Node]] = []
+
+        offset = 0
+        lookahead = type_ids[0] if token_count else END_OF_FILE_ID
+
+        while True:
+            action = actions[state].get(lookahead)
+
+            if action is None:
+                error_collector.register(offset, self.expected_token_masks[state])
+                return None, FAILED
+
+            if action >= 0:
+                values.append(tokens[offset])
+                state = action
+                states.append(state)
+
+                offset += 1
+                lookahead = type_ids[offset] if offset < token_count else END_OF_FILE_ID
+                continue
+
+            production_index = -1 - action
+            production = productions[production_index]
+
+            if production.lhs[0] == "^":
+                root = values[-1]
+                assert isinstance(root, Node)
+                return root, offset
+
+            length = production_lengths[production_index]
+            reduced = values[len(values) - length :]
+            del values[len(values) - length :]
+            del states[len(states) - length :]
+
+            # Left recursive repetitions keep extending the same list, so
+            # parsing stays linear.
+            children: List[Token | Node]
+            if reduced and isinstance(reduced[0], list):
+                children = reduced[0]
+                reduced = reduced[1:]
+            else:
+                children = []
+
+            for value in reduced:
+                if isinstance(value, list):
+                    children += value
+                else:
+                    children.append(value)
+
+            if production.node_type is not None:
+                values.append(Node(children, production.node_type))
+            else:
+                values.append(children)
+
+            state = gotos[states[-1]][production.lhs]
+            states.append(state)
+
+
+def build_lalr_tables(
+    node_parsers: Dict[str, ConcatenateParser], token_type_ids: Dict[str, int]
+) -> LALRTables:
+    productions = desugar(node_parsers)
+    return _LALRBuilder(productions, token_type_ids).build()
+
+
+class _LALRBuilder:
+    """
+    Builds the LR(0) automaton and computes LALR(1) lookaheads of its kernel
+    items by spontaneous generation and propagation, see the dragon book.
+    """
+
+    def __init__(
+        self, productions: List[Production], token_type_ids: Dict[str, int]
+    ) -> None:
+        self.productions = productions
+        self.token_type_ids = token_type_ids
+
+        self.productions_by_lhs: Dict[str, List[int]] = {}
+        for index, production in enumerate(productions):
+            self.productions_by_lhs.setdefault(production.lhs, []).append(index)
+
+        self.nullable: Set[str] = set()
+        self.first: Dict[str, Set[str]] = {
+            nonterminal: set() for nonterminal in self.productions_by_lhs
+        }
+        self._compute_first()
+
+        self.states: List[FrozenSet[Item]] = []
+        self.state_ids: Dict[FrozenSet[Item], int] = {}
+        self.transitions: List[Dict[str, int]] = []
+
+    def _is_nonterminal(self, symbol: str) -> bool:
+        return symbol in self.productions_by_lhs
+
+    def _compute_first(self) -> None:
+        changed = True
+
+        while changed:
+            changed = False
+
+            for production in self.productions:
+                first = self.first[production.lhs]
+                size = len(first)
+
+                for symbol in production.rhs:
+                    if not self._is_nonterminal(symbol):
+                        first.add(symbol)
+                        break
+
+                    first |= self.first[symbol]
+
+                    if symbol not in self.nullable:
+                        break
+                else:
+                    if production.lhs not in self.nullable:
+                        self.nullable.add(production.lhs)
+                        changed = True
+
+                if len(first) != size:
+                    changed = True
+
+    def _first_of_sequence(self, symbols: Tuple[str, ...], lookahead: str) -> Set[str]:
+        first: Set[str] = set()
+
+        for symbol in symbols:
+            if not self._is_nonterminal(symbol):
+                first.add(symbol)
+                return first
+
+            first |= self.first[symbol]
+
+            if symbol not in self.nullable:
+                return first
+
+        first.add(lookahead)
+        return first
+
+    def _closure(self, kernel: FrozenSet[Item]) -> Set[Item]:
+        items = set(kernel)
+        todo = list(kernel)
+
+        while todo:
+            production_index, dot = todo.pop()
+            rhs = self.productions[production_index].rhs
+
+            if dot < len(rhs) and self._is_nonterminal(rhs[dot]):
+                for index in self.productions_by_lhs[rhs[dot]]:
+                    if (index, 0) not in items:
+                        items.add((index, 0))
+                        todo.append((index, 0))
+
+        return items
+
+    def _closure_with_lookaheads(
+        self, items: Dict[Item, Set[str]]
+    ) -> Dict[Item, Set[str]]:
+        closure = {item: set(lookaheads) for item, lookaheads in items.items()}
+        todo = list(closure)
+
+        while todo:
+            item = todo.pop()
+            production_index, dot = item
+            rhs = self.productions[production_index].rhs
+
+            if dot >= len(rhs) or not self._is_nonterminal(rhs[dot]):
+                continue
+
+            new_lookaheads: Set[str] = set()
+            for lookahead in closure[item]:
+                new_lookaheads |= self._first_of_sequence(rhs[dot + 1 :], lookahead)
+
+            for index in self.productions_by_lhs[rhs[dot]]:
+                lookaheads = closure.setdefault((index, 0), set())
+
+                if not new_lookaheads <= lookaheads:
+                    lookaheads |= new_lookaheads
+                    todo.append((index, 0))
+
+        return closure
+
+    def _add_state(self, kernel: FrozenSet[Item]) -> int:
+        try:
+            return self.state_ids[kernel]
+        except KeyError:
+            pass
+
+        self.state_ids[kernel] = len(self.states)
+        self.states.append(kernel)
+        self.transitions.append({})
+        return len(self.states) - 1
+
+    def _build_lr0_automaton(self) -> Dict[str, int]:
+        start_states: Dict[str, int] = {}
+
+        for index, production in enumerate(self.productions):
+            if production.lhs[0] == "^":
+                start_states[production.owner] = self._add_state(
+                    frozenset([(index, 0)])
+                )
+
+        state = 0
+        while state < len(self.states):
+            kernels: Dict[str, Set[Item]] = {}
+
+            for production_index, dot in self._closure(self.states[state]):
+                rhs = self.productions[production_index].rhs
+                if dot < len(rhs):
+                    kernels.setdefault(rhs[dot], set()).add((production_index, dot + 1))
+
+            for symbol, kernel in sorted(kernels.items()):
+                self.transitions[state][symbol] = self._add_state(frozenset(kernel))
+
+            state += 1
+
+        return start_states
+
+    def _compute_lookaheads(self) -> List[Dict[Item, Set[str]]]:
+        lookaheads: List[Dict[Item, Set[str]]] = [
+            {item: set() for item in kernel} for kernel in self.states
+        ]
+        propagations: Dict[Tuple[int, Item], List[Tuple[int, Item]]] = {}
+
+        for state, kernel in enumerate(self.states):
+            for kernel_item in kernel:
+                if self.productions[kernel_item[0]].lhs[0] == "^":
+                    lookaheads[state][kernel_item].add(END_OF_FILE)
+
+                closure = self._closure_with_lookaheads({kernel_item: {PROPAGATE}})
+
+                for (production_index, dot), item_lookaheads in closure.items():
+                    rhs = self.productions[production_index].rhs
+                    if dot == len(rhs):
+                        continue
+
+                    target = self.transitions[state][rhs[dot]]
+                    target_item = (production_index, dot + 1)
+
+                    for lookahead in item_lookaheads:
+                        if lookahead == PROPAGATE:
+                            propagations.setdefault((state, kernel_item), []).append(
+                                (target, target_item)
+                            )
+                        else:
+                            lookaheads[target][target_item].add(lookahead)
+
+        changed = True
+        while changed:
+            changed = False
+
+            for (state, item), targets in propagations.items():
+                for target, target_item in targets:
+                    target_lookaheads = lookaheads[target][target_item]
+
+                    if not lookaheads[state][item] <= target_lookaheads:
+                        target_lookaheads |= lookaheads[state][item]
+                        changed = True
+
+        return lookaheads
+
+    def build(self) -> LALRTables:
+        start_states = self._build_lr0_automaton()
+        kernel_lookaheads = self._compute_lookaheads()
+
+        actions: List[Dict[int, int]] = []
+        gotos: List[Dict[str, int]] = []
+        conflicts: List[LALRConflict] = []
+
+        for state, transitions in enumerate(self.transitions):
+            items = self._closure_with_lookaheads(kernel_lookaheads[state])
+            state_actions, state_conflicts = self._build_actions(transitions, items)
+
+            actions.append(state_actions)
+            conflicts += state_conflicts
+            gotos.append(
+                {
+                    symbol: target
+                    for symbol, target in transitions.items()
+                    if self._is_nonterminal(symbol)
+                }
+            )
+
+        return LALRTables(self.productions, start_states, actions, gotos, conflicts)
+
+    def _terminal_id(self, terminal: str) -> int:
+        if terminal == END_OF_FILE:
+            return END_OF_FILE_ID
+        return self.token_type_ids[terminal]
+
+    def _build_actions(
+        self, transitions: Dict[str, int], items: Dict[Item, Set[str]]
+    ) -> Tuple[Dict[int, int], List[LALRConflict]]:
+        actions: Dict[int, int] = {}
+        conflicts: List[LALRConflict] = []
+
+        # Node types of the items shifting or reducing on a terminal
+        shifting: Dict[str, Set[str]] = {}
+        reducing: Dict[str, List[int]] = {}
+
+        for (production_index, dot), lookaheads in items.items():
+            production = self.productions[production_index]
+
+            if dot < len(production.rhs):
+                symbol = production.rhs[dot]
+                if not self._is_nonterminal(symbol):
+                    shifting.setdefault(symbol, set()).add(production.owner)
+            else:
+                for lookahead in lookaheads:
+                    reducing.setdefault(lookahead, []).append(production_index)
+
+        for terminal in shifting:
+            actions[self._terminal_id(terminal)] = transitions[terminal]
+
+        for terminal, production_indexes in reducing.items():
+            production_indexes.sort()
+            owners = {self.productions[index].owner for index in production_indexes}
+
+            if terminal in shifting:
+                conflicts.append(
+                    LALRConflict("shift/reduce", terminal, owners | shifting[terminal])
+                )
+                continue
+
+            if len(production_indexes) > 1:
+                conflicts.append(LALRConflict("reduce/reduce", terminal, owners))
+
+            actions[self._terminal_id(terminal)] = -1 - production_indexes[0]
+
+        return actions, conflicts
@@ -1,11 +1,13 @@
+import copy
 import itertools
 import json
 import re
-from typing import Any, Dict, List, Optional, Set, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
 
-from basil.error_collector import ParseErrorCollector
 from basil.models import Choice
 from basil.parser import (
+    END_OF_FILE_ID,
+    NEVER_MATCHES_LENGTH,
     BaseParser,
     ChoiceParser,
     ConcatenateParser,
@@ -14,6 +16,7 @@ from basil.parser import (
     RepeatParser,
     TokenParser,
 )
+from basil.syntax_loader.dfa import DFA, compile_dfa
 from basil.syntax_loader.exceptions import (
     BadNodeTypeName,
     BadTokenTypeName,
@@ -30,6 +33,7 @@ from basil.syntax_loader.exceptions import (
     UnknownFilteredTokenTypes,
     UnknownRootNode,
 )
+from basil.syntax_loader.lalr import LALRTables, build_lalr_tables
 
 NODE_TYPE_REGEX = re.compile("[A-Z][A-Z_]*")
 TOKEN_TYPE_REGEX = re.compile("[a-z][a-z_]*")
@@ -184,12 +188,70 @@ class SyntaxLoader:
 
         self.token_types = {item[0] for item in self.tokens}
 
-        self._check_values()
+        # Token types are numbered in priority order, parsers compare these ids.
+        self.token_type_names = [item[0] for item in self.tokens]
+        self.token_type_ids = {
+            token_type: token_type_id
+            for token_type_id, token_type in enumerate(self.token_type_names)
+        }
 
-        self.error_collector = ParseErrorCollector()
+        self._check_values()
 
         self.parsers = self._load_parsers()
 
+    def __getstate__(self) -> Dict[str, Any]:
+        # NodeParsers are pickled without inner, otherwise pickling recurses
+        # through all node types that refer to each other. __setstate__() sets
+        # inner again.
+        memo: Dict[int, Any] = {}
+
+        for parser in self._iter_parsers():
+            if isinstance(parser, NodeParser):
+                unlinked = copy.copy(parser)
+                unlinked.inner = None
+                memo[id(parser)] = unlinked
+
+        state = self.__dict__.copy()
+        state["parsers"] = copy.deepcopy(self.parsers, memo)
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+
+        for parser in self._iter_parsers():
+            if isinstance(parser, NodeParser):
+                parser.inner = self.parsers[parser.node_type]
+
+    def _iter_parsers(self) -> Iterator[BaseParser]:
+        """
+        Yields the parsers of all node types and their children, but not the
+        node types that NodeParsers refer to.
+        """
+
+        parsers: List[BaseParser] = list(self.parsers.values())
+
+        while parsers:
+            parser = parsers.pop()
+            yield parser
+
+            if isinstance(parser, (ChoiceParser, ConcatenateParser)):
+                parsers += parser.parsers
+            elif isinstance(parser, (OptionalParser, RepeatParser)):
+                parsers.append(parser.inner)
+
+    def compile_dfa(self) -> DFA:
+        """
+        Compiles all token regexes into one DFA, see compile_dfa() for details.
+        """
+        return compile_dfa(self.tokens)
+
+    def build_lalr_tables(self) -> LALRTables:
+        """
+        Builds LALR(1) parse tables for all node types. Conflicts are listed in
+        the conflicts field of the result, see basil.syntax_loader.lalr.
+        """
+        return build_lalr_tables(self.parsers, self.token_type_ids)
+
     def _load_parsers(self) -> Dict[str, ConcatenateParser]:
         node_parsers: Dict[str, ConcatenateParser] = {}
 
@@ -198,9 +260,10 @@ class SyntaxLoader:
                 node_type, node_value
             )
 
-        def update_parsers(parser: BaseParser) -> None:
-            parser.error_collector = self.error_collector
+        # All parser objects, children before their parents
+        all_parsers: List[BaseParser] = []
 
+        def update_parsers(parser: BaseParser) -> None:
             if isinstance(parser, NodeParser):
                 parser.inner = node_parsers[parser.node_type]
 
@@ -211,12 +274,197 @@ class SyntaxLoader:
             elif isinstance(parser, (OptionalParser, RepeatParser)):
                 update_parsers(parser.inner)
 
+            all_parsers.append(parser)
+
         for node_type, parser in node_parsers.items():
             update_parsers(parser)
             parser.node_type = node_type
 
+        self._analyze_parsers(all_parsers)
+        self._analyze_follow(node_parsers, all_parsers)
+
+        for analyzed_parser in all_parsers:
+            if isinstance(analyzed_parser, ChoiceParser):
+                analyzed_parser.build_dispatch()
+
+        # Whether the syntax never backtracks, see _is_decided_by_lookahead()
+        self.ll1 = all(
+            self._is_decided_by_lookahead(analyzed_parser)
+            for analyzed_parser in all_parsers
+        )
+
         return node_parsers
 
+    def _analyze_parsers(self, parsers: List[BaseParser]) -> None:
+        """
+        Computes the first token types, nullability and minimum length in tokens
+        of every parser. Node types can be recursive, so this repeats until
+        nothing changes.
+        """
+
+        changed = True
+
+        while changed:
+            changed = False
+
+            for parser in parsers:
+                first_token_types, nullable, min_length = self._analyze_parser(parser)
+
+                if (
+                    first_token_types != parser.first_token_types
+                    or nullable != parser.nullable
+                    or min_length != parser.min_length
+                ):
+                    parser.first_token_types = first_token_types
+                    parser.nullable = nullable
+                    parser.min_length = min_length
+                    changed = True
+
+        for parser in parsers:
+            parser.first_token_type_ids = {
+                self.token_type_ids[token_type]
+                for token_type in parser.first_token_types
+            }
+            parser.first_token_mask = sum(
+                1 << token_type_id for token_type_id in parser.first_token_type_ids
+            )
+
+    def _analyze_follow(
+        self, node_parsers: Dict[str, ConcatenateParser], parsers: List[BaseParser]
+    ) -> None:
+        """
+        Computes the token type ids that can follow every parser. Any node type
+        can be parsed as root, so end of file can follow all of them.
+
+        The follow of a parser only flows to its children, so a parser is only
+        visited again when its follow grew. Parsers are listed children first,
+        so popping from the end visits parents first.
+        """
+
+        for node_parser in node_parsers.values():
+            node_parser.follow_token_type_ids.add(END_OF_FILE_ID)
+
+        pending = list(parsers)
+        pending_ids = {id(parser) for parser in pending}
+
+        while pending:
+            parser = pending.pop()
+            pending_ids.discard(id(parser))
+
+            for child, follow in self._follow_of_children(parser, node_parsers):
+                if not follow <= child.follow_token_type_ids:
+                    child.follow_token_type_ids |= follow
+
+                    if id(child) not in pending_ids:
+                        pending.append(child)
+                        pending_ids.add(id(child))
+
+    def _follow_of_children(
+        self, parser: BaseParser, node_parsers: Dict[str, ConcatenateParser]
+    ) -> List[Tuple[BaseParser, Set[int]]]:
+        follow = parser.follow_token_type_ids
+
+        if isinstance(parser, NodeParser):
+            return [(node_parsers[parser.node_type], follow)]
+
+        if isinstance(parser, ConcatenateParser):
+            children_follow: List[Tuple[BaseParser, Set[int]]] = []
+            rest_follow = follow
+
+            for child in reversed(parser.parsers):
+                children_follow.append((child, rest_follow))
+
+                if child.nullable:
+                    rest_follow = rest_follow | child.first_token_type_ids
+                else:
+                    rest_follow = child.first_token_type_ids
+
+            return children_follow
+
+        if isinstance(parser, ChoiceParser):
+            return [(child, follow) for child in parser.parsers]
+
+        if isinstance(parser, OptionalParser):
+            return [(parser.inner, follow)]
+
+        if isinstance(parser, RepeatParser):
+            return [(parser.inner, follow | parser.inner.first_token_type_ids)]
+
+        return []
+
+    def _is_decided_by_lookahead(self, parser: BaseParser) -> bool:
+        """
+        Whether parser picks its way with the next token only: a choice has at
+        most one alternative per token type, and an optional or repetition can
+        tell from the next token whether its inner parser or what follows it
+        should parse. If this holds for all parsers, a failure always fails the
+        whole parse.
+        """
+
+        if isinstance(parser, ChoiceParser):
+            return all(
+                len(alternatives) <= 1
+                for alternatives, _ in [
+                    *parser.dispatch.values(),
+                    parser.default_dispatch,
+                ]
+            )
+
+        if isinstance(parser, (OptionalParser, RepeatParser)):
+            return not parser.inner.nullable and not (
+                parser.inner.first_token_type_ids & parser.follow_token_type_ids
+            )
+
+        return True
+
+    def _analyze_parser(self, parser: BaseParser) -> Tuple[Set[str], bool, int]:
+        if isinstance(parser, TokenParser):
+            return {parser.token_type}, False, 1
+
+        if isinstance(parser, NodeParser):
+            assert parser.inner
+            inner = parser.inner
+            return set(inner.first_token_types), inner.nullable, inner.min_length
+
+        if isinstance(parser, ConcatenateParser):
+            first_token_types: Set[str] = set()
+            nullable = True
+
+            for child in parser.parsers:
+                first_token_types |= child.first_token_types
+                if not child.nullable:
+                    nullable = False
+                    break
+
+            min_length = sum(child.min_length for child in parser.parsers)
+            return first_token_types, nullable, min(min_length, NEVER_MATCHES_LENGTH)
+
+        if isinstance(parser, ChoiceParser):
+            first_token_types = set()
+            for child in parser.parsers:
+                first_token_types |= child.first_token_types
+
+            return (
+                first_token_types,
+                any(child.nullable for child in parser.parsers),
+                min(child.min_length for child in parser.parsers),
+            )
+
+        if isinstance(parser, OptionalParser):
+            return set(parser.inner.first_token_types), True, 0
+
+        if isinstance(parser, RepeatParser):
+            inner = parser.inner
+            min_length = inner.min_length * parser.min_repeats
+
+            return (
+                set(inner.first_token_types),
+                parser.min_repeats == 0 or inner.nullable,
+                min(min_length, NEVER_MATCHES_LENGTH),
+            )
+
+        raise NotImplementedError  # pragma:nocover # Unexpected parser type
+
     def _tokenize_parser_definition(
         self, node_type: str, node_value: str
     ) -> ConcatenateParser:
@@ -257,7 +505,9 @@ class SyntaxLoader:
             segment_type, segment_value = segments[offset]
 
             if segment_type == "token":
-                parser_or_choice_list.append(TokenParser(segment_value))
+                parser_or_choice_list.append(
+                    TokenParser(segment_value, self.token_type_ids[segment_value])
+                )
                 offset += 1
 
             elif segment_type == "node":
@@ -0,0 +1,238 @@
+import re
+from pathlib import Path
+from typing import Iterator, List, Optional, Set, Tuple
+
+from basil.exceptions import TokenizerException
+from basil.models import Position, Token
+from basil.syntax_loader.dfa import DFA
+
+# Token regexes that use backreferences or conditionals depend on group numbers,
+# which shift when the regexes are combined into one alternation.
+GROUP_REFERENCE_REGEX = re.compile(r"\\[1-9]|\(\?P=|\(\?\(")
+
+
+class BaseTokenizer:
+    def __init__(self, token_regexes: List[Tuple[str, re.Pattern[str]]]) -> None:
+        self.token_regexes = token_regexes
+
+    def scan(self, text: str, offset: int = 0) -> Iterator[Tuple[str, int, int]]:
+        """
+        Yields (token_type, start, end) for consecutive tokens starting at offset.
+        Stops at the end of text or at the first offset where no token matches.
+        """
+        raise NotImplementedError  # pragma:nocover # Implemented in subclasses.
+
+
+class RegexTokenizer(BaseTokenizer):
+    """
+    Tries every token regex in priority order at every offset.
+    """
+
+    def scan(self, text: str, offset: int = 0) -> Iterator[Tuple[str, int, int]]:
+        while offset < len(text):
+            for token_type, regex in self.token_regexes:
+                match = regex.match(text, offset)
+
+                if match:
+                    break
+            else:
+                return
+
+            end = match.end()
+            yield token_type, offset, end
+            offset = end
+
+
+class MasterRegexTokenizer(BaseTokenizer):
+    """
+    Combines all token regexes into one alternation of named groups, so every
+    offset needs one regex match regardless of the number of token types.
+
+    Alternatives of a regex are tried in order, so the priority order of the
+    token regexes is preserved.
+    """
+
+    def __init__(
+        self,
+        token_regexes: List[Tuple[str, re.Pattern[str]]],
+        master_regex: re.Pattern[str],
+    ) -> None:
+        super().__init__(token_regexes)
+        self.master_regex = master_regex
+
+    @classmethod
+    def build(
+        cls, token_regexes: List[Tuple[str, re.Pattern[str]]]
+    ) -> Optional["MasterRegexTokenizer"]:
+        """
+        Returns None if the token regexes can't be combined without changing the
+        tokens they produce.
+        """
+
+        alternatives: List[str] = []
+
+        for token_type, regex in token_regexes:
+            if regex.groupindex or GROUP_REFERENCE_REGEX.search(regex.pattern):
+                return None
+
+            if regex.flags != re.compile("").flags:
+                return None
+
+            # Token types are valid group names, see TOKEN_TYPE_REGEX
+            alternatives.append(f"(?P<{token_type}>{regex.pattern})")
+
+        try:
+            master_regex = re.compile("|".join(alternatives))
+        except re.error:
+            # For example inline global flags in one of the token regexes
+            return None
+
+        return cls(token_regexes, master_regex)
+
+    def scan(self, text: str, offset: int = 0) -> Iterator[Tuple[str, int, int]]:
+        for match in self.master_regex.finditer(text, offset):
+            if match.start() != offset:
+                # Characters were skipped, so no token matched at offset.
+                return
+
+            end = match.end()
+            token_type = match.lastgroup
+            assert token_type
+
+            yield token_type, offset, end
+            offset = end
+
+            if offset == len(text):
+                return
+
+
+def build_tokenizer(token_regexes: List[Tuple[str, re.Pattern[str]]]) -> BaseTokenizer:
+    """
+    Returns the fastest tokenizer that produces the same tokens as RegexTokenizer.
+    """
+
+    master_tokenizer = MasterRegexTokenizer.build(token_regexes)
+
+    if master_tokenizer:
+        return master_tokenizer
+
+    return RegexTokenizer(token_regexes)
+
+
+class StreamTokenizer:
+    """
+    Tokenizes text that is fed in chunks, so the whole input never has to be in
+    memory at once.
+
+    A token is only returned once the stream ended, or once its match does not
+    reach the end of the buffered text and at least `lookahead` characters follow
+    its start. Tokens that reach the end of the buffer are re-matched once more
+    text was fed, so matches crossing a chunk boundary are found. Memory use is
+    bounded by `lookahead` plus the length of the longest token.
+
+    Text where no token matches is only reported when the stream ends, because
+    a token longer than `lookahead` may still be completed by the next chunk.
+    So invalid text is buffered up to the end of the stream.
+    """
+
+    def __init__(
+        self,
+        tokenizer: BaseTokenizer,
+        file: Path,
+        filtered_token_types: Set[str],
+        lookahead: int,
+    ) -> None:
+        self.tokenizer = tokenizer
+        self.file = file
+        self.filtered_token_types = filtered_token_types
+        self.lookahead = lookahead
+
+        self.buffer = ""
+        self.buffer_offset = 0
+        self.line = 1
+        self.column = 1
+
+    def feed(self, chunk: str) -> List[Token]:
+        self.buffer += chunk
+        return self._scan(final=False)
+
+    def close(self) -> List[Token]:
+        return self._scan(final=True)
+
+    def _scan(self, final: bool) -> List[Token]:
+        buffer = self.buffer
+        tokens: List[Token] = []
+        offset = 0
+
+        for token_type, start, end in self.tokenizer.scan(buffer):
+            if not final and (
+                end == len(buffer) or len(buffer) - start < self.lookahead
+            ):
+                break
+
+            value = buffer[start:end]
+
+            if token_type not in self.filtered_token_types:
+                position = Position(self.file, self.line, self.column)
+                tokens.append(
+                    Token(
+                        value, token_type, position, offset=self.buffer_offset + start
+                    )
+                )
+
+            newlines = value.count("\n")
+            if newlines:
+                self.line += newlines
+                self.column = len(value) - value.rfind("\n")
+            else:
+                self.column += len(value)
+
+            offset = end
+        else:
+            if final and offset < len(buffer):
+                raise TokenizerException(Position(self.file, self.line, self.column))
+
+        self.buffer = buffer[offset:]
+        self.buffer_offset += offset
+        return tokens
+
+
+class DFATokenizer(BaseTokenizer):
+    """
+    Matches all token types at once with a DFA compiled from the token regexes.
+    See DFA.match for how the token type and length are chosen.
+
+    Token types the DFA doesn't support are matched with their regex, but only
+    if they have a higher priority than the token type found by the DFA.
+    """
+
+    def __init__(
+        self, token_regexes: List[Tuple[str, re.Pattern[str]]], dfa: DFA
+    ) -> None:
+        super().__init__(token_regexes)
+        self.dfa = dfa
+        self.fallback_regexes = [
+            (token_id, regex)
+            for token_id, (token_type, regex) in enumerate(token_regexes)
+            if token_type in dfa.unsupported_token_types
+        ]
+
+    def scan(self, text: str, offset: int = 0) -> Iterator[Tuple[str, int, int]]:
+        while offset < len(text):
+            token_id, end = self.dfa.match(text, offset)
+
+            for fallback_token_id, regex in self.fallback_regexes:
+                if fallback_token_id > token_id:
+                    break
+
+                match = regex.match(text, offset)
+
+                if match:
+                    token_id, end = fallback_token_id, match.end()
+                    break
+
+            if end < 0:
+                return
+
+            yield self.token_regexes[token_id][0], offset, end
+            offset = end
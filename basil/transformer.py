@@ -0,0 +1,172 @@
+from typing import Any, Callable, Dict, Generic, Iterable, List, Optional, TypeVar
+
+from basil.models import EnterEvent, Event, ExitEvent, Node, Token, TokenEvent
+
+T = TypeVar("T")
+
+NodeHandler = Callable[[List[T | Token]], T]
+TokenHandler = Callable[[Token], T | Token]
+
+
+class Transformer(Generic[T]):
+    """
+    Transforms a Node tree into any type, with handlers registered per node type
+    and per token type. The tree is walked with an explicit stack, so deeply
+    nested trees don't hit the recursion limit.
+
+    Node handlers are called with the transformed children of the node. Token
+    handlers are called with the token. Tokens of types without a handler are
+    passed on as is. Nodes of types without a handler are passed to
+    node_transformer, or raise ValueError if it is not set.
+
+    A handler registered with register_node_without_children() is called with
+    the untransformed Node, its subtree is not walked.
+    """
+
+    def __init__(
+        self,
+        node_transformer: Optional[Callable[[str, List[T | Token]], T]] = None,
+        token_transformer: Optional[TokenHandler[T]] = None,
+    ) -> None:
+        """
+        Optionally, node_transformer and token_transformer are called for types
+        without a registered handler, like in FileParser.parse_text_and_transform
+        """
+
+        self.node_transformer = node_transformer
+        self.token_transformer = token_transformer
+
+        self.node_handlers: Dict[str, NodeHandler[T]] = {}
+        self.node_handlers_without_children: Dict[str, Callable[[Node], T]] = {}
+        self.token_handlers: Dict[str, TokenHandler[T]] = {}
+
+    def register_node(self, node_type: str, handler: NodeHandler[T]) -> None:
+        self.node_handlers[node_type] = handler
+
+    def register_node_without_children(
+        self, node_type: str, handler: Callable[[Node], T]
+    ) -> None:
+        self.node_handlers_without_children[node_type] = handler
+
+    def register_token(self, token_type: str, handler: TokenHandler[T]) -> None:
+        self.token_handlers[token_type] = handler
+
+    def transform(self, node: Node) -> T:
+        if node.type in self.node_handlers_without_children:
+            return self.node_handlers_without_children[node.type](node)
+
+        # Nodes that are being transformed, the index of their next child and
+        # their transformed children
+        nodes: List[Node] = [node]
+        indexes: List[int] = [0]
+        transformed_children: List[List[T | Token]] = [[]]
+
+        token_handlers = self.token_handlers
+        token_transformer = self.token_transformer
+        handlers_without_children = self.node_handlers_without_children
+
+        while True:
+            node = nodes[-1]
+            children = node.children
+            transformed = transformed_children[-1]
+            index = indexes[-1]
+
+            while index < len(children):
+                child = children[index]
+                index += 1
+
+                if isinstance(child, Token):
+                    token_handler = token_handlers.get(child.type, token_transformer)
+
+                    if token_handler is None:
+                        transformed.append(child)
+                    else:
+                        transformed.append(token_handler(child))
+
+                elif child.type in handlers_without_children:
+                    transformed.append(handlers_without_children[child.type](child))
+
+                else:
+                    # Transform the child node first, then continue here.
+                    indexes[-1] = index
+                    nodes.append(child)
+                    indexes.append(0)
+                    transformed_children.append([])
+                    break
+            else:
+                nodes.pop()
+                indexes.pop()
+                transformed_children.pop()
+                transformed_node = self._transform_node(node.type, transformed)
+
+                if not nodes:
+                    return transformed_node
+
+                transformed_children[-1].append(transformed_node)
+
+    def transform_events(self, events: Iterable[Event]) -> T:
+        """
+        Like transform(), but transforms the events of FileParser.iter_events()
+        as they come, without building the Node tree. Only the subtrees of nodes
+        registered with register_node_without_children() are built.
+        """
+
+        # Children of the nodes that are entered but not exited
+        children_stack: List[List[Any]] = []
+        transformed_root: List[T] = []
+
+        # Number of entered nodes inside a node without children
+        untransformed_depth = 0
+
+        for event in events:
+            if isinstance(event, TokenEvent):
+                token = event.token
+                token_handler = self.token_handlers.get(
+                    token.type, self.token_transformer
+                )
+
+                if untransformed_depth or token_handler is None:
+                    children_stack[-1].append(token)
+                else:
+                    children_stack[-1].append(token_handler(token))
+
+            elif isinstance(event, EnterEvent):
+                children_stack.append([])
+
+                if (
+                    untransformed_depth
+                    or event.node_type in self.node_handlers_without_children
+                ):
+                    untransformed_depth += 1
+
+            else:
+                assert isinstance(event, ExitEvent)
+                children = children_stack.pop()
+                transformed: Any
+
+                if untransformed_depth:
+                    untransformed_depth -= 1
+                    transformed = Node(children, event.node_type)
+
+                    if not untransformed_depth:
+                        handler = self.node_handlers_without_children[event.node_type]
+                        transformed = handler(transformed)
+                else:
+                    transformed = self._transform_node(event.node_type, children)
+
+                if children_stack:
+                    children_stack[-1].append(transformed)
+                else:
+                    transformed_root.append(transformed)
+
+        return transformed_root[0]
+
+    def _transform_node(self, node_type: str, children: List[T | Token]) -> T:
+        try:
+            handler = self.node_handlers[node_type]
+        except KeyError:
+            if self.node_transformer is None:
+                raise ValueError(f"No handler for node type {node_type}")
+            return self.node_transformer(node_type, children)
+
+        return handler(children)
@@ -0,0 +1,98 @@
+"""
+Benchmarks tokenize_text, parse_text, InnerNode.flatten and
+parse_text_and_transform for several syntaxes at growing input sizes.
+
+Usage:
+    python -m benchmarks run [--sizes 1KB 10KB] [--grammars json ini] [-o results.json]
+    python -m benchmarks compare baseline.json results.json [--threshold 0.1]
+
+compare exits with status 1 if a result regressed against the baseline.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+from benchmarks.grammars import GRAMMARS
+from benchmarks.runner import compare, parse_size, run_benchmarks
+
+DEFAULT_SIZES = ["1KB", "10KB", "100KB", "1MB", "10MB"]
+
+
+def run(parsed_args: argparse.Namespace) -> int:
+    grammars = [GRAMMARS[name] for name in parsed_args.grammars]
+    sizes = [parse_size(size) for size in parsed_args.sizes]
+
+    benchmarks = run_benchmarks(
+        grammars, sizes, parsed_args.repeat, parsed_args.lexer, parsed_args.engine
+    )
+
+    for result in benchmarks["results"]:
+        print(
+            f"{result['grammar']:>10} {result['stage']:>28} {result['size']:>6}"
+            + f" {result['seconds']:10.4f}s {result['tokens_per_second']:12.0f} tokens/s"
+            + f" {result['mb_per_second']:8.3f} MB/s"
+            + f" {result['peak_memory'] // 1024:8}KB peak"
+        )
+
+    if parsed_args.output:
+        parsed_args.output.write_text(json.dumps(benchmarks, indent=4) + "\n")
+
+    return 0
+
+
+def compare_files(parsed_args: argparse.Namespace) -> int:
+    baseline = json.loads(parsed_args.baseline.read_text())
+    current = json.loads(parsed_args.current.read_text())
+
+    regressions = compare(baseline, current, parsed_args.threshold)
+
+    for regression in regressions:
+        print(regression)
+
+    if regressions:
+        return 1
+
+    print("No regressions")
+    return 0
+
+
+def main(args: Optional[List[str]] = None) -> int:
+    arg_parser = argparse.ArgumentParser(
+        description="Benchmark basil on generated texts."
+    )
+    subparsers = arg_parser.add_subparsers(required=True)
+
+    run_parser = subparsers.add_parser("run", help="run benchmarks")
+    run_parser.add_argument("--sizes", nargs="+", default=DEFAULT_SIZES)
+    run_parser.add_argument(
+        "--grammars", nargs="+", choices=list(GRAMMARS), default=list(GRAMMARS)
+    )
+    run_parser.add_argument("--repeat", type=int, default=3)
+    run_parser.add_argument("--lexer", default="regex")
+    run_parser.add_argument("--engine", default="recursive")
+    run_parser.add_argument("-o", "--output", type=Path)
+    run_parser.set_defaults(command=run)
+
+    compare_parser = subparsers.add_parser(
+        "compare", help="flag regressions against a baseline"
+    )
+    compare_parser.add_argument("baseline", type=Path)
+    compare_parser.add_argument("current", type=Path)
+    compare_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="relative slowdown or memory growth that counts as a regression",
+    )
+    compare_parser.set_defaults(command=compare_files)
+
+    parsed_args = arg_parser.parse_args(args)
+    status: int = parsed_args.command(parsed_args)
+    return status
+
+
+if __name__ == "__main__":  # pragma:nocover
+    sys.exit(main())
@@ -0,0 +1,129 @@
+from pathlib import Path
+from random import Random
+from typing import Callable, Dict, List
+
+SYNTAXES_DIR = Path(__file__).parent / "syntaxes"
+JSON_SYNTAX_FILE = (
+    Path(__file__).parent.parent / "tests" / "json_parser" / "syntax.json"
+)
+
+# Deep enough to stress recursion, shallow enough for the recursive engine
+NESTING_DEPTH = 50
+
+WORDS = ["alpha", "beta", "gamma", "delta", "epsilon", "zeta", "eta", "theta"]
+
+
+class Grammar:
+    """
+    A syntax to benchmark and a generator of texts in it. The generator returns
+    a text of at least the requested size in bytes, the same one every time.
+
+    Appending invalid_suffix makes the text fail to parse at its end.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        syntax_file: Path,
+        node_type: str,
+        generate_item: Callable[[Random], str],
+        invalid_suffix: str,
+        separator: str = "",
+        prefix: str = "",
+        suffix: str = "",
+    ) -> None:
+        self.name = name
+        self.syntax_file = syntax_file
+        self.node_type = node_type
+        self.generate_item = generate_item
+        self.invalid_suffix = invalid_suffix
+        self.separator = separator
+        self.prefix = prefix
+        self.suffix = suffix
+
+    def generate(self, size: int) -> str:
+        random = Random(size)
+        items: List[str] = []
+        length = len(self.prefix) + len(self.suffix)
+
+        while length < size:
+            item = self.generate_item(random)
+            items.append(item)
+            length += len(item) + len(self.separator)
+
+        return self.prefix + self.separator.join(items) + self.suffix
+
+
+def generate_json_item(random: Random) -> str:
+    values = ", ".join(str(random.randint(-1000, 1000)) for _ in range(5))
+    word = random.choice(WORDS)
+    flag = random.choice(["true", "false", "null"])
+    return f'{{"name": "{word}", "flag": {flag}, "values": [{values}], "child": {{}}}}'
+
+
+def generate_expression_item(random: Random) -> str:
+    def expression(depth: int) -> str:
+        if depth == 0 or random.random() < 0.3:
+            return random.choice([str(random.randint(0, 999)), random.choice(WORDS)])
+
+        left = expression(depth - 1)
+        right = expression(depth - 1)
+        operator = random.choice("+-*/")
+
+        if random.random() < 0.3:
+            return f"({left} {operator} {right})"
+
+        return f"{left} {operator} {right}"
+
+    return f"{random.choice(WORDS)} = {expression(4)};\n"
+
+
+def generate_ini_item(random: Random) -> str:
+    lines = [f"[{random.choice(WORDS)}.{random.randint(0, 99)}]"]
+
+    for _ in range(random.randint(1, 6)):
+        key = random.choice(WORDS)
+        value = random.choice(
+            [str(random.randint(-99, 99)), f'"{random.choice(WORDS)} value"', key]
+        )
+        lines.append(f"{key} = {value}")
+
+    lines.append("; comment")
+    return "\n".join(lines) + "\n\n"
+
+
+def generate_nested_item(random: Random) -> str:
+    text = random.choice(WORDS)
+
+    for _ in range(NESTING_DEPTH):
+        if random.random() < 0.5:
+            text = f"({text})"
+        else:
+            text = f"({random.choice(WORDS)}, {text})"
+
+    return text + "\n"
+
+
+GRAMMARS: Dict[str, Grammar] = {
+    grammar.name: grammar
+    for grammar in [
+        Grammar(
+            "json", JSON_SYNTAX_FILE, "JSON", generate_json_item, ",", ",\n", "[", "]"
+        ),
+        Grammar(
+            "expression",
+            SYNTAXES_DIR / "expression.json",
+            "PROGRAM",
+            generate_expression_item,
+            "=",
+        ),
+        Grammar("ini", SYNTAXES_DIR / "ini.json", "FILE", generate_ini_item, "="),
+        Grammar(
+            "nested",
+            SYNTAXES_DIR / "nested.json",
+            "DOCUMENT",
+            generate_nested_item,
+            ",",
+        ),
+    ]
+}
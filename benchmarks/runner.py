@@ -0,0 +1,223 @@
+import platform
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+from basil.exceptions import ParseError
+from basil.file_parser import FileParser
+from basil.models import InnerNode, Node, Token
+from benchmarks.grammars import Grammar
+
+STAGES = [
+    "tokenize_text",
+    "parse_text",
+    "parse_text_two_phase",
+    "parse_text_invalid",
+    "parse_text_two_phase_invalid",
+    "flatten",
+    "parse_text_and_transform",
+]
+
+SIZE_UNITS = {"KB": 1024, "MB": 1024 * 1024, "B": 1}
+
+
+def parse_size(size: str) -> int:
+    """
+    Parses sizes like "1KB", "10MB" or "512".
+    """
+
+    normalized = size.strip().upper()
+
+    for unit, factor in SIZE_UNITS.items():
+        if normalized.endswith(unit):
+            return int(float(normalized[: -len(unit)]) * factor)
+
+    return int(normalized)
+
+
+def format_size(size: int) -> str:
+    for unit, factor in SIZE_UNITS.items():
+        if size >= factor and size % factor == 0:
+            return f"{size // factor}{unit}"
+
+    return f"{size}B"  # pragma:nocover
+
+
+def to_inner_node(node: Node) -> InnerNode:
+    """
+    Wraps every child in an InnerNode without a type, as parsers built trees
+    before they were flattened, so flatten() has work to do.
+    """
+
+    children: List[Token | InnerNode] = []
+
+    for child in node.children:
+        if isinstance(child, Token):
+            children.append(InnerNode([child]))
+        else:
+            children.append(InnerNode([to_inner_node(child)]))
+
+    return InnerNode(children, node.type)
+
+
+def count_node(node_type: str, children: List[int | Token]) -> int:
+    return sum(child for child in children if isinstance(child, int)) + 1
+
+
+def count_token(token: Token) -> int | Token:
+    return 1
+
+
+def parse_invalid(
+    file_parser: FileParser, text: str, node_type: str, two_phase: bool
+) -> None:
+    try:
+        file_parser.parse_text(text, node_type=node_type, two_phase=two_phase)
+    except ParseError:
+        return
+
+    raise ValueError("Text was expected to fail parsing")  # pragma:nocover
+
+
+def measure(function: Callable[[], Any], repeat: int) -> Tuple[float, int]:
+    """
+    Returns the fastest of repeat runs in seconds and the peak memory use in
+    bytes of one more run, traced separately because tracing slows it down.
+    """
+
+    seconds = float("inf")
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        seconds = min(seconds, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        function()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return seconds, peak_memory
+
+
+def run_grammar(
+    grammar: Grammar, sizes: Iterable[int], repeat: int, **file_parser_kwargs: Any
+) -> List[Dict[str, Any]]:
+    file_parser = FileParser(grammar.syntax_file, **file_parser_kwargs)
+    node_type = grammar.node_type
+    results: List[Dict[str, Any]] = []
+
+    for size in sizes:
+        text = grammar.generate(size)
+        invalid_text = text + grammar.invalid_suffix
+        token_count = len(file_parser.tokenize_text_to_array(text))
+        inner_node = to_inner_node(file_parser.parse_text(text, node_type=node_type))
+
+        stages: Dict[str, Callable[[], Any]] = {
+            "tokenize_text": lambda: file_parser.tokenize_text(text),
+            "parse_text": lambda: file_parser.parse_text(text, node_type=node_type),
+            "parse_text_two_phase": lambda: file_parser.parse_text(
+                text, node_type=node_type, two_phase=True
+            ),
+            # Two-phase parsing parses a text with errors twice.
+            "parse_text_invalid": lambda: parse_invalid(
+                file_parser, invalid_text, node_type, two_phase=False
+            ),
+            "parse_text_two_phase_invalid": lambda: parse_invalid(
+                file_parser, invalid_text, node_type, two_phase=True
+            ),
+            "flatten": inner_node.flatten,
+            "parse_text_and_transform": lambda: file_parser.parse_text_and_transform(
+                text,
+                node_type=node_type,
+                node_transformer=count_node,
+                token_transformer=count_token,
+            ),
+        }
+
+        for stage in STAGES:
+            seconds, peak_memory = measure(stages[stage], repeat)
+            text_bytes = len(text.encode())
+
+            results.append(
+                {
+                    "grammar": grammar.name,
+                    "stage": stage,
+                    "size": format_size(size),
+                    "bytes": text_bytes,
+                    "tokens": token_count,
+                    "seconds": seconds,
+                    "tokens_per_second": token_count / seconds,
+                    "mb_per_second": text_bytes / (1024 * 1024) / seconds,
+                    "peak_memory": peak_memory,
+                }
+            )
+
+    return results
+
+
+def run_benchmarks(
+    grammars: Iterable[Grammar],
+    sizes: Iterable[int],
+    repeat: int = 3,
+    lexer: str = "regex",
+    engine: str = "recursive",
+) -> Dict[str, Any]:
+    """
+    Times each stage separately for every grammar and size. parse_text and
+    parse_text_and_transform include tokenizing, flatten only flattens a tree
+    that was built before. The parse_text stages run with and without
+    two_phase, on the text and on the text with an error at its end.
+    """
+
+    sizes = list(sizes)
+    results: List[Dict[str, Any]] = []
+
+    for grammar in grammars:
+        results += run_grammar(grammar, sizes, repeat, lexer=lexer, engine=engine)
+
+    return {
+        "python": platform.python_version(),
+        "lexer": lexer,
+        "engine": engine,
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def result_key(result: Dict[str, Any]) -> Tuple[str, str, str]:
+    return result["grammar"], result["stage"], result["size"]
+
+
+def compare(
+    baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = 0.1
+) -> List[str]:
+    """
+    Returns a line for every result that is more than threshold slower or uses
+    more than threshold more peak memory than in the baseline. Results that are
+    missing in either are skipped.
+    """
+
+    baseline_results = {result_key(result): result for result in baseline["results"]}
+    regressions: List[str] = []
+
+    for result in current["results"]:
+        baseline_result = baseline_results.get(result_key(result))
+
+        if baseline_result is None:
+            continue
+
+        name = " ".join(result_key(result))
+
+        for metric in ["seconds", "peak_memory"]:
+            old = baseline_result[metric]
+            new = result[metric]
+
+            if old and new > old * (1 + threshold):
+                regressions.append(
+                    f"{name}: {metric} {old:.6g} -> {new:.6g} ({new / old - 1:+.0%})"
+                )
+
+    return regressions
@@ -131,3 +131,28 @@ def basil_json_loads(text: str) -> TRANSFORMED_TYPE:
 )
 def test_json_transformed(text: str) -> None:
     assert basil_json_loads(text) == json.loads(text)
+
+
+@pytest.mark.parametrize(
+    ["text"],
+    [
+        ("null",),
+        ("-123",),
+        ("[]",),
+        ("[1,2,3]",),
+        ("[null,false,{}]",),
+        ('{"foo": [false, null, 123, {"bar": [], "baz": {}}]}',),
+    ],
+)
+def test_json_transformed_fused(text: str) -> None:
+    file_parser = FileParser(SYNTAX_JSON)
+
+    transformed = file_parser.parse_text_and_transform(
+        text,
+        node_type="JSON",
+        node_transformer=node_transformer,
+        token_transformer=token_transformer,
+        fused=True,
+    )
+
+    assert transformed == json.loads(text)
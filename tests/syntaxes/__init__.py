@@ -0,0 +1,41 @@
+# Uses repetitions with a minimum and nested choices, which the JSON syntax
+# doesn't have.
+STATEMENTS_SYNTAX = {
+    "filtered_tokens": ["whitespace"],
+    "keyword_tokens": {"print_": "print", "let": "let"},
+    "nodes": {
+        "PROGRAM": "STATEMENT+",
+        "STATEMENT": "(PRINT | LET) semicolon",
+        "PRINT": "print_ (identifier | number)+",
+        "LET": "let identifier equals (number | (identifier (plus number)?))",
+    },
+    "regular_tokens": {
+        "equals": "=",
+        "identifier": "[a-z_]+",
+        "number": "[0-9]+",
+        "plus": "\\+",
+        "semicolon": ";",
+        "whitespace": "\\s+",
+    },
+    "root_node": "PROGRAM",
+}
+
+# Every alternative of EXPR starts with TERM, so without memoization parsing
+# nested brackets takes time exponential in the nesting depth.
+EXPRESSION_SYNTAX = {
+    "filtered_tokens": ["whitespace"],
+    "keyword_tokens": {},
+    "nodes": {
+        "EXPR": "(TERM plus EXPR) | (TERM minus EXPR) | TERM",
+        "TERM": "(open EXPR close) | number",
+    },
+    "regular_tokens": {
+        "close": "\\)",
+        "minus": "-",
+        "number": "[0-9]+",
+        "open": "\\(",
+        "plus": "\\+",
+        "whitespace": "\\s+",
+    },
+    "root_node": "EXPR",
+}
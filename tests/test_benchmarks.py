@@ -0,0 +1,99 @@
+import json
+from pathlib import Path
+from typing import Any, Dict
+
+import pytest
+
+from basil.exceptions import ParseError
+from basil.file_parser import FileParser
+from benchmarks.__main__ import main
+from benchmarks.grammars import GRAMMARS
+from benchmarks.runner import STAGES, compare, parse_size, run_benchmarks
+
+
+@pytest.mark.parametrize(
+    ["size", "expected"],
+    [("1KB", 1024), ("10mb", 10 * 1024 * 1024), ("512", 512), ("0.5KB", 512)],
+)
+def test_parse_size(size: str, expected: int) -> None:
+    assert parse_size(size) == expected
+
+
+@pytest.mark.parametrize("name", list(GRAMMARS))
+def test_grammar_generate(name: str) -> None:
+    grammar = GRAMMARS[name]
+    text = grammar.generate(2000)
+
+    assert len(text) >= 2000
+    assert grammar.generate(2000) == text
+
+    file_parser = FileParser(grammar.syntax_file)
+    file_parser.parse_text(text, node_type=grammar.node_type)
+
+    with pytest.raises(ParseError) as raised:
+        file_parser.parse_text(
+            text + grammar.invalid_suffix, node_type=grammar.node_type
+        )
+
+    # The whole text is parsed before it fails.
+    assert raised.value.offset >= len(file_parser.tokenize_text(text)) - 1
+
+
+def test_run_benchmarks() -> None:
+    benchmarks = run_benchmarks(GRAMMARS.values(), [1024], repeat=1)
+    results = benchmarks["results"]
+
+    assert [(result["grammar"], result["stage"]) for result in results] == [
+        (name, stage) for name in GRAMMARS for stage in STAGES
+    ]
+
+    for result in results:
+        assert result["size"] == "1KB"
+        assert result["tokens_per_second"] > 0
+        assert result["mb_per_second"] > 0
+        assert result["peak_memory"] > 0
+
+
+def test_compare() -> None:
+    def benchmarks(seconds: float, peak_memory: int) -> Dict[str, Any]:
+        result = {
+            "grammar": "json",
+            "stage": "parse_text",
+            "size": "1KB",
+            "seconds": seconds,
+            "peak_memory": peak_memory,
+        }
+        return {"results": [result]}
+
+    baseline = benchmarks(1.0, 1000)
+
+    assert compare(baseline, benchmarks(1.05, 1000)) == []
+    assert compare(baseline, benchmarks(0.5, 500)) == []
+    assert compare(baseline, {"results": []}) == []
+    assert compare(baseline, benchmarks(1.5, 2000)) == [
+        "json parse_text 1KB: seconds 1 -> 1.5 (+50%)",
+        "json parse_text 1KB: peak_memory 1000 -> 2000 (+100%)",
+    ]
+    assert compare(baseline, benchmarks(1.5, 1000), threshold=1.0) == []
+
+
+def test_main(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    baseline_file = tmp_path / "baseline.json"
+    results_file = tmp_path / "results.json"
+
+    args = ["run", "--sizes", "1KB", "--grammars", "ini", "--repeat", "1", "-o"]
+    assert main(args + [str(baseline_file)]) == 0
+    assert len(json.loads(baseline_file.read_text())["results"]) == len(STAGES)
+
+    results_file.write_text(baseline_file.read_text())
+    assert main(["compare", str(baseline_file), str(results_file)]) == 0
+    assert "No regressions" in capsys.readouterr().out
+
+    # Everything got ten times slower.
+    results = json.loads(results_file.read_text())
+    for result in results["results"]:
+        result["seconds"] *= 10
+    results_file.write_text(json.dumps(results))
+
+    assert main(["compare", str(baseline_file), str(results_file)]) == 1
+    assert "ini parse_text 1KB: seconds" in capsys.readouterr().out
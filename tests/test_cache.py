@@ -0,0 +1,106 @@
+import json
+import pickle
+from pathlib import Path
+
+import pytest
+
+from basil.file_parser import FileParser
+from basil.parser import ConcatenateParser, NodeParser
+from basil.syntax_loader.cache import cache_key, load_syntax
+from basil.syntax_loader.syntax_loader import SyntaxLoader
+from tests.json_parser import SYNTAX_JSON
+
+TEXT = '{"foo": [3, null, false, {"bar": 3, "baz": []}]}'
+
+
+def test_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    cache_dir = tmp_path / "cache"
+    expected = repr(FileParser(SYNTAX_JSON).parse_text(TEXT, node_type="JSON"))
+
+    file_parser = FileParser(SYNTAX_JSON, cache_dir=cache_dir)
+    assert repr(file_parser.parse_text(TEXT, node_type="JSON")) == expected
+
+    cache_file = cache_dir / f"{cache_key(SYNTAX_JSON.read_text())}.pickle"
+    assert cache_file.exists()
+
+    def fail(self: SyntaxLoader, syntax_file_content: str) -> None:
+        raise AssertionError("Cache was not used")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(SyntaxLoader, "__init__", fail)
+
+        for engine in ["recursive", "iterative", "lalr"]:
+            file_parser = FileParser(SYNTAX_JSON, cache_dir=cache_dir, engine=engine)
+            assert repr(file_parser.parse_text(TEXT, node_type="JSON")) == expected
+
+    cache_file.write_bytes(b"not a pickle")
+
+    file_parser = FileParser(SYNTAX_JSON, cache_dir=cache_dir)
+    assert repr(file_parser.parse_text(TEXT, node_type="JSON")) == expected
+    assert isinstance(load_syntax(SYNTAX_JSON.read_text(), cache_dir), SyntaxLoader)
+
+
+def test_cache_not_writable(tmp_path: Path) -> None:
+    # A file where the cache directory should be makes writing fail.
+    cache_dir = tmp_path / "file" / "cache"
+    cache_dir.parent.write_text("")
+
+    syntax_loader = load_syntax(SYNTAX_JSON.read_text(), cache_dir)
+    assert isinstance(syntax_loader, SyntaxLoader)
+
+    file_parser = FileParser(SYNTAX_JSON, cache_dir=cache_dir)
+    expected = repr(FileParser(SYNTAX_JSON).parse_text(TEXT, node_type="JSON"))
+    assert repr(file_parser.parse_text(TEXT, node_type="JSON")) == expected
+
+
+def test_pickle_node_parser() -> None:
+    syntax_loader = SyntaxLoader(SYNTAX_JSON.read_text())
+    pickle.dumps(syntax_loader)
+
+    # Only SyntaxLoader pickles its NodeParsers without inner.
+    node_parser = syntax_loader.parsers["OBJECT_ITEM"].parsers[2]
+    assert isinstance(node_parser, NodeParser)
+    assert node_parser.inner is syntax_loader.parsers["JSON"]
+
+    unpickled = pickle.loads(pickle.dumps(node_parser))
+    assert isinstance(unpickled, NodeParser)
+    assert isinstance(unpickled.inner, ConcatenateParser)
+    assert unpickled.inner.node_type == "JSON"
+
+
+def test_cache_key() -> None:
+    syntax = SYNTAX_JSON.read_text()
+    assert cache_key(syntax) == cache_key(syntax)
+    assert cache_key(syntax) != cache_key(syntax + " ")
+
+
+def test_cache_many_node_types(tmp_path: Path) -> None:
+    # Every node type refers to the next one.
+    node_count = 400
+    nodes = {
+        f"N{'A' * index}": f"x N{'A' * (index + 1)}?" for index in range(node_count)
+    }
+    nodes[f"N{'A' * node_count}"] = "x"
+
+    syntax = json.dumps(
+        {
+            "filtered_tokens": ["whitespace"],
+            "keyword_tokens": {},
+            "nodes": nodes,
+            "regular_tokens": {"x": "x", "whitespace": "\\s+"},
+            "root_node": "N",
+        }
+    )
+
+    load_syntax(syntax, tmp_path)
+    syntax_loader = load_syntax(syntax, tmp_path)
+
+    syntax_file = tmp_path / "syntax.json"
+    syntax_file.write_text(syntax)
+
+    file_parser = FileParser(syntax_file, cache_dir=tmp_path, engine="iterative")
+    node = file_parser.parse_text("x " * 3, node_type="N")
+    assert node.type == "N"
+
+    inner = syntax_loader.parsers["N"].parsers[1]
+    assert repr(inner) == "(NA)?"
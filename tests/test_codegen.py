@@ -0,0 +1,133 @@
+import json
+from pathlib import Path
+from typing import Tuple
+
+import pytest
+
+from basil.codegen import write_parser_module
+from basil.exceptions import ParseError
+from basil.file_parser import FileParser
+from tests.json_parser import SYNTAX_JSON
+from tests.syntaxes import STATEMENTS_SYNTAX
+
+
+def load_parsers(syntax_file: Path, tmp_path: Path) -> Tuple[FileParser, FileParser]:
+    module_file = tmp_path / "generated_parser.py"
+    write_parser_module(syntax_file, module_file)
+
+    generated_parser = FileParser(syntax_file)
+    generated_parser.load_generated_parser(module_file)
+
+    return FileParser(syntax_file), generated_parser
+
+
+def check_same_result(
+    combinator_parser: FileParser,
+    generated_parser: FileParser,
+    text: str,
+    node_type: str,
+) -> None:
+    try:
+        expected = repr(combinator_parser.parse_text(text, node_type=node_type))
+    except ParseError as e:
+        with pytest.raises(ParseError) as raised:
+            generated_parser.parse_text(text, node_type=node_type)
+
+        assert raised.value.offset == e.offset
+        assert str(raised.value) == str(e)
+
+        with pytest.raises(ParseError) as raised:
+            generated_parser.parse_text(text, node_type=node_type, two_phase=True)
+
+        assert str(raised.value) == str(e)
+    else:
+        found = generated_parser.parse_text(text, node_type=node_type)
+        assert repr(found) == expected
+
+
+@pytest.mark.parametrize(
+    ["node_type", "text"],
+    [
+        ("JSON", "null"),
+        ("JSON", '{"foo": [3, null, false, {"bar": 3, "baz": []}]}'),
+        ("JSON", "[[], [[]], {}]"),
+        ("JSON", ""),
+        ("JSON", "[1, 2"),
+        ("JSON", "[1, 2,]"),
+        ("JSON", '{"a" 1}'),
+        ("JSON", "[1] 2"),
+        ("OBJECT_ITEM", '"foo": true'),
+        ("BOOLEAN", "null"),
+    ],
+)
+def test_generated_parser_json(tmp_path: Path, node_type: str, text: str) -> None:
+    combinator_parser, generated_parser = load_parsers(SYNTAX_JSON, tmp_path)
+    check_same_result(combinator_parser, generated_parser, text, node_type)
+
+
+@pytest.mark.parametrize(
+    ["text"],
+    [
+        ("print a 1 b;",),
+        ("let a = 1; let b = a + 2; let c = b; print c;",),
+        ("",),
+        ("print;",),
+        ("let a = b +;",),
+        ("let a = 1 print a;",),
+    ],
+)
+def test_generated_parser_statements(tmp_path: Path, text: str) -> None:
+    syntax_file = tmp_path / "syntax.json"
+    syntax_file.write_text(json.dumps(STATEMENTS_SYNTAX))
+
+    combinator_parser, generated_parser = load_parsers(syntax_file, tmp_path)
+    check_same_result(combinator_parser, generated_parser, text, "PROGRAM")
+
+
+def test_generated_parser_long_nodes(tmp_path: Path) -> None:
+    # Long choices and concatenations used to nest too deep to compile.
+    count = 200
+    names = [
+        "t_" + "".join(chr(ord("a") + int(digit)) for digit in str(index))
+        for index in range(count)
+    ]
+    syntax = {
+        "filtered_tokens": ["whitespace"],
+        "keyword_tokens": {},
+        "nodes": {
+            "ROOT": "CHOICE | SEQUENCE",
+            "CHOICE": " | ".join(names),
+            "SEQUENCE": "open " + " ".join(names),
+        },
+        "regular_tokens": {
+            **{name: f"#{index}#" for index, name in enumerate(names)},
+            "open": "\\(",
+            "whitespace": "\\s+",
+        },
+        "root_node": "ROOT",
+    }
+    syntax_file = tmp_path / "syntax.json"
+    syntax_file.write_text(json.dumps(syntax))
+
+    combinator_parser, generated_parser = load_parsers(syntax_file, tmp_path)
+    sequence = "( " + " ".join(f"#{index}#" for index in range(count))
+
+    for text in [
+        "#0#",
+        f"#{count - 1}#",
+        sequence,
+        sequence.rsplit(" ", 1)[0],
+        "( #1#",
+    ]:
+        check_same_result(combinator_parser, generated_parser, text, "ROOT")
+
+
+def test_generated_parser_other_syntax(tmp_path: Path) -> None:
+    syntax_file = tmp_path / "syntax.json"
+    syntax_file.write_text(json.dumps(STATEMENTS_SYNTAX))
+
+    module_file = tmp_path / "generated_parser.py"
+    write_parser_module(syntax_file, module_file)
+
+    with pytest.raises(ValueError):
+        FileParser(SYNTAX_JSON).load_generated_parser(module_file)
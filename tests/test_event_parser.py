@@ -0,0 +1,145 @@
+import json
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import pytest
+
+from basil.exceptions import ParseError
+from basil.file_parser import FileParser
+from basil.models import EnterEvent, Event, ExitEvent, Node, Token, TokenEvent
+from tests.json_parser import SYNTAX_JSON
+from tests.syntaxes import EXPRESSION_SYNTAX, STATEMENTS_SYNTAX
+
+
+def event_tuples(events: List[Event]) -> List[Tuple[str, str]]:
+    tuples: List[Tuple[str, str]] = []
+
+    for event in events:
+        if isinstance(event, EnterEvent):
+            tuples.append(("enter", event.node_type))
+        elif isinstance(event, ExitEvent):
+            tuples.append(("exit", event.node_type))
+        else:
+            assert isinstance(event, TokenEvent)
+            tuples.append(("token", event.token.value))
+
+    return tuples
+
+
+def tree_event_tuples(node: Node) -> List[Tuple[str, str]]:
+    tuples = [("enter", node.type)]
+
+    for child in node.children:
+        if isinstance(child, Token):
+            tuples.append(("token", child.value))
+        else:
+            tuples += tree_event_tuples(child)
+
+    tuples.append(("exit", node.type))
+    return tuples
+
+
+def check_same_result(file_parser: FileParser, text: str, node_type: str) -> None:
+    try:
+        expected = tree_event_tuples(file_parser.parse_text(text, node_type=node_type))
+    except ParseError as e:
+        with pytest.raises(ParseError) as raised:
+            list(file_parser.iter_events(text, node_type=node_type))
+
+        assert str(raised.value) == str(e)
+    else:
+        found = event_tuples(list(file_parser.iter_events(text, node_type=node_type)))
+        assert found == expected
+
+
+@pytest.mark.parametrize(
+    ["node_type", "text"],
+    [
+        ("JSON", "null"),
+        ("JSON", '{"foo": [3, null, false, {"bar": 3, "baz": []}]}'),
+        ("JSON", "[[], [[]], {}]"),
+        ("JSON", ""),
+        ("JSON", "[1, 2"),
+        ("JSON", "[1, 2,]"),
+        ("JSON", '{"a" 1}'),
+        ("JSON", "[1] 2"),
+        ("OBJECT_ITEM", '"foo": true'),
+        ("BOOLEAN", "null"),
+    ],
+)
+def test_iter_events_json(node_type: str, text: str) -> None:
+    check_same_result(FileParser(SYNTAX_JSON), text, node_type)
+
+
+@pytest.mark.parametrize(
+    ["syntax", "text"],
+    [
+        (STATEMENTS_SYNTAX, "print a 1 b;"),
+        (STATEMENTS_SYNTAX, "let a = 1; let b = a + 2; let c = b; print c;"),
+        (STATEMENTS_SYNTAX, "let a = b +;"),
+        (STATEMENTS_SYNTAX, "let a = 1 print a;"),
+        (EXPRESSION_SYNTAX, "((1 + 2) - (3))"),
+        (EXPRESSION_SYNTAX, "1 + (2"),
+    ],
+)
+def test_iter_events_other_syntaxes(
+    tmp_path: Path, syntax: Dict[str, str], text: str
+) -> None:
+    syntax_file = tmp_path / "syntax.json"
+    syntax_file.write_text(json.dumps(syntax))
+
+    check_same_result(FileParser(syntax_file), text, str(syntax["root_node"]))
+
+
+@pytest.mark.parametrize(
+    ["nodes", "text"],
+    [
+        # The first alternative parses x before it fails.
+        ({"ROOT": "FOO | BAR", "FOO": "x y", "BAR": "x x"}, "x x"),
+        # FOO fails, the optional is skipped and x parses.
+        ({"ROOT": "FOO? x", "FOO": "x y"}, "x"),
+        # The last repetition fails, x parses after the repetition.
+        ({"ROOT": "FOO* x", "FOO": "x y"}, "x y x y x"),
+    ],
+)
+def test_iter_events_backtracking(
+    tmp_path: Path, nodes: Dict[str, str], text: str
+) -> None:
+    syntax = {
+        "filtered_tokens": ["whitespace"],
+        "keyword_tokens": {},
+        "nodes": nodes,
+        "regular_tokens": {"x": "x", "y": "y", "whitespace": "\\s+"},
+        "root_node": "ROOT",
+    }
+    syntax_file = tmp_path / "syntax.json"
+    syntax_file.write_text(json.dumps(syntax))
+
+    check_same_result(FileParser(syntax_file), text, "ROOT")
+
+
+def test_iter_events_streams() -> None:
+    file_parser = FileParser(SYNTAX_JSON)
+    text = "[" + "1, " * 1000 + "}"
+
+    events: List[Event] = []
+    with pytest.raises(ParseError):
+        for event in file_parser.iter_events(text, node_type="JSON"):
+            events.append(event)
+
+    # Nothing can be backtracked inside the array, so events are yielded before
+    # the error at the end is found.
+    assert len(events) > 1000
+
+
+def test_iter_events_deep_nesting() -> None:
+    file_parser = FileParser(SYNTAX_JSON)
+    depth = 20_000
+
+    events = list(file_parser.iter_events("[" * depth + "]" * depth, node_type="JSON"))
+    assert len(events) == depth * 6
+
+
+def test_iter_events_unknown_node_type() -> None:
+    with pytest.raises(ValueError):
+        list(FileParser(SYNTAX_JSON).iter_events("null", node_type="FOO"))
@@ -0,0 +1,329 @@
+import json
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from io import StringIO
+from pathlib import Path
+from typing import List, Tuple
+
+import pytest
+
+from basil.exceptions import ParseError, TokenizerException
+from basil.file_parser import MIN_STREAM_LOOKAHEAD, FileParser
+from basil.models import Node, ParserInput, Token
+from tests.json_parser import SYNTAX_JSON
+
+TEXT = '{"foo": [3, null, false,\n  {"bar": 3, "baz": []}],\n"long string": "abc"}'
+
+
+def as_tuples(tokens: List[Token]) -> List[Tuple[str, str, str, int]]:
+    return [
+        (token.type, token.value, str(token.position), token.offset) for token in tokens
+    ]
+
+
+@pytest.mark.parametrize(["chunk_size"], [(1,), (2,), (3,), (7,), (1000,)])
+@pytest.mark.parametrize(["filter_token_types"], [(True,), (False,)])
+def test_iter_tokens(chunk_size: int, filter_token_types: bool) -> None:
+    file_parser = FileParser(SYNTAX_JSON)
+
+    expected = file_parser.tokenize_text(
+        TEXT, "foo.json", filter_token_types=filter_token_types
+    )
+    found = file_parser.iter_tokens(
+        StringIO(TEXT),
+        chunk_size=chunk_size,
+        file_name="foo.json",
+        filter_token_types=filter_token_types,
+    )
+
+    assert as_tuples(list(found)) == as_tuples(expected)
+
+
+@pytest.mark.parametrize(["chunk_size"], [(100,), (MIN_STREAM_LOOKAHEAD,)])
+def test_iter_tokens_long_token(chunk_size: int) -> None:
+    file_parser = FileParser(SYNTAX_JSON)
+    text = '["' + "x" * (3 * MIN_STREAM_LOOKAHEAD) + '", 1]'
+
+    expected = file_parser.tokenize_text(text)
+    found = file_parser.iter_tokens(StringIO(text), chunk_size=chunk_size)
+
+    assert as_tuples(list(found)) == as_tuples(expected)
+
+
+@pytest.mark.parametrize(["text"], [("[3, ~]",), ('["unterminated',)])
+def test_iter_tokens_fail(text: str) -> None:
+    file_parser = FileParser(SYNTAX_JSON)
+
+    with pytest.raises(TokenizerException):
+        list(file_parser.iter_tokens(StringIO(text), chunk_size=2))
+
+
+def test_tokenize_text_to_array() -> None:
+    file_parser = FileParser(SYNTAX_JSON)
+
+    tokens = file_parser.tokenize_text(TEXT, "foo.json")
+    token_array = file_parser.tokenize_text_to_array(TEXT, "foo.json")
+
+    assert len(token_array) == len(tokens)
+    assert as_tuples(list(token_array)) == as_tuples(tokens)
+    assert as_tuples([token_array[-1]]) == as_tuples([tokens[-1]])
+
+
+def test_parser_input_token_list() -> None:
+    file_parser = FileParser(SYNTAX_JSON)
+    parser = file_parser.node_parsers["JSON"]
+
+    tokens = file_parser.tokenize_text(TEXT)
+    token_array = file_parser.tokenize_text_to_array(TEXT)
+
+    list_input = ParserInput(tokens, Path("foo.json"), file_parser.token_type_ids)
+    array_input = ParserInput(token_array, Path("foo.json"))
+
+    assert list(list_input.type_ids) == list(array_input.type_ids)
+
+    list_children: List[Token | Node] = []
+    array_children: List[Token | Node] = []
+    list_offset = parser.parse(list_input, 0, list_children, file_parser.new_context())
+    array_offset = parser.parse(
+        array_input, 0, array_children, file_parser.new_context()
+    )
+
+    assert list_offset == array_offset == len(tokens)
+    assert repr(list_children) == repr(array_children)
+
+
+@pytest.mark.parametrize(["engine"], [("recursive",), ("iterative",), ("lalr",)])
+def test_parser_input_token_list_without_type_ids(engine: str) -> None:
+    # ParserInput(tokens, file) looks up the type ids once parsing starts.
+    file_parser = FileParser(SYNTAX_JSON, engine=engine)
+    parser = file_parser.node_parsers["JSON"]
+    parser_input = ParserInput(file_parser.tokenize_text(TEXT), Path("foo.json"))
+
+    root, offset = file_parser._parse(
+        parser, parser_input, False, file_parser.new_context()
+    )
+
+    assert offset == len(parser_input.tokens)
+    assert repr(root) == repr(file_parser.parse_text(TEXT, node_type="JSON"))
+    assert list(parser_input.type_ids) == list(
+        file_parser.tokenize_text_to_array(TEXT).type_ids
+    )
+
+
+@pytest.mark.parametrize(
+    ["text"],
+    [
+        ("[]",),
+        ('{"foo": [3, null, false, {"bar": 3, "baz": []}]}',),
+        ("[1, 2",),
+        ('{"a" 1}',),
+        ("[1, 2]]",),
+    ],
+)
+def test_parse_text_two_phase(text: str) -> None:
+    file_parser = FileParser(SYNTAX_JSON)
+
+    try:
+        expected = repr(file_parser.parse_text(text, node_type="JSON"))
+    except ParseError as e:
+        with pytest.raises(ParseError) as raised:
+            file_parser.parse_text(text, node_type="JSON", two_phase=True)
+
+        assert str(raised.value) == str(e)
+    else:
+        found = file_parser.parse_text(text, node_type="JSON", two_phase=True)
+        assert repr(found) == expected
+
+
+def test_parse_text_and_transform_fused(tmp_path: Path) -> None:
+    syntax_file = tmp_path / "syntax.json"
+    syntax_file.write_text(
+        json.dumps(
+            {
+                "filtered_tokens": ["whitespace"],
+                "keyword_tokens": {},
+                "nodes": {"ROOT": "FOO | BAR", "FOO": "x y", "BAR": "x x"},
+                "regular_tokens": {"x": "x", "y": "y", "whitespace": "\\s+"},
+                "root_node": "ROOT",
+            }
+        )
+    )
+    file_parser = FileParser(syntax_file)
+    transformed_node_types: List[str] = []
+
+    def node_transformer(node_type: str, children: List[str | Token]) -> str:
+        transformed_node_types.append(node_type)
+        return node_type + "(" + " ".join(str(child) for child in children) + ")"
+
+    def token_transformer(token: Token) -> str | Token:
+        return token.value
+
+    transformed = file_parser.parse_text_and_transform(
+        "x x",
+        node_type="ROOT",
+        node_transformer=node_transformer,
+        token_transformer=token_transformer,
+        fused=True,
+    )
+
+    # FOO is backtracked, so it is never transformed.
+    assert transformed == "ROOT(BAR(x x))"
+    assert transformed_node_types == ["BAR", "ROOT"]
+
+    with pytest.raises(ValueError):
+        file_parser.parse_text_and_transform(
+            "x x",
+            node_type="ROOT",
+            node_transformer=node_transformer,
+            token_transformer=token_transformer,
+            fused=True,
+            two_phase=True,
+        )
+
+
+def parse_or_error(file_parser: FileParser, text: str) -> str:
+    try:
+        return repr(file_parser.parse_text(text, node_type="JSON"))
+    except ParseError as e:
+        return str(e)
+
+
+@pytest.mark.parametrize(
+    ["engine", "packrat"],
+    [("recursive", False), ("recursive", True), ("iterative", True)],
+)
+def test_parse_text_threads(engine: str, packrat: bool) -> None:
+    file_parser = FileParser(SYNTAX_JSON, engine=engine, packrat=packrat)
+    texts = [
+        TEXT,
+        "[1, 2",
+        '{"a" 1}',
+        "[" * 50 + "]" * 50,
+        "[1, 2,]",
+        '{"foo": [3, null, false]}',
+    ] * 20
+
+    expected = [parse_or_error(file_parser, text) for text in texts]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        found = list(executor.map(partial(parse_or_error, file_parser), texts))
+
+    assert found == expected
+
+
+def test_pickle_file_parser() -> None:
+    file_parser = FileParser(SYNTAX_JSON, lexer="dfa", engine="lalr")
+    unpickled = pickle.loads(pickle.dumps(file_parser))
+
+    assert unpickled.engine == "lalr"
+    assert repr(unpickled.parse_text(TEXT, node_type="JSON")) == repr(
+        file_parser.parse_text(TEXT, node_type="JSON")
+    )
+
+    with pytest.raises(ParseError) as raised:
+        file_parser.parse_text("[1 2]", node_type="JSON")
+
+    error = pickle.loads(pickle.dumps(raised.value))
+    assert str(error) == str(raised.value)
+
+
+def count_nodes(node: Node) -> int:
+    return 1 + sum(
+        count_nodes(child) for child in node.children if isinstance(child, Node)
+    )
+
+
+@pytest.mark.parametrize(["ordered"], [(True,), (False,)])
+def test_parse_many(tmp_path: Path, ordered: bool) -> None:
+    file_parser = FileParser(SYNTAX_JSON)
+    texts = [TEXT, "[1, 2", "[[], {}]", "[~]", "null"] * 4
+
+    files: List[Path] = []
+    for index, text in enumerate(texts):
+        file = tmp_path / f"{index}.json"
+        file.write_text(text)
+        files.append(file)
+
+    expected: List[Tuple[Path, str]] = []
+    for file in files:
+        try:
+            node = file_parser.parse_file(file, "JSON")
+        except (ParseError, TokenizerException) as e:
+            expected.append((file, type(e).__name__))
+        else:
+            expected.append((file, str(count_nodes(node))))
+
+    results = file_parser.parse_many(
+        files,
+        node_type="JSON",
+        workers=2,
+        transform=count_nodes,
+        chunk_size=3,
+        ordered=ordered,
+    )
+
+    found: List[Tuple[Path, str]] = []
+    for file, result in results:
+        if isinstance(result, Exception):
+            found.append((file, type(result).__name__))
+        else:
+            found.append((file, str(result)))
+
+    if not ordered:
+        found.sort(key=lambda item: files.index(item[0]))
+
+    assert found == expected
+
+    nodes = list(file_parser.parse_many(files[:1], node_type="JSON", workers=1))
+    assert repr(nodes[0][1]) == repr(file_parser.parse_file(files[0], "JSON"))
+
+
+def test_parse_many_unreadable_files(tmp_path: Path) -> None:
+    file_parser = FileParser(SYNTAX_JSON)
+
+    files: List[Path] = []
+    for index in range(5):
+        file = tmp_path / f"{index}.json"
+        file.write_text(TEXT)
+        files.append(file)
+
+    invalid = tmp_path / "invalid.json"
+    invalid.write_bytes(b"[\xff]")
+    files.insert(2, invalid)
+    files.insert(4, tmp_path / "missing.json")
+
+    results = list(
+        file_parser.parse_many(files, node_type="JSON", workers=2, chunk_size=2)
+    )
+
+    # The other files in the chunk are still parsed.
+    assert [file for file, _ in results] == files
+    assert [type(result).__name__ for _, result in results] == [
+        "Node",
+        "Node",
+        "UnicodeDecodeError",
+        "Node",
+        "FileNotFoundError",
+        "Node",
+        "Node",
+    ]
+
+
+def test_file_parser_deprecated_attributes() -> None:
+    file_parser = FileParser(SYNTAX_JSON, packrat=True, packrat_max_entries=10)
+
+    with pytest.warns(DeprecationWarning):
+        error_collector = file_parser.error_collector
+
+    with pytest.warns(DeprecationWarning):
+        memo = file_parser.memo
+
+    assert error_collector.token_type_names == file_parser.token_type_names
+    assert memo.max_entries == 10
+
+    # Parsing doesn't use them.
+    with pytest.raises(ParseError):
+        file_parser.parse_text("[1,", node_type="JSON")
+
+    assert error_collector.offset == -1
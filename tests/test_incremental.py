@@ -0,0 +1,195 @@
+import json
+from pathlib import Path
+from typing import Any, List, Tuple
+
+import pytest
+
+from basil.exceptions import ParseError, TokenizerException
+from basil.file_parser import FileParser
+from basil.incremental import ShiftedNode
+from basil.models import Node, TextEdit, Token
+from tests.json_parser import SYNTAX_JSON
+from tests.syntaxes import EXPRESSION_SYNTAX, STATEMENTS_SYNTAX
+
+JSON_TEXT = '{"foo": [3, null, false, {"bar": 3, "baz": []}],\n "qux": [1, 2]}'
+
+STATEMENTS_TEXT = "let a = 1;\nlet b = a + 2;\nprint a b;\n"
+
+
+def describe_tokens(node: Node) -> List[Tuple[str, str, int, str]]:
+    described: List[Tuple[str, str, int, str]] = []
+    nodes = [node]
+
+    while nodes:
+        for child in reversed(nodes.pop().children):
+            if isinstance(child, Token):
+                described.append(
+                    (child.type, child.value, child.offset, str(child.position))
+                )
+            else:
+                nodes.append(child)
+
+    return described
+
+
+def check_incremental(file_parser: FileParser, text: str, edit: TextEdit) -> Node:
+    node_type = file_parser.root_node_type
+    old_tree = file_parser.parse_text(text, "/some/file", node_type=node_type)
+    old_repr = repr(old_tree)
+    old_tokens = describe_tokens(old_tree)
+
+    new_text = edit.apply(text)
+    expected = file_parser.parse_text(new_text, "/some/file", node_type=node_type)
+    found = file_parser.parse_incremental(old_tree, text, edit, "/some/file")
+
+    assert repr(found) == repr(expected)
+    assert describe_tokens(found) == describe_tokens(expected)
+
+    # The old tree is not changed.
+    assert repr(old_tree) == old_repr
+    assert describe_tokens(old_tree) == old_tokens
+    return found
+
+
+def replace(text: str, old: str, new: str) -> TextEdit:
+    start = text.index(old)
+    return TextEdit(start, start + len(old), new)
+
+
+@pytest.mark.parametrize(
+    ["old", "new"],
+    [
+        ("3", "42"),
+        ("3", '"x", {}, 3'),
+        ("null", "\n\n[true]"),
+        ('{"bar"', '{"new": 1, "bar"'),
+        ("[]", "[[[]]]"),
+        ("],\n", "]\n,"),
+        ("{", "\n{"),
+        ("2]", "2, 7]"),
+        ('"foo"', '"foooo"'),
+        (": [3", ":[3"),
+        (JSON_TEXT, "null"),
+        ("}", "}  "),
+    ],
+)
+def test_parse_incremental_json(old: str, new: str) -> None:
+    edit = replace(JSON_TEXT, old, new)
+    check_incremental(FileParser(SYNTAX_JSON), JSON_TEXT, edit)
+
+
+@pytest.mark.parametrize(
+    ["syntax", "text", "old", "new"],
+    [
+        (STATEMENTS_SYNTAX, STATEMENTS_TEXT, "a + 2", "c + 2"),
+        (STATEMENTS_SYNTAX, STATEMENTS_TEXT, "1", "x + 12"),
+        (STATEMENTS_SYNTAX, STATEMENTS_TEXT, ";", "; print x;"),
+        (STATEMENTS_SYNTAX, STATEMENTS_TEXT, "a b", "ab"),
+        (STATEMENTS_SYNTAX, STATEMENTS_TEXT, "print", "let p = 3; print"),
+        (EXPRESSION_SYNTAX, "((1 + 2) - (3))", "3", "(4 - 5)"),
+    ],
+)
+def test_parse_incremental_other_syntaxes(
+    tmp_path: Path, syntax: Any, text: str, old: str, new: str
+) -> None:
+    syntax_file = tmp_path / "syntax.json"
+    syntax_file.write_text(json.dumps(syntax))
+    check_incremental(FileParser(syntax_file), text, replace(text, old, new))
+
+
+def test_parse_incremental_reparses_node(monkeypatch: pytest.MonkeyPatch) -> None:
+    file_parser = FileParser(SYNTAX_JSON)
+    old_tree = file_parser.parse_text(JSON_TEXT, node_type="JSON")
+
+    def fail_parse_text(*args: Any, **kwargs: Any) -> Node:
+        raise AssertionError("parsed the whole text")
+
+    monkeypatch.setattr(file_parser, "parse_text", fail_parse_text)
+    new_tree = file_parser.parse_incremental(
+        old_tree, JSON_TEXT, replace(JSON_TEXT, "2", "[4]")
+    )
+
+    # The item with "foo" is before the edit, so it is reused.
+    old_object = old_tree.children[0]
+    new_object = new_tree.children[0]
+    assert isinstance(old_object, Node) and isinstance(new_object, Node)
+    assert new_object.children[1] is old_object.children[1]
+
+
+def test_parse_incremental_shifts_lazily() -> None:
+    file_parser = FileParser(SYNTAX_JSON)
+    text = "[" + ", ".join(['{"a": [1, 2]}'] * 100) + "]"
+    old_tree = file_parser.parse_text(text, "/some/file", node_type="JSON")
+
+    edit = replace(text, "1", "42")
+    new_tree = file_parser.parse_incremental(old_tree, text, edit, "/some/file")
+
+    # The items after the edit are not copied until they are used.
+    array = new_tree.children[0]
+    assert isinstance(array, Node)
+    items = [child for child in array.children if isinstance(child, ShiftedNode)]
+    assert len(items) == 99
+    assert all(item._children is None for item in items)
+
+    # Another edit shifts the old items once more, they are still not copied.
+    new_text = edit.apply(text)
+    edit = replace(new_text, ", 2", "")
+    newer_tree = file_parser.parse_incremental(new_tree, new_text, edit, "/some/file")
+
+    expected = file_parser.parse_text(
+        edit.apply(new_text), "/some/file", node_type="JSON"
+    )
+    assert describe_tokens(newer_tree) == describe_tokens(expected)
+    assert all(item._children is None for item in items[1:])
+
+
+def test_parse_incremental_not_ll1(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    syntax_file = tmp_path / "syntax.json"
+    syntax_file.write_text(json.dumps(EXPRESSION_SYNTAX))
+    file_parser = FileParser(syntax_file)
+    assert not file_parser.ll1
+
+    old_tree = file_parser.parse_text("1 + 2", node_type="EXPR")
+    parsed_texts: List[str] = []
+    parse_text = file_parser.parse_text
+
+    def spy_parse_text(text: str, *args: Any, **kwargs: Any) -> Node:
+        parsed_texts.append(text)
+        return parse_text(text, *args, **kwargs)
+
+    monkeypatch.setattr(file_parser, "parse_text", spy_parse_text)
+    file_parser.parse_incremental(old_tree, "1 + 2", TextEdit(4, 5, "3"))
+    assert parsed_texts == ["1 + 3"]
+
+
+@pytest.mark.parametrize(
+    ["old", "new", "expected_exception"],
+    [
+        ("3", "3,", ParseError),
+        ("3", "#", TokenizerException),
+    ],
+)
+def test_parse_incremental_error(
+    old: str, new: str, expected_exception: type[Exception]
+) -> None:
+    edit = replace(JSON_TEXT, old, new)
+    file_parser = FileParser(SYNTAX_JSON)
+    old_tree = file_parser.parse_text(JSON_TEXT, node_type="JSON")
+
+    with pytest.raises(expected_exception) as raised:
+        file_parser.parse_incremental(old_tree, JSON_TEXT, edit)
+
+    with pytest.raises(expected_exception) as expected:
+        file_parser.parse_text(edit.apply(JSON_TEXT), node_type="JSON")
+
+    assert str(raised.value) == str(expected.value)
+
+
+def test_text_edit_invalid() -> None:
+    with pytest.raises(ValueError):
+        TextEdit(3, 2, "")
+
+    with pytest.raises(ValueError):
+        TextEdit(0, 10, "").apply("short")
@@ -0,0 +1,126 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from basil.exceptions import ParseError
+from basil.file_parser import FileParser
+from basil.models import Node
+from tests.json_parser import SYNTAX_JSON
+from tests.syntaxes import EXPRESSION_SYNTAX, STATEMENTS_SYNTAX
+
+
+def check_same_result(
+    recursive_parser: FileParser,
+    iterative_parser: FileParser,
+    text: str,
+    node_type: str,
+) -> None:
+    try:
+        expected = repr(recursive_parser.parse_text(text, node_type=node_type))
+    except ParseError as e:
+        with pytest.raises(ParseError) as raised:
+            iterative_parser.parse_text(text, node_type=node_type)
+
+        assert raised.value.offset == e.offset
+        assert str(raised.value) == str(e)
+    else:
+        found = iterative_parser.parse_text(text, node_type=node_type)
+        assert repr(found) == expected
+
+
+@pytest.mark.parametrize(
+    ["node_type", "text"],
+    [
+        ("JSON", "null"),
+        ("JSON", '{"foo": [3, null, false, {"bar": 3, "baz": []}]}'),
+        ("JSON", "[[], [[]], {}]"),
+        ("JSON", ""),
+        ("JSON", "[1, 2"),
+        ("JSON", "[1, 2,]"),
+        ("JSON", '{"a" 1}'),
+        ("JSON", "[1] 2"),
+        ("OBJECT_ITEM", '"foo": true'),
+        ("BOOLEAN", "null"),
+    ],
+)
+def test_iterative_parser_json(node_type: str, text: str) -> None:
+    check_same_result(
+        FileParser(SYNTAX_JSON),
+        FileParser(SYNTAX_JSON, engine="iterative"),
+        text,
+        node_type,
+    )
+
+
+@pytest.mark.parametrize(
+    ["text"],
+    [
+        ("print a 1 b;",),
+        ("let a = 1; let b = a + 2; let c = b; print c;",),
+        ("",),
+        ("print;",),
+        ("let a = b +;",),
+        ("let a = 1 print a;",),
+    ],
+)
+def test_iterative_parser_statements(tmp_path: Path, text: str) -> None:
+    syntax_file = tmp_path / "syntax.json"
+    syntax_file.write_text(json.dumps(STATEMENTS_SYNTAX))
+
+    check_same_result(
+        FileParser(syntax_file),
+        FileParser(syntax_file, engine="iterative"),
+        text,
+        "PROGRAM",
+    )
+
+
+@pytest.mark.parametrize(
+    ["text"],
+    [
+        ("1 + 2 - 3",),
+        ("((1 + 2) - (3))",),
+        ("(1 + 2",),
+        ("1 + ",),
+    ],
+)
+def test_iterative_parser_packrat(tmp_path: Path, text: str) -> None:
+    syntax_file = tmp_path / "syntax.json"
+    syntax_file.write_text(json.dumps(EXPRESSION_SYNTAX))
+
+    check_same_result(
+        FileParser(syntax_file),
+        FileParser(syntax_file, engine="iterative", packrat=True),
+        text,
+        "EXPR",
+    )
+
+
+def test_iterative_parser_deep_nesting() -> None:
+    file_parser = FileParser(SYNTAX_JSON, engine="iterative")
+    depth = 20_000
+
+    node = file_parser.parse_text("[" * depth + "]" * depth, node_type="JSON")
+
+    # Walk down without recursion, repr() would hit the recursion limit.
+    found_depth = 0
+    while True:
+        assert node.type == "JSON"
+        array = node.children[0]
+        assert isinstance(array, Node)
+        found_depth += 1
+
+        if len(array.children) == 2:
+            break
+
+        child = array.children[1]
+        assert isinstance(child, Node)
+        node = child
+
+    assert found_depth == depth
+
+
+def test_unknown_engine() -> None:
+    with pytest.raises(ValueError):
+        FileParser(SYNTAX_JSON, engine="foo")
@@ -0,0 +1,147 @@
+import json
+from pathlib import Path
+from typing import Any, Dict, Set, Tuple
+
+import pytest
+
+from basil.exceptions import ParseError
+from basil.file_parser import FileParser
+from basil.syntax_loader.exceptions import GrammarConflicts
+from basil.syntax_loader.syntax_loader import SyntaxLoader
+from tests.json_parser import SYNTAX_JSON
+from tests.syntaxes import EXPRESSION_SYNTAX, STATEMENTS_SYNTAX
+
+
+def make_syntax(nodes: Dict[str, str]) -> Dict[str, Any]:
+    return {
+        "filtered_tokens": ["whitespace"],
+        "keyword_tokens": {},
+        "nodes": nodes,
+        "regular_tokens": {"x": "x", "y": "y", "whitespace": "\\s+"},
+        "root_node": next(iter(nodes)),
+    }
+
+
+def write_syntax(tmp_path: Path, syntax: Dict[str, Any]) -> Path:
+    syntax_file = tmp_path / "syntax.json"
+    syntax_file.write_text(json.dumps(syntax))
+    return syntax_file
+
+
+def check_same_result(syntax_file: Path, text: str, node_type: str) -> None:
+    combinator_parser = FileParser(syntax_file)
+    lalr_parser = FileParser(syntax_file, engine="lalr")
+
+    try:
+        expected = repr(combinator_parser.parse_text(text, node_type=node_type))
+    except ParseError:
+        with pytest.raises(ParseError):
+            lalr_parser.parse_text(text, node_type=node_type)
+    else:
+        found = lalr_parser.parse_text(text, node_type=node_type)
+        assert repr(found) == expected
+
+
+@pytest.mark.parametrize(
+    ["node_type", "text"],
+    [
+        ("JSON", "null"),
+        ("JSON", '{"foo": [3, null, false, {"bar": 3, "baz": []}]}'),
+        ("JSON", "[[], [[]], {}]"),
+        ("JSON", ""),
+        ("JSON", "[1, 2"),
+        ("JSON", "[1, 2,]"),
+        ("JSON", "[1] 2"),
+        ("OBJECT_ITEM", '"foo": true'),
+        ("BOOLEAN", "null"),
+    ],
+)
+def test_lalr_json(node_type: str, text: str) -> None:
+    check_same_result(SYNTAX_JSON, text, node_type)
+
+
+@pytest.mark.parametrize(
+    ["syntax", "text"],
+    [
+        (STATEMENTS_SYNTAX, "print a 1 b;"),
+        (STATEMENTS_SYNTAX, "let a = 1; let b = a + 2; let c = b; print c;"),
+        (STATEMENTS_SYNTAX, "let a = b +;"),
+        (EXPRESSION_SYNTAX, "((1 + 2) - (3))"),
+        (EXPRESSION_SYNTAX, "1 + (2"),
+    ],
+)
+def test_lalr_other_syntaxes(tmp_path: Path, syntax: Dict[str, Any], text: str) -> None:
+    syntax_file = write_syntax(tmp_path, syntax)
+    check_same_result(syntax_file, text, syntax["root_node"])
+
+
+def test_lalr_error() -> None:
+    lalr_parser = FileParser(SYNTAX_JSON, engine="lalr")
+
+    with pytest.raises(ParseError) as raised:
+        lalr_parser.parse_text("[1 2]", node_type="JSON")
+
+    # States for JSON values in arrays and objects are merged, so the error
+    # also lists object_end.
+    assert raised.value.offset == 2
+    assert raised.value.expected_token_types == {"array_end", "comma", "object_end"}
+
+
+def test_lalr_deep_nesting() -> None:
+    lalr_parser = FileParser(SYNTAX_JSON, engine="lalr")
+    depth = 20_000
+
+    lalr_parser.parse_text("[" * depth + "]" * depth, node_type="JSON")
+
+
+def test_lalr_differs_from_combinators(tmp_path: Path) -> None:
+    # The repetition of the combinators is greedy, so this never parses.
+    syntax_file = write_syntax(tmp_path, make_syntax({"ROOT": "x* x"}))
+
+    with pytest.raises(ParseError):
+        FileParser(syntax_file).parse_text("x x", node_type="ROOT")
+
+    node = FileParser(syntax_file, engine="lalr").parse_text("x x", node_type="ROOT")
+    assert [child.type for child in node.children] == ["x", "x"]
+
+
+@pytest.mark.parametrize(
+    ["nodes", "expected_conflicts"],
+    [
+        pytest.param(
+            {"ROOT": "FOO | BAR", "FOO": "x", "BAR": "x"},
+            {("reduce/reduce", "end of file", ("BAR", "FOO"))},
+            id="reduce-reduce",
+        ),
+        pytest.param(
+            {"ROOT": "x y? y?"},
+            {("shift/reduce", "y", ("ROOT",))},
+            id="shift-reduce",
+        ),
+        pytest.param(
+            {"ROOT": "FOO y?", "FOO": "x y?"},
+            {("shift/reduce", "y", ("FOO",))},
+            id="shift-reduce-nested",
+        ),
+    ],
+)
+def test_lalr_conflicts(
+    tmp_path: Path,
+    nodes: Dict[str, str],
+    expected_conflicts: Set[Tuple[str, str, Tuple[str, ...]]],
+) -> None:
+    syntax = make_syntax(nodes)
+    tables = SyntaxLoader(json.dumps(syntax)).build_lalr_tables()
+
+    conflicts = {
+        (
+            conflict.kind,
+            str(conflict).split(" on ")[1].split(" in ")[0],
+            tuple(sorted(conflict.node_types)),
+        )
+        for conflict in tables.conflicts
+    }
+    assert conflicts == expected_conflicts
+
+    with pytest.raises(GrammarConflicts):
+        FileParser(write_syntax(tmp_path, syntax), engine="lalr")
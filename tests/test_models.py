@@ -2,7 +2,7 @@ from pathlib import Path
 
 import pytest
 
-from basil.models import Position, Token
+from basil.models import Position, Source, Token
 
 POSITION = Position(Path("foo.txt"), 6, 9)
 TOKEN = Token("some value", "some_type", POSITION)
@@ -22,3 +22,31 @@ def test_position_dunder_functions() -> None:
 
 def test_token_repr() -> None:
     assert repr(TOKEN) == "Token(type='some_type', value='some value')"
+
+
+@pytest.mark.parametrize(
+    ["text"],
+    [
+        ("",),
+        ("foo",),
+        ("foo\nbar",),
+        ("\n\nfoo\n\nbar\n",),
+    ],
+)
+def test_source_position_matches_from_text(text: str) -> None:
+    source = Source(Path("foo.txt"), text)
+
+    for offset in range(len(text) + 1):
+        assert source.position(offset) == Position.from_text("foo.txt", offset, text)
+
+
+def test_token_position_from_source() -> None:
+    text = "foo\nbar baz"
+    source = Source(Path("foo.txt"), text)
+
+    bar = Token("bar", "some_type", offset=4, source=source)
+    baz = Token("baz", "some_type", offset=8, source=source)
+
+    assert str(bar.position) == "foo.txt:2:1"
+    assert bar.position < baz.position
+    assert bar.position.file is baz.position.file
@@ -0,0 +1,71 @@
+import json
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from basil.exceptions import ParseError
+from basil.file_parser import FileParser
+from basil.packrat import MemoKey, MemoValue, PackratMemo
+from tests.json_parser import SYNTAX_JSON
+from tests.syntaxes import EXPRESSION_SYNTAX
+
+
+@pytest.fixture
+def expression_syntax_file(tmp_path: Path) -> Path:
+    syntax_file = tmp_path / "syntax.json"
+    syntax_file.write_text(json.dumps(EXPRESSION_SYNTAX))
+    return syntax_file
+
+
+@pytest.mark.parametrize(
+    ["text"],
+    [
+        ("1",),
+        ("1 + 2 - 3",),
+        ("((1 + 2) - (3))",),
+        ("(" * 6 + "1" + ")" * 6,),
+        ("(1 + 2",),
+        ("1 + ",),
+    ],
+)
+def test_packrat_same_result(expression_syntax_file: Path, text: str) -> None:
+    plain_parser = FileParser(expression_syntax_file)
+    packrat_parser = FileParser(expression_syntax_file, packrat=True)
+
+    try:
+        expected = repr(plain_parser.parse_text(text, node_type="EXPR"))
+    except ParseError as e:
+        with pytest.raises(ParseError) as raised:
+            packrat_parser.parse_text(text, node_type="EXPR")
+
+        assert raised.value.offset == e.offset
+        assert raised.value.expected_token_types == e.expected_token_types
+    else:
+        found = repr(packrat_parser.parse_text(text, node_type="EXPR"))
+        assert found == expected
+
+
+def test_packrat_deep_nesting(expression_syntax_file: Path) -> None:
+    packrat_parser = FileParser(expression_syntax_file, packrat=True)
+
+    # Without packrat this needs over 3^30 parse calls.
+    text = "(" * 30 + "1" + ")" * 30
+    packrat_parser.parse_text(text, node_type="EXPR")
+
+
+def test_packrat_max_entries(monkeypatch: pytest.MonkeyPatch) -> None:
+    packrat_parser = FileParser(SYNTAX_JSON, packrat=True, packrat_max_entries=3)
+
+    stored_sizes: List[int] = []
+    store = PackratMemo.store
+
+    def store_and_check(memo: PackratMemo, key: MemoKey, result: MemoValue) -> None:
+        store(memo, key, result)
+        stored_sizes.append(len(memo.results))
+
+    monkeypatch.setattr(PackratMemo, "store", store_and_check)
+
+    packrat_parser.parse_text("[1, [2, [3]], {}]", node_type="JSON")
+
+    assert max(stored_sizes) == 3
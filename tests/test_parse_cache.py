@@ -0,0 +1,181 @@
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Tuple
+
+import pytest
+
+from basil.exceptions import ParseError
+from basil.file_parser import FileParser
+from basil.models import Node, Token
+from basil.parse_cache import CompactTree, ParseCache
+from tests.json_parser import SYNTAX_JSON
+
+JSON_TEXT = '{"foo": [3, null, false, {"bar": 3, "baz": []}],\n "qux": [1, 2]}'
+
+
+def describe(node: Node) -> List[Tuple[str, str, str]]:
+    described: List[Tuple[str, str, str]] = []
+    items: List[Token | Node] = [node]
+
+    while items:
+        item = items.pop()
+
+        if isinstance(item, Token):
+            described.append((item.type, item.value, str(item.position)))
+        else:
+            described.append((item.type, str(len(item.children)), ""))
+            items += reversed(item.children)
+
+    return described
+
+
+def test_parse_cache_memory() -> None:
+    parse_cache = ParseCache()
+    file_parser = FileParser(SYNTAX_JSON, parse_cache=parse_cache)
+
+    first = file_parser.parse_text(JSON_TEXT, "/first/file", node_type="JSON")
+    assert (parse_cache.hits, parse_cache.misses) == (0, 1)
+
+    second = file_parser.parse_text(JSON_TEXT, "/second/file", node_type="JSON")
+    assert (parse_cache.hits, parse_cache.misses) == (1, 1)
+    assert parse_cache.disk_hits == 0
+
+    expected = FileParser(SYNTAX_JSON).parse_text(
+        JSON_TEXT, "/second/file", node_type="JSON"
+    )
+    assert describe(second) == describe(expected)
+    assert second is not first
+    assert {position.split(":")[0] for _, _, position in describe(first)} == {
+        "",
+        "/first/file",
+    }
+
+    # Other node types and texts are not shared.
+    file_parser.parse_text("[1]", node_type="JSON")
+    file_parser.parse_text("[1]", node_type="ARRAY")
+    assert (parse_cache.hits, parse_cache.misses) == (1, 3)
+
+
+def test_parse_cache_disk(tmp_path: Path) -> None:
+    file_parser = FileParser(SYNTAX_JSON, parse_cache=ParseCache(cache_dir=tmp_path))
+    file_parser.parse_text(JSON_TEXT, node_type="JSON")
+    assert len(list(tmp_path.glob("*.tree"))) == 1
+
+    # A new cache reads the tree written by the first one.
+    parse_cache = ParseCache(cache_dir=tmp_path)
+    file_parser = FileParser(SYNTAX_JSON, parse_cache=parse_cache)
+    found = file_parser.parse_text(JSON_TEXT, "/some/file", node_type="JSON")
+    assert (parse_cache.hits, parse_cache.disk_hits, parse_cache.misses) == (1, 1, 0)
+
+    expected = FileParser(SYNTAX_JSON).parse_text(
+        JSON_TEXT, "/some/file", node_type="JSON"
+    )
+    assert describe(found) == describe(expected)
+
+    # The tree is in memory now.
+    file_parser.parse_text(JSON_TEXT, node_type="JSON")
+    assert (parse_cache.hits, parse_cache.disk_hits) == (2, 1)
+
+
+def test_parse_cache_corrupted_file(tmp_path: Path) -> None:
+    FileParser(SYNTAX_JSON, parse_cache=ParseCache(cache_dir=tmp_path)).parse_text(
+        JSON_TEXT, node_type="JSON"
+    )
+    (tree_file,) = tmp_path.glob("*.tree")
+    tree_file.write_bytes(b"garbage")
+
+    parse_cache = ParseCache(cache_dir=tmp_path)
+    file_parser = FileParser(SYNTAX_JSON, parse_cache=parse_cache)
+    file_parser.parse_text(JSON_TEXT, node_type="JSON")
+    assert (parse_cache.hits, parse_cache.misses) == (0, 1)
+
+    # The file was written again.
+    assert isinstance(pickle.loads(tree_file.read_bytes()), CompactTree)
+
+
+def test_parse_cache_lru() -> None:
+    file_parser = FileParser(SYNTAX_JSON)
+    texts = ["[1, 2, 3]", "[4, 5, 6]", "[7, 8, 9]"]
+    size = CompactTree(
+        file_parser.parse_text(texts[0], node_type="JSON"), file_parser.token_type_ids
+    ).size
+
+    parse_cache = ParseCache(max_memory=2 * size)
+    file_parser = FileParser(SYNTAX_JSON, parse_cache=parse_cache)
+
+    for text in texts[:2]:
+        file_parser.parse_text(text, node_type="JSON")
+
+    # Uses the first text, so the second one is evicted for the third one.
+    file_parser.parse_text(texts[0], node_type="JSON")
+    file_parser.parse_text(texts[2], node_type="JSON")
+    assert parse_cache.memory_size == 2 * size
+    assert len(parse_cache.trees) == 2
+
+    hits = parse_cache.hits
+    file_parser.parse_text(texts[0], node_type="JSON")
+    assert parse_cache.hits == hits + 1
+    file_parser.parse_text(texts[1], node_type="JSON")
+    assert parse_cache.hits == hits + 1
+
+
+@pytest.mark.parametrize("use_cache_dir", [False, True])
+def test_parse_cache_threads(tmp_path: Path, use_cache_dir: bool) -> None:
+    texts = [f'[{index}, {{"foo": {index}}}]' for index in range(20)]
+    expected = {
+        text: describe(FileParser(SYNTAX_JSON).parse_text(text, node_type="JSON"))
+        for text in texts
+    }
+
+    # Small enough that trees are evicted while other threads use the cache
+    parse_cache = ParseCache(
+        max_memory=2000, cache_dir=tmp_path if use_cache_dir else None
+    )
+    file_parser = FileParser(SYNTAX_JSON, parse_cache=parse_cache)
+
+    def parse(text: str) -> List[Tuple[str, str, str]]:
+        return describe(file_parser.parse_text(text, node_type="JSON"))
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(parse, texts * 50))
+
+    assert results == [expected[text] for text in texts * 50]
+    assert parse_cache.hits + parse_cache.misses == len(results)
+    assert parse_cache.memory_size == sum(
+        tree.size for tree in parse_cache.trees.values()
+    )
+    assert parse_cache.memory_size <= parse_cache.max_memory
+
+
+def test_parse_cache_errors_not_cached() -> None:
+    parse_cache = ParseCache()
+    file_parser = FileParser(SYNTAX_JSON, parse_cache=parse_cache)
+
+    for _ in range(2):
+        with pytest.raises(ParseError):
+            file_parser.parse_text("[1,", node_type="JSON")
+
+    assert (parse_cache.hits, parse_cache.misses) == (0, 2)
+    assert not parse_cache.trees
+
+
+def test_parse_cache_engines() -> None:
+    parse_cache = ParseCache()
+    FileParser(SYNTAX_JSON, parse_cache=parse_cache).parse_text("[]", node_type="JSON")
+    FileParser(SYNTAX_JSON, engine="lalr", parse_cache=parse_cache).parse_text(
+        "[]", node_type="JSON"
+    )
+    assert (parse_cache.hits, parse_cache.misses) == (0, 2)
+
+
+def test_parse_cache_pickle(tmp_path: Path) -> None:
+    parse_cache = ParseCache(max_memory=1000, cache_dir=tmp_path)
+    file_parser = FileParser(SYNTAX_JSON, parse_cache=parse_cache)
+    file_parser.parse_text("[]", node_type="JSON")
+
+    unpickled = pickle.loads(pickle.dumps(file_parser))
+    assert unpickled.parse_cache is not None
+    assert unpickled.parse_cache.max_memory == 1000
+    assert unpickled.parse_cache.cache_dir == tmp_path
+    assert not unpickled.parse_cache.trees
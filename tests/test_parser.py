@@ -0,0 +1,141 @@
+from pathlib import Path
+
+import pytest
+
+from basil.exceptions import ParseError
+from basil.file_parser import FileParser
+from basil.models import ParserInput
+from basil.parser import (
+    FAILED,
+    BaseParser,
+    ChoiceParser,
+    ConcatenateParser,
+    OptionalParser,
+    RepeatParser,
+)
+from tests.json_parser import SYNTAX_JSON
+
+
+def disable_predictive_dispatch(file_parser: FileParser) -> None:
+    # Make every parser look like it can start with any token type, so all
+    # alternatives are tried like before dispatching on first token types.
+
+    def visit(parser: BaseParser) -> None:
+        parser.nullable = True
+
+        if isinstance(parser, (ChoiceParser, ConcatenateParser)):
+            for child in parser.parsers:
+                visit(child)
+        elif isinstance(parser, (OptionalParser, RepeatParser)):
+            visit(parser.inner)
+
+        if isinstance(parser, ChoiceParser):
+            parser.build_dispatch()
+
+    for parser in file_parser.node_parsers.values():
+        visit(parser)
+
+
+@pytest.mark.parametrize(
+    ["text"],
+    [
+        ("[]",),
+        ('[1, [2, {}], {"a": [true, false, null]}]',),
+        ('{"foo": [3, null, false, {"bar": 3, "baz": []}]}',),
+        ("[1, 2",),
+        ("[1, 2,",),
+        ("[1 2]",),
+        ('{"a": 1,}',),
+        ('{"a" 1}',),
+        ("",),
+        ("]",),
+        ("[[[[]]]",),
+    ],
+)
+def test_predictive_dispatch_same_result(text: str) -> None:
+    plain_parser = FileParser(SYNTAX_JSON)
+    disable_predictive_dispatch(plain_parser)
+
+    predictive_parser = FileParser(SYNTAX_JSON)
+
+    try:
+        expected = repr(plain_parser.parse_text(text, node_type="JSON"))
+    except ParseError as e:
+        with pytest.raises(ParseError) as raised:
+            predictive_parser.parse_text(text, node_type="JSON")
+
+        assert raised.value.offset == e.offset
+        assert raised.value.expected_token_types == e.expected_token_types
+        assert str(raised.value) == str(e)
+    else:
+        found = repr(predictive_parser.parse_text(text, node_type="JSON"))
+        assert found == expected
+
+
+def test_parser_analysis() -> None:
+    file_parser = FileParser(SYNTAX_JSON)
+    parsers = file_parser.node_parsers
+
+    assert parsers["JSON"].first_token_types == {
+        "array_start",
+        "false",
+        "integer",
+        "null",
+        "object_start",
+        "string",
+        "true",
+    }
+    assert parsers["OBJECT"].first_token_types == {"object_start"}
+    assert not any(parser.nullable for parser in parsers.values())
+
+    assert parsers["JSON"].min_length == 1
+    assert parsers["ARRAY"].min_length == 2
+    assert parsers["OBJECT_ITEM"].min_length == 3
+
+
+@pytest.mark.parametrize(
+    ["text", "should_parse"],
+    [
+        ("[1, [2, {}], 3]", True),
+        ('{"a": [1]}', True),
+        ('{"a": ', False),
+        ("[1, 2", False),
+    ],
+)
+def test_min_length_fail_fast(text: str, should_parse: bool) -> None:
+    file_parser = FileParser(SYNTAX_JSON)
+    tokens = file_parser.tokenize_text_to_array(text)
+    parser_input = ParserInput(tokens, Path("foo.json"))
+    parser = file_parser.node_parsers["JSON"]
+
+    context = file_parser.new_context()
+    context.error_collector.enabled = False
+
+    offset = parser.parse(parser_input, 0, [], context)
+
+    if should_parse:
+        assert offset == len(tokens)
+    else:
+        assert offset == FAILED
+
+    assert context.error_collector.offset == -1
+
+
+def test_error_collector_furthest_offset() -> None:
+    file_parser = FileParser(SYNTAX_JSON)
+    token_type_ids = file_parser.token_type_ids
+    error_collector = file_parser.new_context().error_collector
+
+    tokens = file_parser.tokenize_text_to_array("[1 2]")
+    parser_input = ParserInput(tokens, Path("foo.json"))
+
+    error_collector.reset()
+    error_collector.register(1, 1 << token_type_ids["comma"])
+    error_collector.register(2, 1 << token_type_ids["array_end"])
+    error_collector.register(2, 1 << token_type_ids["comma"])
+    error_collector.register(0, 1 << token_type_ids["null"])
+
+    error = error_collector.get_furthest_error(parser_input)
+
+    assert error.offset == 2
+    assert error.expected_token_types == {"array_end", "comma"}
@@ -0,0 +1,113 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+
+import pytest
+
+from basil.exceptions import ParseError
+from basil.file_parser import FileParser
+from basil.models import Node
+from tests.json_parser import SYNTAX_JSON
+from tests.syntaxes import STATEMENTS_SYNTAX
+
+TEXT = '{"foo": [3, null, false,\n  {"bar": 3, "baz": []}],\n"long string": "abc"}'
+
+
+async def push_chunks(
+    file_parser: FileParser,
+    text: str,
+    chunk_size: int,
+    node_type: str,
+    executor: Optional[ThreadPoolExecutor] = None,
+) -> Node:
+    push_parser = file_parser.push_parser(node_type=node_type, executor=executor)
+
+    for start in range(0, len(text), chunk_size):
+        await push_parser.feed(text[start : start + chunk_size])
+
+    return await push_parser.close()
+
+
+@pytest.mark.parametrize(["chunk_size"], [(1,), (7,), (1000,)])
+@pytest.mark.parametrize(
+    ["text"],
+    [
+        pytest.param(TEXT, id="json"),
+        pytest.param("[" * 100 + "]" * 100, id="nested"),
+    ],
+)
+def test_push_parser(chunk_size: int, text: str) -> None:
+    file_parser = FileParser(SYNTAX_JSON)
+    expected = repr(file_parser.parse_text(text, node_type="JSON"))
+
+    node = asyncio.run(push_chunks(file_parser, text, chunk_size, "JSON"))
+    assert repr(node) == expected
+
+
+def test_push_parser_executor() -> None:
+    file_parser = FileParser(SYNTAX_JSON)
+    expected = repr(file_parser.parse_text(TEXT, node_type="JSON"))
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        node = asyncio.run(push_chunks(file_parser, TEXT, 5, "JSON", executor))
+
+    assert repr(node) == expected
+
+
+@pytest.mark.parametrize(
+    ["text"],
+    [("[1, 2",), ("[1, 2,]",), ("[1] 2",), ("",), ("[" + "1, " * 500 + "]",)],
+)
+def test_push_parser_error(text: str) -> None:
+    file_parser = FileParser(SYNTAX_JSON)
+
+    with pytest.raises(ParseError) as expected:
+        file_parser.parse_text(text, node_type="JSON")
+
+    with pytest.raises(ParseError) as raised:
+        asyncio.run(push_chunks(file_parser, text, 2, "JSON"))
+
+    assert str(raised.value) == str(expected.value)
+
+
+def test_push_parser_stream_nodes(tmp_path: Path) -> None:
+    syntax_file = tmp_path / "syntax.json"
+    syntax_file.write_text(json.dumps(STATEMENTS_SYNTAX))
+    file_parser = FileParser(syntax_file)
+
+    text = "let a = 1; print a;\n" * 1000
+    expected = file_parser.parse_text(text, node_type="PROGRAM").children
+
+    async def parse() -> List[Node]:
+        push_parser = file_parser.push_parser(node_type="PROGRAM", stream_nodes=True)
+        streamed: List[Node] = []
+        streamed_before_close: List[int] = []
+        stored_tokens: List[int] = []
+
+        async def consume() -> None:
+            async for node in push_parser:
+                streamed.append(node)
+
+        async def produce() -> None:
+            for start in range(0, len(text), 100):
+                await push_parser.feed(text[start : start + 100])
+                stored_tokens.append(len(push_parser.tokens.items))
+                await asyncio.sleep(0)
+
+            streamed_before_close.append(len(streamed))
+            root = await push_parser.close()
+            assert root.children == []
+
+        await asyncio.gather(consume(), produce())
+
+        # Statements are streamed before the end of the text is known.
+        assert streamed_before_close[0] > 0
+
+        # Only the tokens of the last statements are stored.
+        assert max(stored_tokens) < 50
+        return streamed
+
+    streamed = asyncio.run(parse())
+    assert repr(streamed) == repr(expected)
@@ -0,0 +1,265 @@
+import json
+from pathlib import Path
+from typing import Any, List
+
+import pytest
+
+from basil.exceptions import ParseError, TokenizerException
+from basil.file_parser import FileParser
+from basil.models import ErrorNode, Node, Token
+from basil.recovering_parser import RecoveringParser
+from tests.json_parser import SYNTAX_JSON
+from tests.syntaxes import STATEMENTS_SYNTAX
+
+JSON_SYNC_TOKEN_TYPES = ["comma", "object_end", "array_end"]
+
+
+def tokens_of(node: Node) -> List[str]:
+    values: List[str] = []
+    items: List[Token | Node] = [node]
+
+    while items:
+        item = items.pop()
+
+        if isinstance(item, Token):
+            values.append(item.value)
+        else:
+            items += reversed(item.children)
+
+    return values
+
+
+def error_nodes_of(node: Node) -> List[ErrorNode]:
+    found: List[ErrorNode] = []
+    items: List[Token | Node] = [node]
+
+    while items:
+        item = items.pop()
+
+        if isinstance(item, ErrorNode):
+            found.append(item)
+        elif isinstance(item, Node):
+            items += reversed(item.children)
+
+    return found
+
+
+@pytest.mark.parametrize(
+    "text", ["[]", '{"foo": [3, null, false, {"bar": 3, "baz": []}]}', "1"]
+)
+def test_parse_text_recovering_valid(text: str) -> None:
+    file_parser = FileParser(SYNTAX_JSON)
+    root, errors = file_parser.parse_text_recovering(text, node_type="JSON")
+
+    assert errors == []
+    assert repr(root) == repr(file_parser.parse_text(text, node_type="JSON"))
+
+
+@pytest.mark.parametrize(
+    ["text", "sync_token_types", "expected_repr"],
+    [
+        (
+            "[1, : 2, 3]",
+            [],
+            "Node(type='ARRAY', children=[Token(type='array_start', value='['), "
+            + "Node(type='JSON', children=[Token(type='integer', value='1')]), "
+            + "Token(type='comma', value=','), Node(type='JSON', children=[]), "
+            + "ErrorNode(type='ERROR', children=[Token(type='colon', value=':'), "
+            + "Token(type='integer', value='2')]), Token(type='comma', value=','), "
+            + "Node(type='JSON', children=[Token(type='integer', value='3')]), "
+            + "Token(type='array_end', value=']')])",
+        ),
+        (
+            "[1, 2 3, 4]",
+            [],
+            "Node(type='ARRAY', children=[Token(type='array_start', value='['), "
+            + "Node(type='JSON', children=[Token(type='integer', value='1')]), "
+            + "Token(type='comma', value=','), "
+            + "Node(type='JSON', children=[Token(type='integer', value='2')]), "
+            + "ErrorNode(type='ERROR', children=[Token(type='integer', value='3')]), "
+            + "Token(type='comma', value=','), "
+            + "Node(type='JSON', children=[Token(type='integer', value='4')]), "
+            + "Token(type='array_end', value=']')])",
+        ),
+        (
+            '{"a" 5, "b": 1}',
+            JSON_SYNC_TOKEN_TYPES,
+            "Node(type='OBJECT', children=[Token(type='object_start', value='{'), "
+            + "Node(type='OBJECT_ITEM', children=[Token(type='string', value='\"a\"')]), "
+            + "ErrorNode(type='ERROR', children=[Token(type='integer', value='5')]), "
+            + "Token(type='comma', value=','), "
+            + "Node(type='OBJECT_ITEM', children=[Token(type='string', value='\"b\"'), "
+            + "Token(type='colon', value=':'), "
+            + "Node(type='JSON', children=[Token(type='integer', value='1')])]), "
+            + "Token(type='object_end', value='}')])",
+        ),
+    ],
+)
+def test_parse_text_recovering_json(
+    text: str, sync_token_types: List[str], expected_repr: str
+) -> None:
+    file_parser = FileParser(SYNTAX_JSON)
+    root, errors = file_parser.parse_text_recovering(
+        text, node_type="JSON", sync_token_types=sync_token_types
+    )
+
+    assert repr(root.children) == f"[{expected_repr}]"
+    assert tokens_of(root) == [token.value for token in file_parser.tokenize_text(text)]
+
+    # The first error is the one parse_text() raises.
+    with pytest.raises(ParseError) as raised:
+        file_parser.parse_text(text, node_type="JSON")
+
+    assert len(errors) == 1
+    assert str(errors[0]) == str(raised.value)
+    assert [node.error for node in error_nodes_of(root)] == errors
+
+
+def test_parse_text_recovering_sync_tokens() -> None:
+    # Without sync tokens, the item after the error is skipped too.
+    file_parser = FileParser(SYNTAX_JSON)
+    text = '{"a" 5, "b": 1}'
+
+    root, errors = file_parser.parse_text_recovering(text, node_type="JSON")
+    assert len(errors) == 1
+    (error_node,) = error_nodes_of(root)
+    assert tokens_of(error_node) == ["5", ",", '"b"', ":", "1", "}"]
+
+    with pytest.raises(ValueError):
+        file_parser.parse_text_recovering(
+            text, node_type="JSON", sync_token_types=["nonexistent"]
+        )
+
+
+@pytest.mark.parametrize(
+    ["sync_token_types", "expected_positions"],
+    [
+        (JSON_SYNC_TOKEN_TYPES, ["1:10", "1:22", "1:36"]),
+        # Without sync tokens, the inner object can't end after the error, the
+        # outer one ends there instead.
+        ([], ["1:10", "1:22", "1:36", "1:38"]),
+    ],
+)
+def test_parse_text_recovering_multiple_errors(
+    sync_token_types: List[str], expected_positions: List[str]
+) -> None:
+    file_parser = FileParser(SYNTAX_JSON)
+    text = '{"a": [1 2], "b": [3 4], "c": {"d" 5}}'
+
+    root, errors = file_parser.parse_text_recovering(
+        text, "/some/file", node_type="JSON", sync_token_types=sync_token_types
+    )
+
+    assert [str(error).split(": ")[0] for error in errors] == [
+        f"/some/file:{position}" for position in expected_positions
+    ]
+    assert [error.expected_token_types for error in errors[:3]] == [
+        {"array_end", "comma"},
+        {"array_end", "comma"},
+        {"colon"},
+    ]
+    assert [tokens_of(node) for node in error_nodes_of(root)][:3] == [
+        ["2"],
+        ["4"],
+        ["5"],
+    ]
+
+
+@pytest.mark.parametrize(
+    ["text", "expected_skipped"],
+    [
+        ("[1, 2", [[]]),
+        ("", [[]]),
+        ("[1] 2 3", [["2", "3"]]),
+        ("]", [["]"]]),
+        ("[1 2]", [["2"]]),
+        ("[1]]", [["]"]]),
+    ],
+)
+def test_parse_text_recovering_ends(
+    text: str, expected_skipped: List[List[str]]
+) -> None:
+    file_parser = FileParser(SYNTAX_JSON)
+    root, errors = file_parser.parse_text_recovering(text, node_type="JSON")
+
+    assert root.type == "JSON"
+    assert [tokens_of(node) for node in error_nodes_of(root)] == expected_skipped
+    assert len(errors) == len(expected_skipped)
+    assert all(error.expected_token_types for error in errors)
+
+
+@pytest.mark.parametrize(["text", "offset"], [("[1]]", 3), ("2[", 1)])
+def test_parse_text_recovering_after_root(text: str, offset: int) -> None:
+    file_parser = FileParser(SYNTAX_JSON)
+    _, errors = file_parser.parse_text_recovering(text, node_type="JSON")
+
+    (error,) = errors
+    assert error.offset == offset
+    assert error.expected_token_types == {"end of file"}
+
+
+def test_parse_text_recovering_statements(tmp_path: Path) -> None:
+    syntax_file = tmp_path / "syntax.json"
+    syntax_file.write_text(json.dumps(STATEMENTS_SYNTAX))
+    file_parser = FileParser(syntax_file)
+    text = "let a = 1;\nlet = 2;\nprint a;\nlet c 3;\nprint b;\n"
+
+    root, errors = file_parser.parse_text_recovering(
+        text, "/some/file", node_type="PROGRAM", sync_token_types=["semicolon"]
+    )
+
+    assert [str(error).split(": ")[0] for error in errors] == [
+        "/some/file:2:5",
+        "/some/file:4:7",
+    ]
+    assert [child.type for child in root.children] == ["STATEMENT"] * 5
+    assert [tokens_of(node) for node in error_nodes_of(root)] == [["=", "2"], ["3"]]
+
+    with pytest.raises(ParseError) as raised:
+        file_parser.parse_text(text, "/some/file", node_type="PROGRAM")
+
+    assert str(errors[0]) == str(raised.value)
+
+
+def test_parse_text_recovering_long_input() -> None:
+    file_parser = FileParser(SYNTAX_JSON)
+    text = "[" + ", ".join(["1", "2 3", ": 4"] * 1000) + "]"
+
+    root, errors = file_parser.parse_text_recovering(text, node_type="JSON")
+
+    assert len(errors) == 2000
+    assert tokens_of(root) == [token.value for token in file_parser.tokenize_text(text)]
+
+
+def test_parse_text_recovering_deep_nesting(monkeypatch: pytest.MonkeyPatch) -> None:
+    file_parser = FileParser(SYNTAX_JSON)
+    depth = 1000
+    text = "[" * depth + ":" + "]" * depth
+
+    calls = 0
+    continue_lookaheads = RecoveringParser._continue_lookaheads
+
+    def count_calls(*args: Any) -> Any:
+        nonlocal calls
+        calls += 1
+        return continue_lookaheads(*args)
+
+    monkeypatch.setattr(RecoveringParser, "_continue_lookaheads", count_calls)
+    root, errors = file_parser.parse_text_recovering(text, node_type="JSON")
+
+    # No frame can continue, every offset after the error is tried.
+    assert len(errors) == 1
+    assert [tokens_of(node) for node in error_nodes_of(root)] == [[":"] + ["]"] * depth]
+
+    # The stack is walked once, not once per skipped token.
+    assert calls < 10 * depth
+
+
+def test_parse_text_recovering_invalid() -> None:
+    file_parser = FileParser(SYNTAX_JSON)
+
+    with pytest.raises(ValueError):
+        file_parser.parse_text_recovering("[]", node_type="NONEXISTENT")
+
+    with pytest.raises(TokenizerException):
+        file_parser.parse_text_recovering("[#]", node_type="JSON")
@@ -1,5 +1,5 @@
 import json
-from typing import Type
+from typing import Any, Type
 
 import pytest
 
@@ -432,3 +432,39 @@ def test_syntax_loader_ok() -> None:
 
     # Should not raise
     SyntaxLoader(syntax_file_content)
+
+
+def test_follow_deep_syntax(monkeypatch: pytest.MonkeyPatch) -> None:
+    # Node types are listed innermost first, and ROOT adds a follow token that
+    # has to flow down through all of them.
+    node_count = 400
+    names = [f"N{'A' * index}" for index in range(node_count + 1)]
+    nodes = {names[-1]: "x"}
+    for index in reversed(range(node_count)):
+        nodes[names[index]] = f"x {names[index + 1]}?"
+    nodes["ROOT"] = "N semicolon"
+
+    syntax = {
+        "filtered_tokens": [],
+        "keyword_tokens": {},
+        "nodes": nodes,
+        "regular_tokens": {"x": "x", "semicolon": ";"},
+        "root_node": "ROOT",
+    }
+
+    calls = 0
+    follow_of_children = SyntaxLoader._follow_of_children
+
+    def count_calls(*args: Any) -> Any:
+        nonlocal calls
+        calls += 1
+        return follow_of_children(*args)
+
+    monkeypatch.setattr(SyntaxLoader, "_follow_of_children", count_calls)
+    syntax_loader = SyntaxLoader(json.dumps(syntax))
+
+    semicolon_id = syntax_loader.token_type_ids["semicolon"]
+    assert semicolon_id in syntax_loader.parsers[names[-1]].follow_token_type_ids
+
+    # Every parser is visited a few times, not once per nesting level.
+    assert calls < 20 * len(nodes)
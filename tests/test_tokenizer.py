@@ -0,0 +1,189 @@
+import json
+from random import Random
+from typing import Dict, Set
+
+import pytest
+
+from basil.syntax_loader.syntax_loader import SyntaxLoader
+from basil.tokenizer import (
+    DFATokenizer,
+    MasterRegexTokenizer,
+    RegexTokenizer,
+    build_tokenizer,
+)
+from tests.json_parser import SYNTAX_JSON
+
+
+def make_syntax_loader(
+    keyword_tokens: Dict[str, str], regular_tokens: Dict[str, str]
+) -> SyntaxLoader:
+    return SyntaxLoader(
+        json.dumps(
+            {
+                "filtered_tokens": [],
+                "keyword_tokens": keyword_tokens,
+                "nodes": {"ROOT": " ".join(regular_tokens.keys())},
+                "regular_tokens": regular_tokens,
+                "root_node": "ROOT",
+            }
+        )
+    )
+
+
+KEYWORD_SYNTAX_LOADER = make_syntax_loader(
+    {"if_": "if", "else_": "else"},
+    {"identifier": "[a-z_]+", "integer": "[0-9]+", "whitespace": "\\s+"},
+)
+
+
+@pytest.mark.parametrize(
+    ["text"],
+    [
+        ("",),
+        ("null",),
+        ('{"foo": [3, null, false, {"bar": 3, "baz": []}]}',),
+        ('[1,\n2,\n  "three"]',),
+        ("[1, 2, ~]",),
+        ("~",),
+    ],
+)
+def test_master_regex_tokenizer_equivalence_json(text: str) -> None:
+    syntax_loader = SyntaxLoader(SYNTAX_JSON.read_text())
+    master_tokenizer = MasterRegexTokenizer.build(syntax_loader.tokens)
+    assert master_tokenizer
+
+    regex_tokenizer = RegexTokenizer(syntax_loader.tokens)
+
+    assert list(master_tokenizer.scan(text)) == list(regex_tokenizer.scan(text))
+
+
+@pytest.mark.parametrize(
+    ["text"],
+    [
+        ("if",),
+        ("iffy else elsewhere",),
+        ("if 3 else 4",),
+        ("if3else4",),
+        ("if @",),
+    ],
+)
+def test_master_regex_tokenizer_equivalence_keywords(text: str) -> None:
+    master_tokenizer = MasterRegexTokenizer.build(KEYWORD_SYNTAX_LOADER.tokens)
+    assert master_tokenizer
+
+    regex_tokenizer = RegexTokenizer(KEYWORD_SYNTAX_LOADER.tokens)
+
+    assert list(master_tokenizer.scan(text)) == list(regex_tokenizer.scan(text))
+
+
+def test_master_regex_tokenizer_keyword_priority() -> None:
+    tokenizer = build_tokenizer(KEYWORD_SYNTAX_LOADER.tokens)
+    assert isinstance(tokenizer, MasterRegexTokenizer)
+
+    assert list(tokenizer.scan("iffy")) == [("if_", 0, 2), ("identifier", 2, 4)]
+
+
+@pytest.mark.parametrize(
+    ["regular_tokens"],
+    [
+        pytest.param({"quoted": "(['\"]).*?\\1"}, id="backreference"),
+        pytest.param({"quoted": "(?P<quote>['\"]).*?(?P=quote)"}, id="named-group"),
+        pytest.param({"word": "(?i)word"}, id="inline-flags"),
+    ],
+)
+def test_build_tokenizer_fallback(regular_tokens: Dict[str, str]) -> None:
+    syntax_loader = make_syntax_loader({}, regular_tokens)
+
+    assert MasterRegexTokenizer.build(syntax_loader.tokens) is None
+    assert isinstance(build_tokenizer(syntax_loader.tokens), RegexTokenizer)
+
+
+@pytest.mark.parametrize(
+    ["text"],
+    [
+        ("",),
+        ("null",),
+        ('{"foo": [3, null, false, {"bar": 3, "baz": []}]}',),
+        ('[1,\n2,\n  "thrée"] ',),
+        ("[1, 2, ~]",),
+        ("~",),
+    ],
+)
+def test_dfa_tokenizer_equivalence_json(text: str) -> None:
+    syntax_loader = SyntaxLoader(SYNTAX_JSON.read_text())
+    dfa_tokenizer = DFATokenizer(syntax_loader.tokens, syntax_loader.compile_dfa())
+    regex_tokenizer = RegexTokenizer(syntax_loader.tokens)
+
+    assert not dfa_tokenizer.dfa.unsupported_token_types
+    assert list(dfa_tokenizer.scan(text)) == list(regex_tokenizer.scan(text))
+
+
+@pytest.mark.parametrize(
+    ["text"],
+    [
+        ("if",),
+        ("iffy else elsewhere",),
+        ("if 3 else 4",),
+        ("if3else4",),
+        ("if @",),
+    ],
+)
+def test_dfa_tokenizer_equivalence_keywords(text: str) -> None:
+    dfa_tokenizer = DFATokenizer(
+        KEYWORD_SYNTAX_LOADER.tokens, KEYWORD_SYNTAX_LOADER.compile_dfa()
+    )
+    regex_tokenizer = RegexTokenizer(KEYWORD_SYNTAX_LOADER.tokens)
+
+    assert list(dfa_tokenizer.scan(text)) == list(regex_tokenizer.scan(text))
+
+
+def test_dfa_tokenizer_fallback() -> None:
+    syntax_loader = make_syntax_loader(
+        {"keyword": "key(?=word)"},
+        {
+            "quoted": "(['\"]).*\\1",
+            "comment": "#.*?$",
+            "number": "[0-9]{1,3}(\\.[0-9]+)?",
+            "word": "\\w+",
+            "whitespace": "\\s+",
+        },
+    )
+    dfa_tokenizer = DFATokenizer(syntax_loader.tokens, syntax_loader.compile_dfa())
+    regex_tokenizer = RegexTokenizer(syntax_loader.tokens)
+
+    assert set(dfa_tokenizer.dfa.unsupported_token_types) == {
+        "keyword",
+        "quoted",
+        "comment",
+    }
+
+    text = "keyword key 'a' 1234.5 #done"
+    assert list(dfa_tokenizer.scan(text)) == list(regex_tokenizer.scan(text))
+
+
+@pytest.mark.parametrize(
+    ["regular_tokens", "unsupported_token_types"],
+    [
+        ({"op": "=|==", "word": "[a-z]+|[a-z]+1"}, {"op", "word"}),
+        ({"greedy": "a*(ab)?b", "other": "[ab]"}, {"greedy"}),
+        ({"repeat": "(ab|a)*c", "other": "[abc]"}, {"repeat"}),
+        ({"keyword": "if|else|for", "number": "[0-9]{1,3}(\\.[0-9]+)?"}, set()),
+        ({"same_length": "ab|a1|bc", "word": "[ab1]+"}, set()),
+    ],
+)
+def test_dfa_tokenizer_equivalence_first_match(
+    regular_tokens: Dict[str, str], unsupported_token_types: Set[str]
+) -> None:
+    # re takes the first alternative that matches, not the longest one.
+    syntax_loader = make_syntax_loader({}, regular_tokens | {"whitespace": "\\s+"})
+    dfa_tokenizer = DFATokenizer(syntax_loader.tokens, syntax_loader.compile_dfa())
+    regex_tokenizer = RegexTokenizer(syntax_loader.tokens)
+
+    assert set(dfa_tokenizer.dfa.unsupported_token_types) == unsupported_token_types
+
+    random = Random(0)
+    texts = ["a == ab1", "aab abab aaab", "if else 12.5 1234", "ab1 a1b"]
+    texts += ["".join(random.choices("=ab1c. ", k=12)) for _ in range(200)]
+
+    for text in texts:
+        assert list(dfa_tokenizer.scan(text)) == list(regex_tokenizer.scan(text))
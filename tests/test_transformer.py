@@ -0,0 +1,115 @@
+import json
+from typing import Any, List
+
+import pytest
+
+from basil.file_parser import FileParser
+from basil.models import Node, Token
+from basil.transformer import Transformer
+from tests.json_parser import SYNTAX_JSON
+
+
+def without_tokens(children: List[Any]) -> List[Any]:
+    return [child for child in children if not isinstance(child, Token)]
+
+
+def object_items(children: List[Any]) -> Any:
+    return dict(without_tokens(children))
+
+
+def object_item(children: List[Any]) -> Any:
+    key, value = without_tokens(children)
+    return (key, value)
+
+
+def build_json_transformer() -> Transformer[Any]:
+    transformer: Transformer[Any] = Transformer()
+    transformer.register_node("JSON", lambda children: children[0])
+    transformer.register_node("BOOLEAN", lambda children: children[0])
+    transformer.register_node("ARRAY", without_tokens)
+    transformer.register_node("OBJECT", object_items)
+    transformer.register_node("OBJECT_ITEM", object_item)
+    transformer.register_token("string", lambda token: token.value[1:-1])
+    transformer.register_token("integer", lambda token: int(token.value))
+    transformer.register_token("null", lambda token: None)
+    transformer.register_token("true", lambda token: True)
+    transformer.register_token("false", lambda token: False)
+    return transformer
+
+
+@pytest.mark.parametrize(
+    ["text"],
+    [
+        ("null",),
+        ("[1,2,3]",),
+        ("[null,false,{}]",),
+        ('{"foo": [false, null, 123, {"bar": [], "baz": {}}]}',),
+    ],
+)
+def test_transformer(text: str) -> None:
+    file_parser = FileParser(SYNTAX_JSON)
+    transformer = build_json_transformer()
+
+    tree = file_parser.parse_text(text, node_type="JSON")
+    assert transformer.transform(tree) == json.loads(text)
+
+    events = file_parser.iter_events(text, node_type="JSON")
+    assert transformer.transform_events(events) == json.loads(text)
+
+
+def test_transformer_deep_nesting() -> None:
+    file_parser = FileParser(SYNTAX_JSON, engine="iterative")
+    transformer = build_json_transformer()
+    depth = 20_000
+
+    tree = file_parser.parse_text("[" * depth + "]" * depth, node_type="JSON")
+    transformed = transformer.transform(tree)
+
+    found_depth = 1
+    while transformed:
+        transformed = transformed[0]
+        found_depth += 1
+
+    assert found_depth == depth
+
+
+def test_transformer_without_children() -> None:
+    file_parser = FileParser(SYNTAX_JSON)
+    transformer = build_json_transformer()
+
+    untransformed: List[Node] = []
+
+    def count_items(node: Node) -> int:
+        untransformed.append(node)
+        return len(node.children)
+
+    transformer.register_node_without_children("OBJECT", count_items)
+    text = '[{"a": 1, "b": [2]}, {}]'
+
+    tree = file_parser.parse_text(text, node_type="JSON")
+    assert transformer.transform(tree) == [5, 2]
+
+    events = file_parser.iter_events(text, node_type="JSON")
+    assert transformer.transform_events(events) == [5, 2]
+
+    assert repr(untransformed[0]) == repr(untransformed[2])
+
+
+def test_transformer_tokens_without_handler() -> None:
+    file_parser = FileParser(SYNTAX_JSON)
+    transformer: Transformer[Any] = Transformer()
+    transformer.register_node("JSON", lambda children: children[0])
+    transformer.register_node("ARRAY", lambda children: children)
+
+    tree = file_parser.parse_text("[1]", node_type="JSON")
+    transformed = transformer.transform(tree)
+
+    assert [token.value for token in transformed] == ["[", "1", "]"]
+
+
+def test_transformer_node_without_handler() -> None:
+    file_parser = FileParser(SYNTAX_JSON)
+    transformer: Transformer[Any] = Transformer()
+
+    with pytest.raises(ValueError):
+        transformer.transform(file_parser.parse_text("[]", node_type="JSON"))